@@ -0,0 +1,84 @@
+"""
+Командная строка Cyber Owl TTS.
+
+    cyber-owl-tts serve      — запуск HTTP-сервера
+    cyber-owl-tts compile    — сборка TorchScript/int8 вариантов модели и их сравнение
+    cyber-owl-tts autotune   — подбор числа рабочих, потоков torch и привязки к ядрам
+    cyber-owl-tts build-bank — сборка банка заранее синтезированных фраз
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+
+
+# Косинусная близость к eager-выходу, ниже которой вариант модели считается испорченным
+DEFAULT_MIN_SIMILARITY = 0.9
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cyber-owl-tts", description="Cyber Owl TTS")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("serve", help="запустить HTTP-сервер")
+
+    compile_parser = commands.add_parser("compile", help="скомпилировать модель (TorchScript, int8)")
+    compile_parser.add_argument("--backends", default="torchscript,int8",
+                                help="какие варианты собрать (torchscript,int8)")
+    compile_parser.add_argument("--no-compare", action="store_true",
+                                help="не сравнивать с eager-моделью")
+    compile_parser.add_argument("--min-similarity", type=float, default=DEFAULT_MIN_SIMILARITY,
+                                help="минимальная похожесть на eager-выход")
+
+    autotune_parser = commands.add_parser("autotune", help="подобрать план потоков инференса")
+    autotune_parser.add_argument("--mode", choices=("thread", "pool"),
+                                 help="режим исполнителя (по умолчанию TTS_EXECUTOR_MODE)")
+    autotune_parser.add_argument("--target", choices=("throughput", "latency"), default="throughput",
+                                 help="что оптимизировать")
+    autotune_parser.add_argument("--requests", type=int, default=24, help="запросов на вариант")
+    autotune_parser.add_argument("--clients", type=int,
+                                 help="одновременных клиентов (по умолчанию по цели)")
+    autotune_parser.add_argument("--max-workers", type=int, default=8, help="максимум рабочих")
+    autotune_parser.add_argument("--interop-threads", type=int, default=1,
+                                 help="inter-op потоков torch")
+    autotune_parser.add_argument("--no-pin", action="store_true",
+                                 help="не пробовать привязку к ядрам")
+    autotune_parser.add_argument("--output", help="куда сохранить план (по умолчанию TTS_THREAD_PLAN)")
+    autotune_parser.add_argument("--dry-run", action="store_true", help="только замеры, без сохранения")
+
+    bank_parser = commands.add_parser("build-bank", help="собрать банк фраз (время, приветствия)")
+    bank_parser.add_argument("--sample-rate", type=int, choices=(8000, 24000, 48000),
+                             help="частота банка (по умолчанию TTS_SAMPLE_RATE)")
+    bank_parser.add_argument("--phrases", help="файл с дополнительными фразами, по одной в строке")
+    bank_parser.add_argument("--no-time", action="store_true", help="без фраз времени")
+    bank_parser.add_argument("--output", help="куда сохранить банк (по умолчанию TTS_PHRASE_BANK)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    # Модули команд импортируются лениво: при импорте читается конфигурация
+    # и загружается torch, для --help это не нужно
+    if args.command == "serve":
+        from app.main import main as serve
+
+        serve()
+        return 0
+    if args.command == "compile":
+        from app.utils import model_translator
+
+        return model_translator.run(args)
+    if args.command == "autotune":
+        from app.utils import autotune
+
+        return autotune.run(args)
+    if args.command == "build-bank":
+        from app.utils import bank_builder
+
+        return bank_builder.run(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
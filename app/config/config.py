@@ -32,4 +32,107 @@ TTS_USE_TORCH_MODEL_MANAGER_BOOL = strtobool(TTS_USE_TORCH_MODEL_MANAGER_STR)
 
 TTS_SOUND_DEVICE_NAME = os.getenv("TTS_SOUND_DEVICE_NAME")
 
-TTS_LOGS_DIR = os.getenv("TTS_LOGS_DIR")
\ No newline at end of file
+TTS_LOGS_DIR = os.getenv("TTS_LOGS_DIR")
+
+# --- Кэш синтезированного аудио ---
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR")
+if not TTS_CACHE_DIR:
+    TTS_CACHE_DIR = os.path.join(CURRENT_DIRECTORY, "..", "cache")
+
+TTS_CACHE_MEMORY_MB = int(os.getenv("TTS_CACHE_MEMORY_MB", "64"))
+TTS_CACHE_DISK_MB = int(os.getenv("TTS_CACHE_DISK_MB", "1024"))
+TTS_CACHE_TTL_SEC = float(os.getenv("TTS_CACHE_TTL_SEC", "3600"))
+
+# Кэш закодированного аудио (FLAC, Opus, G.711...) рядом с кэшем PCM
+TTS_ENCODED_CACHE_MEMORY_MB = int(os.getenv("TTS_ENCODED_CACHE_MEMORY_MB", "32"))
+TTS_ENCODED_CACHE_DISK_MB = int(os.getenv("TTS_ENCODED_CACHE_DISK_MB", "512"))
+
+# --- Исполнитель синтеза ---
+TTS_EXECUTOR_MODE = os.getenv("TTS_EXECUTOR_MODE", "thread").lower()
+if TTS_EXECUTOR_MODE not in ("thread", "process", "pool"):
+    raise ValueError("TTS_EXECUTOR_MODE должен быть thread, process или pool")
+
+TTS_EXECUTOR_WORKERS = int(os.getenv("TTS_EXECUTOR_WORKERS", "1"))
+# Потоков torch на процесс в режиме pool (0 — поровну делим ядра)
+TTS_POOL_THREADS_PER_WORKER = int(os.getenv("TTS_POOL_THREADS_PER_WORKER", "0"))
+TTS_SYNTHESIS_TIMEOUT_SEC = float(os.getenv("TTS_SYNTHESIS_TIMEOUT_SEC", "30"))
+# План потоков от `cyber-owl-tts autotune` (пустая строка — не применять)
+TTS_THREAD_PLAN = os.getenv("TTS_THREAD_PLAN")
+if TTS_THREAD_PLAN is None:
+    TTS_THREAD_PLAN = os.path.join(CURRENT_DIRECTORY, "..", "models", "thread_plan.json")
+
+# --- Очередь воспроизведения ---
+TTS_JOB_HISTORY = int(os.getenv("TTS_JOB_HISTORY", "1000"))
+
+# Конвейерный синтез по предложениям (воспроизведение начинается с первого)
+TTS_STREAMING = strtobool(os.getenv("TTS_STREAMING", "true"))
+
+# --- Длинные тексты: разбиение на сегменты и склейка ---
+# Максимум символов в одном вызове модели (длинное предложение режется по словам)
+TTS_LONG_TEXT_MAX_CHARS = int(os.getenv("TTS_LONG_TEXT_MAX_CHARS", "500"))
+# Кроссфейд между соседними предложениями, мс (0 — без кроссфейда)
+TTS_CROSSFADE_MS = float(os.getenv("TTS_CROSSFADE_MS", "10"))
+# Кэш PCM отдельных предложений с частотой ответа, МБ (0 — выключен)
+TTS_FRAGMENT_CACHE_MB = int(os.getenv("TTS_FRAGMENT_CACHE_MB", "32"))
+
+# --- Микро-батчирование синтеза (TTS_BATCH_MAX_SIZE=1 — выключено) ---
+TTS_BATCH_MAX_SIZE = int(os.getenv("TTS_BATCH_MAX_SIZE", "1"))
+TTS_BATCH_MAX_WAIT_MS = float(os.getenv("TTS_BATCH_MAX_WAIT_MS", "5"))
+
+# --- Бэкенд модели: eager | torchscript | int8 (см. `cyber-owl-tts compile`) ---
+TTS_MODEL_BACKEND = os.getenv("TTS_MODEL_BACKEND", "eager").lower()
+if TTS_MODEL_BACKEND not in ("eager", "torchscript", "int8"):
+    raise ValueError("TTS_MODEL_BACKEND должен быть eager, torchscript или int8")
+
+# --- Частота дискретизации ---
+# Частота ответа, если запрос не задал sample_rate или quality, Гц
+TTS_SAMPLE_RATE = int(os.getenv("TTS_SAMPLE_RATE", "48000"))
+if not 8000 <= TTS_SAMPLE_RATE <= 48000:
+    raise ValueError("TTS_SAMPLE_RATE должна быть от 8000 до 48000")
+# Родная частота устройства вывода, Гц (0 — частота устройства по умолчанию);
+# звук другой частоты пересчитывается перед выводом
+TTS_SINK_SAMPLE_RATE = int(os.getenv("TTS_SINK_SAMPLE_RATE", "0"))
+
+# --- Локальный IPC: Unix-сокет для сервисов на той же машине (пусто — выключен) ---
+TTS_IPC_SOCKET = os.getenv("TTS_IPC_SOCKET", "")
+# Кольцо общей памяти для аудио на соединение, МБ (0 — аудио идёт через сокет)
+TTS_IPC_RING_MB = float(os.getenv("TTS_IPC_RING_MB", "8"))
+
+# --- Банк заранее синтезированных фраз (cyber-owl-tts build-bank; пусто — без банка) ---
+TTS_PHRASE_BANK = os.getenv("TTS_PHRASE_BANK")
+if TTS_PHRASE_BANK is None:
+    TTS_PHRASE_BANK = os.path.join(CURRENT_DIRECTORY, "..", "models", "phrase_bank.bin")
+
+# --- Канонизация текста перед синтезом и кэшем (регистр, пробелы, числа словами) ---
+TTS_NORMALIZE_TEXT = strtobool(os.getenv("TTS_NORMALIZE_TEXT", "true"))
+# Записей в LRU-кэше канонических форм
+TTS_NORMALIZER_CACHE_SIZE = int(os.getenv("TTS_NORMALIZER_CACHE_SIZE", "4096"))
+
+# --- Звуки-реакции: JSON-справочник (items: id/name, file/sound/path; пусто — без реакций) ---
+TTS_REACTIONS_FILE = os.getenv("TTS_REACTIONS_FILE")
+if TTS_REACTIONS_FILE is None:
+    TTS_REACTIONS_FILE = os.path.join(CURRENT_DIRECTORY, "..", "sounds", "reactions.json")
+
+# --- Запуск: прогревочная фраза (пустая строка — без прогрева) ---
+TTS_WARMUP_TEXT = os.getenv("TTS_WARMUP_TEXT", "Привет.")
+
+# --- Вывод звука: sounddevice | pygame | file | null ---
+TTS_AUDIO_SINK = os.getenv("TTS_AUDIO_SINK", "pygame").lower()
+if TTS_AUDIO_SINK not in ("sounddevice", "pygame", "file", "null"):
+    raise ValueError("TTS_AUDIO_SINK должен быть sounddevice, pygame, file или null")
+
+# Ёмкость кольцевого буфера sounddevice, с
+TTS_SINK_RING_SEC = float(os.getenv("TTS_SINK_RING_SEC", "2"))
+# Каталог WAV-файлов для TTS_AUDIO_SINK=file
+TTS_SINK_FILE_DIR = os.getenv("TTS_SINK_FILE_DIR")
+if not TTS_SINK_FILE_DIR:
+    TTS_SINK_FILE_DIR = os.path.join(CURRENT_DIRECTORY, "..", "recordings")
+
+# --- Ограничение нагрузки (при переполнении — 429 с Retry-After) ---
+# Незавершённых заданий на озвучку (синтез + очередь воспроизведения)
+TTS_MAX_JOBS = int(os.getenv("TTS_MAX_JOBS", "32"))
+# Задач синтеза в пуле одновременно (после склейки одинаковых)
+TTS_MAX_IN_FLIGHT = int(os.getenv("TTS_MAX_IN_FLIGHT", "16"))
+
+# --- Пакетный рендер /api/tts/batch: максимум текстов в одном запросе ---
+TTS_RENDER_MAX_ITEMS = int(os.getenv("TTS_RENDER_MAX_ITEMS", "1000"))
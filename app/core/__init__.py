@@ -4,3 +4,9 @@
 """
 
 # Импорты из проекта
+
+import time
+
+# Начало импорта ядра: пакет инициализируется раньше любого своего подмодуля,
+# поэтому время импорта httpd (torch, pygame, маршруты) отсчитывается отсюда
+IMPORT_STARTED = time.perf_counter()
@@ -0,0 +1,263 @@
+"""
+Двухуровневый кэш синтезированного аудио.
+
+- Память: LRU с ограничением по суммарному объёму в байтах и TTL записей.
+- Диск: файлы int16 PCM, имя файла — хэш (текст, голос, частота, версия модели).
+
+Тот же кэш с dtype=uint8 хранит закодированное аудио (байты FLAC, Opus и т.п.).
+
+Дисковый уровень переживает перезапуск и безопасно разделяется несколькими
+процессами uvicorn: запись идёт во временный файл и публикуется атомарным
+os.replace, а удаление чужими процессами просто считается промахом.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.logger import get_logger
+
+
+log = get_logger(__name__)
+
+PCM_SUFFIX = ".pcm"
+PCM_DTYPE = np.dtype("<i2")
+
+# После переполнения диска чистим до этой доли лимита, чтобы не сканировать
+# каталог на каждой записи
+DISK_LOW_WATERMARK = 0.9
+
+
+def make_cache_key(text: str, speaker: str, sample_rate: int, model_version: str) -> str:
+    """
+    Строит ключ кэша по параметрам синтеза.
+
+    :param text: исходный текст (или SSML)
+    :param speaker: голос
+    :param sample_rate: частота дискретизации
+    :param model_version: версия модели
+    :return: hex-строка sha256
+    """
+    payload = json.dumps([text, speaker, int(sample_rate), model_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_encoded_key(pcm_key: str, codec: str) -> str:
+    """Ключ закодированного аудио: ключ PCM и имя кодека."""
+    return hashlib.sha256(f"{pcm_key}:{codec}".encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Кэш int16 PCM: память (LRU + TTL, лимит в байтах) поверх диска."""
+
+    def __init__(
+        self,
+        memory_limit_bytes: int,
+        ttl_seconds: float,
+        disk_dir: Optional[str] = None,
+        disk_limit_bytes: int = 0,
+        dtype: np.dtype = PCM_DTYPE,
+        suffix: str = PCM_SUFFIX,
+    ):
+        """
+        :param dtype: тип элементов массива (PCM_DTYPE или uint8 для байтов)
+        :param suffix: расширение файлов на диске
+        """
+        self._dtype = np.dtype(dtype)
+        self._suffix = suffix
+        self._memory_limit = memory_limit_bytes
+        self._ttl = ttl_seconds
+        self._disk_dir = disk_dir
+        self._disk_limit = disk_limit_bytes
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes_written = 0
+
+        self._counters: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "memory_expirations": 0,
+            "disk_evictions": 0,
+            "disk_errors": 0,
+        }
+
+        if self._disk_dir:
+            os.makedirs(self._disk_dir, exist_ok=True)
+            self._disk_bytes_written = self._disk_usage()
+
+    # --- Публичный API -------------------------------------------------------
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Возвращает PCM по ключу или None при промахе."""
+        pcm = self._memory_get(key)
+        if pcm is not None:
+            self._count("memory_hits")
+            return pcm
+
+        pcm = self._disk_get(key)
+        if pcm is not None:
+            self._count("disk_hits")
+            self._memory_put(key, pcm)
+            return pcm
+
+        self._count("misses")
+        return None
+
+    def __contains__(self, key: str) -> bool:
+        """Есть ли PCM по ключу (без учёта в счётчиках и без продления LRU)."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] >= time.monotonic():
+                return True
+        return bool(self._disk_dir) and os.path.exists(self._disk_path(key))
+
+    def put(self, key: str, pcm: np.ndarray) -> None:
+        """Сохраняет PCM в оба уровня кэша."""
+        pcm = np.ascontiguousarray(pcm, dtype=self._dtype)
+        pcm.setflags(write=False)
+        self._memory_put(key, pcm)
+        self._disk_put(key, pcm)
+
+    def stats(self) -> Dict[str, float]:
+        """Счётчики попаданий, промахов и вытеснений."""
+        with self._lock:
+            result: Dict[str, float] = dict(self._counters)
+            result["memory_entries"] = len(self._memory)
+            result["memory_bytes"] = self._memory_bytes
+            result["memory_limit_bytes"] = self._memory_limit
+        hits = result["memory_hits"] + result["disk_hits"]
+        total = hits + result["misses"]
+        result["hit_ratio"] = hits / total if total else 0.0
+        return result
+
+    def clear_memory(self) -> None:
+        """Очищает уровень в памяти (диск не трогается)."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    # --- Память --------------------------------------------------------------
+
+    def _memory_get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            pcm, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._memory[key]
+                self._memory_bytes -= pcm.nbytes
+                self._counters["memory_expirations"] += 1
+                return None
+            self._memory.move_to_end(key)
+            return pcm
+
+    def _memory_put(self, key: str, pcm: np.ndarray) -> None:
+        if pcm.nbytes > self._memory_limit:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= old[0].nbytes
+            self._memory[key] = (pcm, time.monotonic() + self._ttl)
+            self._memory_bytes += pcm.nbytes
+            while self._memory_bytes > self._memory_limit:
+                _, (evicted, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.nbytes
+                self._counters["memory_evictions"] += 1
+
+    # --- Диск ----------------------------------------------------------------
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self._disk_dir, key[:2], key + self._suffix)
+
+    def _disk_get(self, key: str) -> Optional[np.ndarray]:
+        if not self._disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            pcm = np.fromfile(path, dtype=self._dtype)
+            os.utime(path)  # mtime служит отметкой LRU для вытеснения
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            log.warning(f"Ошибка чтения кэша {path}: {e}")
+            self._count("disk_errors")
+            return None
+        pcm.setflags(write=False)
+        return pcm
+
+    def _disk_put(self, key: str, pcm: np.ndarray) -> None:
+        if not self._disk_dir:
+            return
+        path = self._disk_path(key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(pcm.tobytes())
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            log.warning(f"Ошибка записи кэша {path}: {e}")
+            self._count("disk_errors")
+            return
+
+        with self._lock:
+            self._disk_bytes_written += pcm.nbytes
+            overflow = self._disk_limit and self._disk_bytes_written > self._disk_limit
+        if overflow:
+            self._evict_disk()
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self._disk_dir):
+            for name in files:
+                if not name.endswith(self._suffix):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _disk_usage(self) -> int:
+        return sum(size for _, size, _ in self._disk_files())
+
+    def _evict_disk(self) -> None:
+        """Удаляет самые давно использованные файлы до нижней отметки лимита."""
+        files = sorted(self._disk_files(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        target = self._disk_limit * DISK_LOW_WATERMARK
+        evicted = 0
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                evicted += 1
+            except FileNotFoundError:
+                pass  # уже удалён другим процессом
+            total -= size
+        with self._lock:
+            self._disk_bytes_written = total
+            self._counters["disk_evictions"] += evicted
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
@@ -0,0 +1,416 @@
+"""
+Вывод звука: подключаемые бэкенды («приёмники» аудио).
+
+- sounddevice — поток PortAudio с callback: int16 PCM копируется прямо в
+                заранее выделенный кольцевой буфер, без кодирования в WAV;
+                недогрузки буфера (underrun) считаются; реакции подмешиваются
+                прямо в callback;
+- pygame      — прежний путь через pygame mixer;
+- file        — каждый фрагмент пишется в WAV-файл (отладка, запись);
+- null        — звук отбрасывается (тесты и серверы без звуковой карты).
+
+Все приёмники совместимы с планировщиком воспроизведения:
+`play(pcm, samplerate, interrupt)` блокирует до конца звучания или до
+установки события прерывания и возвращает True, если фрагмент доигран.
+Если у устройства своя частота (`native_rate`), звук другой частоты
+пересчитывается перед выводом.
+
+`mix(pcm, samplerate)` накладывает короткий звук (реакцию) поверх текущего
+вывода без ожидания очереди; приёмник, который не умеет смешивать,
+возвращает False, и звук ставится в очередь как обычное задание.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy.io import wavfile
+
+from app.config.config import (
+    TTS_AUDIO_SINK,
+    TTS_SINK_FILE_DIR,
+    TTS_SINK_RING_SEC,
+    TTS_SINK_SAMPLE_RATE,
+    TTS_SOUND_DEVICE_NAME,
+)
+from app.core import metrics
+from app.core.logger import get_logger
+from app.utils.audio_utils import resample_pcm16
+
+
+log = get_logger(__name__)
+
+# Звуков, одновременно подмешиваемых к выводу sounddevice
+MAX_OVERLAYS = 8
+
+SINK_SOUNDDEVICE = "sounddevice"
+SINK_PYGAME = "pygame"
+SINK_FILE = "file"
+SINK_NULL = "null"
+
+
+class AudioSink:
+    """Базовый приёмник аудио."""
+
+    name = ""
+
+    def __init__(self):
+        self._frames = 0
+        self._segments = 0
+        self._resampled = 0
+
+    def open(self, samplerate: int = 48000) -> None:
+        """
+        Открывает устройство (при запуске сервиса; повторный вызов безопасен).
+
+        :param samplerate: ожидаемая частота дискретизации
+        """
+
+    def close(self) -> None:
+        """Освобождает устройство."""
+
+    def native_rate(self) -> Optional[int]:
+        """Родная частота устройства; None — приёмник принимает любую."""
+        return TTS_SINK_SAMPLE_RATE or None
+
+    def play(self, pcm: np.ndarray, samplerate: int, interrupt: threading.Event) -> bool:
+        """
+        Воспроизводит int16 PCM (моно), при необходимости пересчитав его
+        на родную частоту устройства.
+
+        :param pcm: аудиоданные
+        :param samplerate: частота дискретизации
+        :param interrupt: событие, установка которого прерывает звук
+        :return: True, если звук доигран до конца
+        """
+        self.open(samplerate)  # родная частота известна после открытия
+        native = self.native_rate()
+        if native and native != samplerate:
+            pcm = resample_pcm16(pcm, samplerate, native)
+            samplerate = native
+            self._resampled += 1
+        return self._play(pcm, samplerate, interrupt)
+
+    def _play(self, pcm: np.ndarray, samplerate: int, interrupt: threading.Event) -> bool:
+        raise NotImplementedError
+
+    def mix(self, pcm: np.ndarray, samplerate: int) -> bool:
+        """
+        Накладывает int16 PCM поверх текущего вывода и сразу возвращается.
+
+        :return: False, если приёмник не умеет смешивать (звук надо ставить в очередь)
+        """
+        return False
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "sink": self.name,
+            "segments": self._segments,
+            "frames": self._frames,
+            "native_rate": self.native_rate(),
+            "resampled_segments": self._resampled,
+        }
+
+    def _count(self, pcm: np.ndarray) -> None:
+        self._segments += 1
+        self._frames += len(pcm)
+
+
+class NullSink(AudioSink):
+    """Отбрасывает звук."""
+
+    name = SINK_NULL
+
+    def _play(self, pcm: np.ndarray, samplerate: int, interrupt: threading.Event) -> bool:
+        self._count(pcm)
+        return True
+
+    def mix(self, pcm: np.ndarray, samplerate: int) -> bool:
+        self._count(pcm)
+        return True
+
+
+class FileSink(AudioSink):
+    """Пишет каждый фрагмент в отдельный WAV-файл."""
+
+    name = SINK_FILE
+
+    def __init__(self, directory: str = TTS_SINK_FILE_DIR):
+        super().__init__()
+        self._directory = directory
+
+    def open(self, samplerate: int = 48000) -> None:
+        os.makedirs(self._directory, exist_ok=True)
+
+    def _play(self, pcm: np.ndarray, samplerate: int, interrupt: threading.Event) -> bool:
+        name = f"{int(time.time() * 1000)}_{self._segments:06d}.wav"
+        wavfile.write(os.path.join(self._directory, name), samplerate, pcm)
+        self._count(pcm)
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        result = super().stats()
+        result["directory"] = self._directory
+        return result
+
+
+class PygameSink(AudioSink):
+    """Воспроизведение через pygame mixer (см. sound_device_provider)."""
+
+    name = SINK_PYGAME
+
+    def open(self, samplerate: int = 48000) -> None:
+        from app.core.sound_device_provider import init_mixer
+
+        init_mixer()
+
+    def native_rate(self) -> Optional[int]:
+        from app.core.sound_device_provider import mixer_frequency
+
+        # Пересчёт своим фильтром вместо преобразования SDL при загрузке звука
+        return mixer_frequency()
+
+    def _play(self, pcm: np.ndarray, samplerate: int, interrupt: threading.Event) -> bool:
+        from app.core.sound_device_provider import play_pcm_interruptible
+
+        self._count(pcm)
+        return play_pcm_interruptible(pcm, samplerate, interrupt)
+
+    def mix(self, pcm: np.ndarray, samplerate: int) -> bool:
+        """Свободный канал mixer: pygame сам смешивает его с речью."""
+        from app.core.sound_device_provider import mix_pcm
+
+        self.open(samplerate)
+        native = self.native_rate()
+        if native and native != samplerate:
+            pcm = resample_pcm16(pcm, samplerate, native)
+        if not mix_pcm(pcm):
+            return False
+        self._count(pcm)
+        return True
+
+
+class RingBuffer:
+    """
+    Кольцевой буфер int16 фиксированной ёмкости: один писатель, один читатель.
+    Позиции чтения и записи — сквозные счётчики отсчётов.
+    """
+
+    def __init__(self, capacity: int):
+        self._buffer = np.zeros(capacity, dtype=np.int16)
+        self._capacity = capacity
+        self._read = 0
+        self._write = 0
+        self.cond = threading.Condition()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def read_position(self) -> int:
+        return self._read
+
+    @property
+    def write_position(self) -> int:
+        return self._write
+
+    def write(self, data: np.ndarray) -> int:
+        """Копирует в буфер сколько поместится, возвращает число записанных отсчётов."""
+        with self.cond:
+            count = min(len(data), self._capacity - (self._write - self._read))
+            start = self._write % self._capacity
+            first = min(count, self._capacity - start)
+            self._buffer[start:start + first] = data[:first]
+            self._buffer[:count - first] = data[first:count]
+            self._write += count
+            return count
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Копирует в out сколько есть, возвращает число прочитанных отсчётов."""
+        with self.cond:
+            count = min(len(out), self._write - self._read)
+            start = self._read % self._capacity
+            first = min(count, self._capacity - start)
+            out[:first] = self._buffer[start:start + first]
+            out[first:count] = self._buffer[:count - first]
+            self._read += count
+            self.cond.notify_all()
+            return count
+
+    def clear(self) -> None:
+        """Отбрасывает непрочитанные данные."""
+        with self.cond:
+            self._read = self._write
+            self.cond.notify_all()
+
+
+class SoundDeviceSink(AudioSink):
+    """
+    Поток sounddevice с callback, читающим из кольцевого буфера.
+
+    Писатель (`play`) копирует PCM в буфер порциями по мере освобождения
+    места; callback забирает данные блоками устройства. Если в момент
+    callback данных не хватает, а фрагмент ещё не дописан, — это underrun:
+    недостающее дополняется тишиной и считается.
+
+    Звуки из mix складываются с выводом в том же callback (с ограничением
+    амплитуды), поэтому звучат сразу, поверх речи или в тишине.
+    """
+
+    name = SINK_SOUNDDEVICE
+
+    def __init__(
+        self, ring_seconds: float = TTS_SINK_RING_SEC, device: Optional[str] = TTS_SOUND_DEVICE_NAME
+    ):
+        super().__init__()
+        self._ring_seconds = ring_seconds
+        self._device = device
+        self._stream = None
+        self._ring: Optional[RingBuffer] = None
+        self._samplerate: Optional[int] = None
+        self._feeding = False  # писатель ещё не передал весь фрагмент
+        self._underruns = 0
+        self._underrun_frames = 0
+        self._lock = threading.Lock()  # один воспроизводимый фрагмент за раз
+        # Подмешиваемые звуки: [PCM, сколько уже прозвучало]
+        self._overlays: List[List] = []
+        self._overlay_lock = threading.Lock()
+
+    def native_rate(self) -> Optional[int]:
+        return self._samplerate or TTS_SINK_SAMPLE_RATE or None
+
+    def open(self, samplerate: int = 48000) -> None:
+        """
+        Открывает поток один раз на родной частоте: TTS_SINK_SAMPLE_RATE,
+        иначе частота устройства по умолчанию, иначе samplerate. Звук другой
+        частоты пересчитывается в play, поток не переоткрывается.
+        """
+        if self._stream is not None:
+            return
+        import sounddevice
+
+        samplerate = TTS_SINK_SAMPLE_RATE or self._default_rate(sounddevice) or samplerate
+        self._ring = RingBuffer(max(1, int(self._ring_seconds * samplerate)))
+        self._samplerate = samplerate
+        self._stream = sounddevice.OutputStream(
+            samplerate=samplerate,
+            channels=1,
+            dtype="int16",
+            latency="low",
+            device=self._device,
+            callback=self._callback,
+        )
+        self._stream.start()
+        log.info(
+            f"sounddevice: {samplerate} Гц, задержка {self._stream.latency:.3f} с, "
+            f"буфер {self._ring.capacity} отсчётов"
+        )
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def _play(self, pcm: np.ndarray, samplerate: int, interrupt: threading.Event) -> bool:
+        with self._lock:
+            ring = self._ring
+            data = np.asarray(pcm, dtype=np.int16).reshape(-1)  # int16 — без копии
+            try:
+                offset = 0
+                while offset < len(data):
+                    if interrupt.is_set():
+                        ring.clear()
+                        return False
+                    with ring.cond:
+                        written = ring.write(data[offset:])
+                        if written == 0:
+                            ring.cond.wait(0.05)  # callback освободит место
+                    offset += written
+                    self._feeding = offset < len(data)
+            finally:
+                self._feeding = False
+            end = ring.write_position
+
+            # Ждём, пока callback заберёт хвост фрагмента
+            with ring.cond:
+                while ring.read_position < end:
+                    if interrupt.is_set():
+                        ring.clear()
+                        return False
+                    ring.cond.wait(0.05)
+            self._count(data)
+            # Последний блок ещё в устройстве
+            return not interrupt.wait(self._stream.latency)
+
+    def mix(self, pcm: np.ndarray, samplerate: int) -> bool:
+        self.open(samplerate)
+        if samplerate != self._samplerate:
+            pcm = resample_pcm16(pcm, samplerate, self._samplerate)
+        with self._overlay_lock:
+            if len(self._overlays) >= MAX_OVERLAYS:
+                self._overlays.pop(0)  # самый старый звук обрывается
+            self._overlays.append([np.asarray(pcm, dtype=np.int16).reshape(-1), 0])
+        self._count(pcm)
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        result = super().stats()
+        result.update({
+            "samplerate": self._samplerate,
+            "ring_capacity": self._ring.capacity if self._ring is not None else None,
+            "latency": self._stream.latency if self._stream is not None else None,
+            "underruns": self._underruns,
+            "underrun_frames": self._underrun_frames,
+        })
+        return result
+
+    def _default_rate(self, sounddevice) -> Optional[int]:
+        try:
+            return int(sounddevice.query_devices(self._device, "output")["default_samplerate"])
+        except Exception as e:
+            log.warning(f"sounddevice: частота устройства не определена: {e}")
+            return None
+
+    def _callback(self, outdata, frames, _time, _status) -> None:
+        out = outdata.reshape(-1)
+        count = self._ring.read_into(out)
+        if count < frames:
+            out[count:] = 0
+            if self._feeding:
+                self._underruns += 1
+                self._underrun_frames += frames - count
+                metrics.AUDIO_UNDERRUNS.inc()
+        if self._overlays:
+            self._mix_overlays(out)
+
+    def _mix_overlays(self, out: np.ndarray) -> None:
+        mixed = out.astype(np.int32)
+        with self._overlay_lock:
+            for overlay in self._overlays:
+                pcm, position = overlay
+                chunk = pcm[position:position + len(out)]
+                mixed[:len(chunk)] += chunk
+                overlay[1] = position + len(chunk)
+            self._overlays = [overlay for overlay in self._overlays if overlay[1] < len(overlay[0])]
+        np.clip(mixed, -32768, 32767, out=mixed)
+        out[:] = mixed
+
+
+_SINKS = {
+    SINK_SOUNDDEVICE: SoundDeviceSink,
+    SINK_PYGAME: PygameSink,
+    SINK_FILE: FileSink,
+    SINK_NULL: NullSink,
+}
+
+
+def create_sink(name: str = TTS_AUDIO_SINK) -> AudioSink:
+    """Создаёт приёмник аудио по имени бэкенда."""
+    try:
+        return _SINKS[name]()
+    except KeyError:
+        raise ValueError(f"Неизвестный приёмник аудио: {name}")
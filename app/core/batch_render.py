@@ -0,0 +1,170 @@
+"""
+Пакетный рендер: много текстов за один HTTP-запрос, ответ — ZIP-архив
+WAV-файлов с manifest.json.
+
+Тексты синтезируются параллельно (не больше, чем загружает все рабочие
+процессы), готовые файлы дописываются в архив в порядке готовности и сразу
+уходят клиенту. manifest.json пишется последним: по каждому файлу — время
+синтеза и длительность аудио, в целом — пропускная способность.
+"""
+
+import asyncio
+import json
+import os
+import time
+import zipfile
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+import numpy as np
+
+from app.core.logger import get_logger
+from app.utils.audio_utils import pcm16_to_bytes, wav_header
+
+
+log = get_logger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# Синтез одного элемента: (текст, голос, частота, таймаут) -> int16 PCM
+Synthesize = Callable[[str, Optional[str], Optional[int], Optional[float]], Awaitable[np.ndarray]]
+
+
+class RenderItem:
+    """Элемент пакета: текст, голос, частота и имя файла в архиве."""
+
+    def __init__(self, index: int, text: str, speaker: Optional[str] = None,
+                 sample_rate: Optional[int] = None, name: Optional[str] = None):
+        self.index = index
+        self.text = text
+        self.speaker = speaker
+        self.sample_rate = sample_rate
+        self.name = _file_name(name, index)
+
+
+class _ZipStream:
+    """Файловый объект без seek: zipfile пишет в него, генератор забирает байты."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def render_zip(
+    items: List[RenderItem],
+    synthesize: Synthesize,
+    concurrency: int,
+    default_rate: int,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Синтезирует элементы и отдаёт ZIP-архив по частям.
+
+    :param items: элементы пакета
+    :param synthesize: асинхронный синтез одного элемента
+    :param concurrency: сколько элементов синтезировать одновременно
+    :param default_rate: частота элемента без явной sample_rate
+    :param timeout: таймаут синтеза одного элемента, с
+    """
+    _dedupe_names(items)
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(item: RenderItem):
+        async with semaphore:
+            item_started = time.perf_counter()
+            try:
+                pcm = await synthesize(item.text, item.speaker, item.sample_rate, timeout)
+                error = None
+            except Exception as e:
+                pcm, error = None, str(e) or type(e).__name__
+            return item, pcm, error, item_started
+
+    stream = _ZipStream()
+    archive = zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_STORED)
+    tasks = [asyncio.ensure_future(run(item)) for item in items]
+    entries = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item, pcm, error, item_started = await next_done
+            done = time.perf_counter()
+            rate = item.sample_rate or default_rate
+            entry = {
+                "index": item.index,
+                "file": None,
+                "text": item.text,
+                "speaker": item.speaker,
+                "sample_rate": rate,
+                "synthesis_ms": round((done - item_started) * 1000, 1),
+                "latency_ms": round((done - started) * 1000, 1),
+            }
+            if error is not None:
+                entry["error"] = error
+                log.warning(f"Пакетный рендер: элемент {item.index} не синтезирован: {error}")
+            else:
+                data = pcm16_to_bytes(pcm)
+                archive.writestr(item.name, wav_header(rate, data_size=len(data)) + data)
+                entry.update(file=item.name, duration_sec=len(pcm) / rate, bytes=len(data) + 44)
+            entries.append(entry)
+            chunk = stream.take()
+            if chunk:
+                yield chunk
+
+        elapsed = time.perf_counter() - started
+        manifest = {
+            "items": sorted(entries, key=lambda e: e["index"]),
+            "summary": _summary(items, entries, elapsed),
+        }
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+        archive.close()
+        yield stream.take()
+        log.info(f"Пакетный рендер: {manifest['summary']}")
+    finally:
+        for task in tasks:
+            task.cancel()  # клиент ушёл — оставшиеся элементы не синтезируем
+
+
+def _summary(items: List[RenderItem], entries: List[dict], elapsed: float) -> dict:
+    ok = [e for e in entries if "error" not in e]
+    audio = sum(e["duration_sec"] for e in ok)
+    chars = sum(len(e["text"]) for e in ok)
+    return {
+        "items": len(items),
+        "succeeded": len(ok),
+        "failed": len(entries) - len(ok),
+        "elapsed_sec": round(elapsed, 3),
+        "audio_sec": round(audio, 3),
+        "items_per_sec": round(len(ok) / elapsed, 3) if elapsed else None,
+        "chars_per_sec": round(chars / elapsed, 1) if elapsed else None,
+        # Секунд аудио за секунду работы (во сколько раз быстрее реального времени)
+        "x_realtime": round(audio / elapsed, 3) if elapsed else None,
+    }
+
+
+def _dedupe_names(items: List[RenderItem]) -> None:
+    """Совпадающим именам файлов добавляет номер элемента."""
+    used = set()
+    for item in items:
+        if item.name in used:
+            item.name = f"{item.name[:-4]}_{item.index:04d}.wav"
+        used.add(item.name)
+
+
+def _file_name(name: Optional[str], index: int) -> str:
+    """Безопасное имя файла в архиве (без каталогов), всегда с .wav."""
+    base = os.path.basename((name or "").strip().replace("\\", "/"))
+    if not base or base == MANIFEST_NAME:
+        base = f"{index:04d}"
+    if not base.lower().endswith(".wav"):
+        base += ".wav"
+    return base
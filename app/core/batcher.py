@@ -0,0 +1,177 @@
+"""
+Динамическое микро-батчирование запросов синтеза.
+
+Одновременные запросы собираются в пачку — до `max_batch` текстов или до
+истечения `max_wait_ms` с момента прихода первого — и исполняются одним
+вызовом `runner(texts, group)`. Результаты раздаются обратно по Future
+каждого запроса. В одну пачку попадают только запросы одной группы
+(например, одного голоса и частоты).
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.logger import get_logger
+
+
+log = get_logger(__name__)
+
+# Исполнитель пачки: (список текстов, группа) -> список PCM в том же порядке.
+# Может вернуть Future (например, задача в пуле) — тогда ждать её не нужно.
+BatchRunner = Callable[[List[str], Hashable], "Future[List[np.ndarray]]"]
+
+# Запрос в очереди: (текст, Future, время постановки, группа)
+_Item = Tuple[str, Future, float, Hashable]
+
+
+class MicroBatcher:
+    """Сборщик запросов в пачки с ограничением по размеру и ожиданию."""
+
+    def __init__(self, runner: BatchRunner, max_batch: int, max_wait_ms: float):
+        self._runner = runner
+        self._max_batch = max(1, max_batch)
+        self._max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._cond = threading.Condition()
+        self._queue: Deque[_Item] = deque()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._batches = 0
+        self._items = 0
+        self._wait_total = 0.0
+        self._sizes: Counter = Counter()
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._loop, name="tts-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            pending = list(self._queue)
+            self._queue.clear()
+            self._cond.notify_all()
+        for _, future, _, _ in pending:
+            future.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def submit(self, text: str, group: Hashable = None) -> "Future[np.ndarray]":
+        """
+        Ставит текст в очередь на ближайшую пачку своей группы.
+
+        :param group: ключ группы; пачка собирается из запросов одной группы
+        """
+        future: "Future[np.ndarray]" = Future()
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("Батчер не запущен")
+            self._queue.append((text, future, time.perf_counter(), group))
+            self._cond.notify()
+        return future
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            batches = self._batches
+            return {
+                "max_batch": self._max_batch,
+                "max_wait_ms": self._max_wait * 1000.0,
+                "queued": len(self._queue),
+                "batches": batches,
+                "items": self._items,
+                "avg_batch_size": self._items / batches if batches else 0.0,
+                "avg_queue_wait_ms": self._wait_total / self._items * 1000.0 if self._items else 0.0,
+                "batch_sizes": dict(sorted(self._sizes.items())),
+            }
+
+    # --- Поток сборки пачек --------------------------------------------------
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            if batch:
+                self._dispatch(batch)
+
+    def _collect(self) -> Optional[List[_Item]]:
+        """Ждёт первый запрос, затем добирает пачку до лимита или таймаута."""
+        with self._cond:
+            while not self._queue and self._running:
+                self._cond.wait()
+            if not self._running:
+                return None
+            deadline = self._queue[0][2] + self._max_wait
+            while len(self._queue) < self._max_batch and self._running:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if not self._running or not self._queue:
+                return None  # stop() очистил очередь, пока пачка добиралась
+
+            batch = []
+            other: Deque[_Item] = deque()  # запросы других групп — в следующие пачки
+            group = self._queue[0][3]
+            now = time.perf_counter()
+            while self._queue and len(batch) < self._max_batch:
+                item = self._queue.popleft()
+                text, future, queued_at, item_group = item
+                if item_group != group:
+                    other.append(item)
+                    continue
+                # Отменённые (например, по таймауту) запросы в пачку не берём
+                if future.set_running_or_notify_cancel():
+                    batch.append(item)
+                    self._wait_total += now - queued_at
+            self._queue.extendleft(reversed(other))
+            if batch:
+                self._batches += 1
+                self._items += len(batch)
+                self._sizes[len(batch)] += 1
+            return batch
+
+    def _dispatch(self, batch: List[_Item]) -> None:
+        texts = [text for text, _, _, _ in batch]
+        futures = [future for _, future, _, _ in batch]
+        try:
+            result = self._runner(texts, batch[0][3])
+        except Exception as e:
+            _fail_all(futures, e)
+            return
+        if isinstance(result, Future):
+            result.add_done_callback(lambda done: _resolve(futures, done))
+        else:
+            _set_results(futures, result)
+
+
+def _resolve(futures: List[Future], done: Future) -> None:
+    if done.cancelled():
+        _fail_all(futures, RuntimeError("Пачка синтеза отменена"))
+        return
+    error = done.exception()
+    if error is not None:
+        _fail_all(futures, error)
+        return
+    _set_results(futures, done.result())
+
+
+def _set_results(futures: List[Future], results: List[np.ndarray]) -> None:
+    for future, pcm in zip(futures, results):
+        future.set_result(pcm)
+
+
+def _fail_all(futures: List[Future], error: BaseException) -> None:
+    for future in futures:
+        future.set_exception(error)
@@ -0,0 +1,153 @@
+"""
+Кэш фрагментов: PCM отдельных предложений с частотой ответа.
+
+Ответы часто совпадают во всём, кроме одного предложения («Сейчас …
+Температура … Хорошего дня.»). Кэш целых текстов на них не срабатывает,
+поэтому документ режется на предложения (long_text.parse_document), каждое
+ищется здесь, синтезируются только недостающие, а склейка идёт одной
+векторной сборкой (long_text.assemble).
+
+Фрагмент хранится уже с частотой ответа — попадание не требует ни вызова
+исполнителя, ни пересчёта частоты. Кэш только в памяти: на диске фрагменты
+уже лежат в кэше модели (на её частоте).
+
+Учёт ведётся по фрагментам и по документам: сколько документов собрано
+частично или целиком из готовых фрагментов.
+"""
+
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import numpy as np
+
+from app.core.audio_cache import AudioCache
+
+
+class FragmentCache:
+    """PCM предложений в памяти (LRU + TTL) со счётчиками повторного использования."""
+
+    def __init__(self, memory_limit_bytes: int, ttl_seconds: float):
+        """
+        :param memory_limit_bytes: лимит памяти (0 — кэш выключен, только учёт)
+        :param ttl_seconds: время жизни фрагмента
+        """
+        self._enabled = memory_limit_bytes > 0
+        self._cache = AudioCache(memory_limit_bytes, ttl_seconds)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {
+            "fragment_hits": 0,
+            "fragment_misses": 0,
+            "documents": 0,
+            "documents_partial": 0,  # часть фрагментов из кэша
+            "documents_reused": 0,  # все фрагменты из кэша
+            "reused_audio_seconds": 0.0,
+            "synthesis_seconds": 0.0,
+        }
+
+    def __contains__(self, key: str) -> bool:
+        """Есть ли фрагмент в кэше (счётчики не меняются)."""
+        return self._enabled and key in self._cache
+
+    async def fetch(
+        self,
+        key: str,
+        sample_rate: int,
+        produce: Callable[[], Awaitable[np.ndarray]],
+        document: Optional["FragmentDocument"] = None,
+    ) -> np.ndarray:
+        """
+        Фрагмент из кэша или от produce (результат кэшируется).
+
+        :param key: ключ фрагмента (make_cache_key)
+        :param sample_rate: частота фрагмента, Гц
+        :param produce: синтез фрагмента при промахе
+        :param document: документ, к учёту которого относится фрагмент
+        """
+        pcm = self._cache.get(key) if self._enabled else None
+        hit = pcm is not None
+        if not hit:
+            started = time.perf_counter()
+            pcm = await produce()
+            elapsed = time.perf_counter() - started
+            if self._enabled:
+                self._cache.put(key, pcm)
+        with self._lock:
+            if hit:
+                self._counters["fragment_hits"] += 1
+                self._counters["reused_audio_seconds"] += len(pcm) / sample_rate
+            else:
+                self._counters["fragment_misses"] += 1
+                self._counters["synthesis_seconds"] += elapsed
+        if document is not None:
+            document.count(hit)
+        return pcm
+
+    def document(self, synthesize: Callable[..., Awaitable[np.ndarray]]) -> "FragmentDocument":
+        """Учёт фрагментов одного документа (см. FragmentDocument)."""
+        return FragmentDocument(self, synthesize)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            result: Dict[str, object] = dict(self._counters)
+        hits, misses = result["fragment_hits"], result["fragment_misses"]
+        documents = result["documents"]
+        cache = self._cache.stats()
+        result.update({
+            "enabled": self._enabled,
+            "entries": cache["memory_entries"],
+            "memory_bytes": cache["memory_bytes"],
+            "memory_limit_bytes": cache["memory_limit_bytes"],
+            # Доля фрагментов, взятых из кэша
+            "fragment_reuse_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            # Доля документов, в которых пригодился хотя бы один готовый фрагмент
+            "document_reuse_ratio": (
+                round((result["documents_partial"] + result["documents_reused"]) / documents, 4)
+                if documents else 0.0
+            ),
+            "reused_audio_seconds": round(result["reused_audio_seconds"], 3),
+            "synthesis_seconds": round(result["synthesis_seconds"], 3),
+        })
+        return result
+
+    def _finish_document(self, hits: int, misses: int) -> None:
+        if hits + misses == 0:
+            return
+        with self._lock:
+            self._counters["documents"] += 1
+            if hits and misses:
+                self._counters["documents_partial"] += 1
+            elif hits:
+                self._counters["documents_reused"] += 1
+
+
+class FragmentDocument:
+    """
+    Синтез фрагментов одного документа: вызывается как synthesize, а при
+    выходе из `with` записывает, сколько фрагментов документа нашлось в кэше.
+    Без `with` (поток WebSocket) учитываются только фрагменты.
+    """
+
+    def __init__(self, cache: FragmentCache, synthesize: Callable[..., Awaitable[np.ndarray]]):
+        """
+        :param synthesize: синтез фрагмента (text, timeout, document) -> int16 PCM
+        """
+        self._cache = cache
+        self._synthesize = synthesize
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, text: str, timeout: Optional[float]) -> Awaitable[np.ndarray]:
+        return self._synthesize(text, timeout, self)
+
+    def count(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def __enter__(self) -> "FragmentDocument":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._cache._finish_document(self.hits, self.misses)
@@ -3,36 +3,611 @@
 HTTP-сервер на FastAPI для TTS с поддержкой POST, GET
 """
 
+import asyncio
 import os
-from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import FastAPI, Request, Form, Header, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
+from prometheus_fastapi_instrumentator import Instrumentator
+
+from app.core import IMPORT_STARTED, metrics
 from app.core.logger import get_logger
-# from prometheus_fastapi_instrumentator import Instrumentator
 
 # Импорт TTS движка
-from app.core.text_to_speech import TTS
-from app.config.config import TTS_DOC_ROOT
+from app.core.audio_cache import AudioCache, make_cache_key, make_encoded_key
+from app.core.batch_render import RenderItem, render_zip
+from app.core.fragment_cache import FragmentCache, FragmentDocument
+from app.core.inference_executor import InferenceExecutor, SynthesisTimeoutError
+from app.core.long_text import (
+    SEGMENT_SPEECH,
+    parse_document,
+    render,
+    synthesize_document,
+    synthesize_segments,
+)
+from app.core.phrase_bank import PhraseBank, open_bank
+from app.core.speech_session import SpeechSession
+from app.ipc.server import IpcServer
+from app.core.playback_scheduler import PlaybackJob, PlaybackScheduler, PRIORITY_NORMAL
+from app.core.reaction_bank import MODE_MIX, MODE_QUEUE, ReactionBank, open_reactions
+from app.core.audio_sinks import create_sink
+from app.core.text_to_speech import resolve_sample_rate, synthesis_rate
+from app.core.startup import STAGE_LOADING, STAGE_READY, STAGE_WARMUP, StartupState
+from app.config.config import (
+    TTS_DOC_ROOT,
+    TTS_IPC_RING_MB,
+    TTS_IPC_SOCKET,
+    TTS_LONG_TEXT_MAX_CHARS,
+    TTS_PHRASE_BANK,
+    TTS_REACTIONS_FILE,
+    TTS_MAX_IN_FLIGHT,
+    TTS_MAX_JOBS,
+    TTS_RENDER_MAX_ITEMS,
+    TTS_SAMPLE_RATE,
+    TTS_STREAMING,
+    TTS_WARMUP_TEXT,
+    TTS_CACHE_DIR,
+    TTS_CACHE_TTL_SEC,
+    TTS_ENCODED_CACHE_DISK_MB,
+    TTS_ENCODED_CACHE_MEMORY_MB,
+    TTS_FRAGMENT_CACHE_MB,
+)
+from app.utils.audio_utils import resample_pcm16
+from app.utils.text_normalizer import normalizer
+from app.utils.codecs import (
+    FORMAT_ALAW,
+    FORMAT_MULAW,
+    FORMAT_PCM,
+    Codec,
+    CodecError,
+    available_formats,
+    codec_stats,
+    encode,
+    get_codec,
+    select_codec,
+)
 
 
 log = get_logger(__name__)
-app = FastAPI(title="TTS API Server")
+
+# Как часто проверять, не отключился ли клиент, пока документ синтезируется целиком, с
+DISCONNECT_POLL_SEC = 0.1
+
+# Исполнитель синтеза (модель живёт в его пуле, а не в event loop)
+inference = InferenceExecutor()
+
+# Вывод звука (TTS_AUDIO_SINK) и очередь воспроизведения: запрос получает
+# job_id сразу, звук играет в фоне
+sink = create_sink()
+scheduler = PlaybackScheduler(sink.play)
+
+# Закодированное аудио (FLAC, Opus, G.711...): повтор запроса не требует
+# ни синтеза, ни кодирования
+encoded_cache = AudioCache(
+    memory_limit_bytes=TTS_ENCODED_CACHE_MEMORY_MB * 1024 * 1024,
+    ttl_seconds=TTS_CACHE_TTL_SEC,
+    disk_dir=os.path.join(TTS_CACHE_DIR, "encoded"),
+    disk_limit_bytes=TTS_ENCODED_CACHE_DISK_MB * 1024 * 1024,
+    dtype=np.uint8,
+    suffix=".enc",
+)
+
+# PCM предложений с частотой ответа: текст, отличающийся от прежних одним
+# предложением, синтезирует только его
+fragment_cache = FragmentCache(
+    memory_limit_bytes=TTS_FRAGMENT_CACHE_MB * 1024 * 1024,
+    ttl_seconds=TTS_CACHE_TTL_SEC,
+)
+
+# Фоновые задачи синтеза по id задания: ссылки не дают их собрать GC
+# и позволяют прервать синтез при отмене задания
+_job_tasks: Dict[str, asyncio.Task] = {}
+
+# Банк заранее синтезированных фраз (открывается при запуске)
+phrase_bank: Optional[PhraseBank] = None
+
+# Звуки-реакции, декодированные на частоте устройства (загружаются при запуске)
+reactions: Optional[ReactionBank] = None
+
+# Этапы запуска: порт открыт сразу, модель грузится в фоне
+startup = StartupState(started=IMPORT_STARTED)
+
+
+def _init_audio() -> None:
+    """
+    Инициализация аудиоустройства и звуков-реакций; без устройства сервер
+    всё равно отдаёт аудио по HTTP.
+    """
+    try:
+        sink.open()
+    except Exception as e:
+        log.warning(f"Аудиоустройство не инициализировано: {e}")
+    try:
+        _load_reactions()
+    except Exception as e:
+        log.warning(f"Реакции {TTS_REACTIONS_FILE} не загружены: {e}")
+
+
+def _load_reactions() -> Optional[ReactionBank]:
+    """
+    Декодирует реакции на частоте устройства и подменяет ими текущий банк.
+    Если справочника нет, текущий банк остаётся.
+
+    :return: новый банк или None, если справочник не найден
+    """
+    global reactions
+    bank = open_reactions(TTS_REACTIONS_FILE, sink.native_rate() or TTS_SAMPLE_RATE)
+    if bank is not None:
+        reactions = bank
+    return bank
+
+
+def _open_phrase_bank() -> None:
+    """Отображает банк фраз в память; банк другой версии модели не используется."""
+    global phrase_bank
+    bank = open_bank(TTS_PHRASE_BANK)
+    if bank is not None and bank.model_version != inference.model_version:
+        log.warning(
+            f"Банк фраз собран для модели {bank.model_version}, а загружена "
+            f"{inference.model_version}: банк не используется, пересоберите его (build-bank)"
+        )
+        bank.close()
+        bank = None
+    phrase_bank = bank
+
+
+async def _warm_start() -> None:
+    """
+    Фоновая загрузка модели, затем аудиоустройства, затем прогрев.
+    Модель — первой: в режиме pool её запуск делает fork, а аудиоустройство
+    запускает свои потоки (PortAudio, pygame), которые в fork не должны попасть.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        startup.stage(STAGE_LOADING)
+        await loop.run_in_executor(None, inference.start)
+        await loop.run_in_executor(None, _init_audio)
+        _open_phrase_bank()
+        if TTS_WARMUP_TEXT:
+            startup.stage(STAGE_WARMUP)
+            await inference.warmup(TTS_WARMUP_TEXT)
+        startup.stage(STAGE_READY)
+    except Exception as e:
+        startup.fail(str(e))
+
+
+def _require_ready() -> None:
+    """Отвечает 503, пока модель не загружена и не прогрета."""
+    if not startup.is_ready:
+        raise HTTPException(
+            status_code=503, detail="TTS is starting", headers={"Retry-After": "1"}
+        )
+
+
+def _admit(playback: bool, text: Optional[str] = None, samplerate: Optional[int] = None) -> None:
+    """
+    Контроль допуска: при переполнении очереди синтеза (или очереди заданий
+    на озвучку) отвечает 429 с оценкой Retry-After, а не копит задержку.
+    Запрос, каждое предложение которого есть в кэше фрагментов или банке
+    фраз либо уже синтезируется (single-flight), пул не нагружает и
+    допускается.
+
+    :param text: текст запроса (None — проверяется только заполненность пула)
+    :param samplerate: частота ответа, Гц
+    """
+    if inference.in_flight >= TTS_MAX_IN_FLIGHT and not _needs_no_inference(text, samplerate):
+        _reject("synthesis", inference.retry_after())
+    if playback and scheduler.active_count() >= TTS_MAX_JOBS:
+        _reject("playback", scheduler.retry_after())
+
+
+def _needs_no_inference(text: Optional[str], samplerate: Optional[int]) -> bool:
+    """
+    Обойдётся ли текст без нового места в пуле: каждое предложение есть в
+    кэше фрагментов или банке фраз либо уже синтезируется (ключи и порядок
+    проверок как у _synthesize_at).
+    """
+    if not text or samplerate is None:
+        return False
+    speech = [segment.text for segment in parse_document(text) if segment.kind == SEGMENT_SPEECH]
+    model_rate = synthesis_rate(samplerate)
+    bank = phrase_bank if phrase_bank is not None and phrase_bank.sample_rate >= model_rate else None
+
+    def served(sentence: str) -> bool:
+        sentence = normalizer.normalize(sentence)
+        return (
+            make_cache_key(sentence, None, samplerate, inference.model_version) in fragment_cache
+            or (bank is not None and bank.contains(sentence))
+            or inference.joins_in_flight(sentence, None, model_rate)
+        )
+
+    return bool(speech) and all(served(sentence) for sentence in speech)
+
+
+def _reject(queue: str, retry_after: int) -> None:
+    metrics.REJECTED_REQUESTS.labels(queue=queue).inc()
+    raise HTTPException(
+        status_code=429,
+        detail=f"TTS {queue} queue is full",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def _request_timeout(timeout: Optional[float], deadline_ms: Optional[float]) -> Optional[float]:
+    """Таймаут запроса с учётом заголовка X-Deadline-Ms (берётся меньший), с."""
+    if deadline_ms is None:
+        return timeout
+    if deadline_ms <= 0:
+        raise HTTPException(status_code=400, detail="X-Deadline-Ms must be positive")
+    budget = deadline_ms / 1000.0
+    return budget if timeout is None else min(timeout, budget)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    scheduler.start()
+    warm_start = asyncio.ensure_future(_warm_start())
+    if ipc is not None:
+        await ipc.start()
+    yield
+    if ipc is not None:
+        await ipc.stop()
+    warm_start.cancel()
+    scheduler.stop()
+    sink.close()
+    inference.shutdown()
+
+
+app = FastAPI(title="TTS API Server", lifespan=lifespan)
 
 # Подключаем статические файлы
 print(f"TTS_DOC_ROOT={TTS_DOC_ROOT}")
 app.mount("/static", StaticFiles(directory=TTS_DOC_ROOT), name="static")
 
-# Инициализация TTS
-tts_engine = TTS()
-
-# Включение метрик Prometheus (на будущее)
-# Instrumentator().instrument(core).expose(core)
+# Метрики Prometheus: HTTP-запросы плюс этапы синтеза (app/core/metrics.py)
+Instrumentator().instrument(app).expose(app, include_in_schema=False)
 
 # Модель для JSON-запроса
 class TTSTextRequest(BaseModel):
     text: str
+    timeout: Optional[float] = None
+    priority: int = PRIORITY_NORMAL
+    stream: Optional[bool] = None
+    sample_rate: Optional[int] = None  # частота ответа, Гц
+    quality: Optional[str] = None  # telephony | standard | high
+
+
+# Элемент пакетного рендера
+class TTSBatchItem(BaseModel):
+    text: str
+    speaker: Optional[str] = None
+    sample_rate: Optional[int] = None
+    quality: Optional[str] = None
+    name: Optional[str] = None  # имя WAV-файла в архиве
+
+
+# Пакетный рендер: тексты -> ZIP с WAV-файлами и manifest.json
+class TTSBatchRequest(BaseModel):
+    items: List[TTSBatchItem]
+    timeout: Optional[float] = None  # таймаут синтеза одного элемента
+
+
+# Форматы кадров WebSocket: «сырые» отсчёты без заголовка
+WS_FORMATS = (FORMAT_PCM, FORMAT_MULAW, FORMAT_ALAW)
+# Коды закрытия WebSocket (RFC 6455): ошибка запроса и «повторите позже»
+WS_CLOSE_POLICY = 1008
+WS_CLOSE_TRY_AGAIN = 1013
+
+# Бюджет запроса в миллисекундах от его приёма: синтез, не уложившийся
+# в него, прерывается, а задание, не зазвучавшее к сроку, снимается
+DEADLINE_HEADER = "X-Deadline-Ms"
+
+
+def _resolve_rate(sample_rate: Optional[int], quality: Optional[str]) -> int:
+    """Частота ответа по параметрам sample_rate и quality (400 при ошибке)."""
+    try:
+        return resolve_sample_rate(sample_rate, quality)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _playback_rate(samplerate: int) -> int:
+    """
+    Частота синтеза для воспроизведения на сервере: звучать выше родной
+    частоты устройства звук всё равно не будет, поэтому синтезируем на
+    наименьшей частоте Silero, покрывающей меньшую из двух.
+    """
+    native = sink.native_rate()
+    return synthesis_rate(min(samplerate, native) if native else samplerate)
+
+
+def _segment_synthesizer(samplerate: int) -> FragmentDocument:
+    """
+    Синтез фрагментов одного документа для ответа с частотой samplerate
+    (см. _synthesize_at). В `with` документ попадает в учёт кэша фрагментов.
+    """
+
+    def synthesize(
+        text: str, timeout: Optional[float], document: FragmentDocument
+    ) -> Awaitable[np.ndarray]:
+        return _synthesize_at(text, timeout, None, samplerate, document)
+
+    return fragment_cache.document(synthesize)
+
+
+async def _synthesize_at(
+    text: str,
+    timeout: Optional[float],
+    speaker: Optional[str],
+    samplerate: int,
+    document: Optional[FragmentDocument] = None,
+) -> np.ndarray:
+    """
+    Фраза с частотой samplerate: из кэша фрагментов, из банка фраз, если она
+    там есть (модель не вызывается), иначе синтез на ближайшей не меньшей
+    частоте Silero. Кэши, банк и single-flight видят каноническую форму текста.
+    """
+    text = normalizer.normalize(text)
+    model_rate = synthesis_rate(samplerate)
+
+    async def produce() -> np.ndarray:
+        if phrase_bank is not None and phrase_bank.sample_rate >= model_rate:
+            pcm = phrase_bank.lookup(text, speaker)
+            if pcm is not None:
+                return resample_pcm16(pcm, phrase_bank.sample_rate, samplerate)
+        pcm = await inference.synthesize(text, timeout, speaker, model_rate)
+        return resample_pcm16(pcm, model_rate, samplerate)
+
+    key = make_cache_key(text, speaker, samplerate, inference.model_version)
+    return await fragment_cache.fetch(key, samplerate, produce, document)
+
+
+async def _synthesize_job(
+    job: PlaybackJob, timeout: Optional[float], stream: bool, samplerate: int
+) -> None:
+    """
+    Синтезирует аудио задания и передаёт его в очередь воспроизведения
+    (частоту под устройство приёмник пересчитывает сам).
+
+    Предложения синтезируются параллельно (см. long_text). В потоковом
+    режиме каждое предложение уходит в очередь, как только готово оно и все
+    предыдущие; иначе задание звучит целиком после синтеза всего текста
+    (склейка за один проход, см. long_text.assemble).
+    Таймаут действует на всё задание; при истечении крайнего срока задание
+    снимается (expired).
+    """
+    with metrics.NORMALIZATION_SECONDS.time():
+        segments = parse_document(job.text)
+    try:
+        with _segment_synthesizer(samplerate) as synthesize:
+            if stream:
+                async for pcm in render(segments, synthesize, samplerate, inference.parallelism, timeout):
+                    if not scheduler.add_segment(job, pcm, samplerate):
+                        return  # задание отменено или вытеснено — дальше не синтезируем
+            else:
+                pcm = await synthesize_segments(
+                    segments, synthesize, samplerate, inference.parallelism, timeout
+                )
+                if len(pcm) and not scheduler.add_segment(job, pcm, samplerate):
+                    return
+    except SynthesisTimeoutError as e:
+        if job.expired():
+            log.info(f"Задание {job.id} снято: истёк крайний срок")
+            scheduler.expire(job)
+        else:
+            log.warning(f"Ошибка синтеза задания {job.id}: {e}")
+            scheduler.fail(job, str(e))
+        return
+    except Exception as e:
+        log.warning(f"Ошибка синтеза задания {job.id}: {e}")
+        scheduler.fail(job, str(e))
+        return
+    scheduler.complete(job)
+
+
+async def _audio_stream(
+    request: Request, text: str, codec: Codec, samplerate: int, timeout: Optional[float]
+):
+    """
+    Генератор потокового ответа: заголовок кодека (WAV), затем каждое
+    предложение сразу после его синтеза. Если клиент отключился, оставшиеся
+    предложения не синтезируются.
+    """
+    header = codec.stream_header(samplerate)
+    if header:
+        yield header
+    with metrics.NORMALIZATION_SECONDS.time():
+        segments = parse_document(text)
+    with _segment_synthesizer(samplerate) as synthesize:
+        pieces = render(segments, synthesize, samplerate, inference.parallelism, timeout)
+        try:
+            async for pcm in pieces:
+                if await request.is_disconnected():
+                    log.info("Клиент отключился, потоковый синтез прерван")
+                    return
+                with metrics.ENCODING_SECONDS.labels(format=codec.name).time():
+                    chunk = codec.encode_chunk(pcm, samplerate)
+                yield chunk
+        except Exception as e:
+            # Заголовки уже отправлены — статус не изменить, обрываем поток
+            log.warning(f"Ошибка потокового синтеза: {e}")
+        finally:
+            await pieces.aclose()  # оставшиеся предложения не синтезируем
+
+
+def _select_codec(format_name: Optional[str], accept: Optional[str], streaming: bool) -> Codec:
+    try:
+        return select_codec(format_name, accept, streaming)
+    except CodecError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _stream_response(
+    request: Request,
+    text: str,
+    format_name: Optional[str],
+    samplerate: int,
+    timeout: Optional[float],
+) -> StreamingResponse:
+    if not text.strip():
+        raise HTTPException(status_code=400, detail="Text is required")
+    codec = _select_codec(format_name, request.headers.get("accept"), streaming=True)
+    _require_ready()
+    _admit(playback=False, text=text, samplerate=samplerate)
+    return StreamingResponse(
+        _audio_stream(request, text, codec, samplerate, timeout),
+        media_type=codec.content_type(samplerate),
+        headers={"X-Sample-Rate": str(samplerate), "X-Codec": codec.name},
+    )
+
+
+async def _while_connected(request: Request, synthesis: Awaitable[np.ndarray]) -> np.ndarray:
+    """
+    Ждёт синтез, пока клиент на связи. Клиент отключился — синтез отменяется
+    (оставшиеся предложения не занимают рабочих), ответ 499.
+    """
+    task = asyncio.ensure_future(synthesis)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SEC)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                log.info("Клиент отключился, синтез прерван")
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        task.cancel()
+
+
+async def _audio_response(
+    request: Request,
+    text: str,
+    format_name: Optional[str],
+    samplerate: int,
+    timeout: Optional[float],
+) -> Response:
+    """
+    Аудио целиком в выбранном кодеке. Закодированный результат кэшируется
+    (ключ включает частоту): повторный запрос не синтезирует и не кодирует заново.
+    """
+    if not text.strip():
+        raise HTTPException(status_code=400, detail="Text is required")
+    codec = _select_codec(format_name, request.headers.get("accept"), streaming=False)
+    samplerate = codec.output_rate(samplerate)  # до синтеза: Opus не кодирует, например, 22050 Гц
+    _require_ready()
+    key = make_encoded_key(
+        make_cache_key(normalizer.normalize(text), None, samplerate, inference.model_version), codec.name
+    )
+    headers = {"X-Sample-Rate": str(samplerate), "X-Codec": codec.name}
+
+    cached = encoded_cache.get(key)
+    if cached is not None:
+        headers["X-Cache"] = "hit"
+        return Response(cached.tobytes(), media_type=codec.content_type(samplerate), headers=headers)
+
+    _admit(playback=False, text=text, samplerate=samplerate)
+    try:
+        with _segment_synthesizer(samplerate) as synthesize:
+            pcm = await _while_connected(
+                request, synthesize_document(text, synthesize, samplerate, inference.parallelism, timeout)
+            )
+    except SynthesisTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.warning(f"Ошибка синтеза: {e}")
+        raise HTTPException(status_code=500, detail=f"TTS error: {str(e)}")
+
+    # Opus и FLAC кодируются миллисекунды на секунду аудио — не в event loop
+    started = time.perf_counter()
+    try:
+        data = await asyncio.get_running_loop().run_in_executor(None, encode, codec, pcm, samplerate)
+    except CodecError as e:
+        log.warning(f"Ошибка кодирования: {e}")
+        raise HTTPException(status_code=500, detail=f"Encoding error: {e}")
+    headers["X-Encode-Ms"] = f"{(time.perf_counter() - started) * 1000:.1f}"
+    headers["X-Cache"] = "miss"
+    encoded_cache.put(key, np.frombuffer(data, dtype=np.uint8))
+    return Response(data, media_type=codec.content_type(samplerate), headers=headers)
+
+
+async def _ipc_synthesize(
+    text: str, sample_rate: Optional[int], timeout: Optional[float]
+) -> Tuple[np.ndarray, int]:
+    """Синтез для IPC-клиента: те же проверки, что у /api/tts/audio."""
+    if not text.strip():
+        raise HTTPException(status_code=400, detail="Text is required")
+    samplerate = _resolve_rate(sample_rate, None)
+    _require_ready()
+    _admit(playback=False, text=text, samplerate=samplerate)
+    try:
+        with _segment_synthesizer(samplerate) as synthesize:
+            pcm = await synthesize_document(text, synthesize, samplerate, inference.parallelism, timeout)
+    except SynthesisTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    return pcm, samplerate
+
+
+def _ipc_speak(text: str, priority: int, timeout: Optional[float]) -> str:
+    """Озвучка для IPC-клиента: возвращает id задания."""
+    if not text.strip():
+        raise HTTPException(status_code=400, detail="Text is required")
+    _require_ready()
+    return _speak(text, priority, timeout)["job_id"]
+
+
+def _cancel_job(job_id: str) -> Optional[PlaybackJob]:
+    """Снимает задание с очереди или прерывает звучание и идущий синтез."""
+    job = scheduler.cancel(job_id)
+    if job is not None:
+        task = _job_tasks.get(job_id)
+        if task is not None:
+            task.cancel()  # прерываем ещё идущий синтез
+    return job
+
+
+# Локальный транспорт для сервисов на той же машине (TTS_IPC_SOCKET)
+ipc = (
+    IpcServer(
+        TTS_IPC_SOCKET,
+        _ipc_synthesize,
+        _ipc_speak,
+        lambda job_id: _cancel_job(job_id) is not None,
+        ring_bytes=int(TTS_IPC_RING_MB * 1024 * 1024),
+    )
+    if TTS_IPC_SOCKET
+    else None
+)
+
+
+def _speak(
+    text: str,
+    priority: int,
+    timeout: Optional[float] = None,
+    stream: Optional[bool] = None,
+    deadline_ms: Optional[float] = None,
+    sample_rate: Optional[int] = None,
+    quality: Optional[str] = None,
+) -> dict:
+    """Создаёт задание на озвучку и возвращает ответ с его идентификатором."""
+    samplerate = _playback_rate(_resolve_rate(sample_rate, quality))
+    timeout = _request_timeout(timeout, deadline_ms)
+    _admit(playback=True, text=text, samplerate=samplerate)
+    deadline = None if deadline_ms is None else time.time() + deadline_ms / 1000.0
+    job = scheduler.create_job(text, priority, deadline)
+    stream = TTS_STREAMING if stream is None else stream
+    task = asyncio.ensure_future(_synthesize_job(job, timeout, stream, samplerate))
+    _job_tasks[job.id] = task
+    task.add_done_callback(lambda _: _job_tasks.pop(job.id, None))
+    return {"status": "accepted", "job_id": job.id, "text": text, "sample_rate": samplerate}
 
 
 @app.get("/")
@@ -48,47 +623,430 @@ async def health_check():
     return {"status": "ok", "service": "TTS"}
 
 
+@app.get("/ready")
+async def ready_check():
+    """
+    Готовность к синтезу: 200 после загрузки и прогрева модели, до того — 503.
+    В ответе — текущий этап запуска, время импорта и время до готовности.
+    """
+    state = startup.to_dict()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """
+    Счётчики кэша аудио: попадания, промахи, вытеснения; повторное использование
+    фрагментов (предложений) и канонизация текста
+    """
+    _require_ready()
+    stats = dict(await inference.cache_stats())
+    stats["fragments"] = fragment_cache.stats()
+    stats["normalizer"] = normalizer.stats()
+    return stats
+
+
+@app.get("/api/executor/stats")
+async def executor_stats():
+    """
+    Состояние пула синтеза и статистика микро-батчирования
+    """
+    return inference.stats()
+
+
+@app.get("/api/audio/stats")
+async def audio_stats():
+    """
+    Состояние вывода звука: бэкенд, воспроизведено, недогрузки буфера
+    """
+    return sink.stats()
+
+
+@app.get("/api/codecs")
+async def codecs_stats():
+    """
+    Доступные форматы, время кодирования и размер результата по кодекам,
+    счётчики кэша закодированного аудио
+    """
+    return {
+        "formats": available_formats(),
+        "codecs": codec_stats.snapshot(),
+        "cache": encoded_cache.stats(),
+    }
+
+
+@app.get("/api/ipc/stats")
+async def ipc_stats():
+    """
+    Локальный IPC: соединения, запросы, ответы через общую память и через сокет
+    """
+    if ipc is None:
+        raise HTTPException(status_code=404, detail="IPC is disabled (TTS_IPC_SOCKET)")
+    return ipc.stats()
+
+
+@app.get("/api/bank/stats")
+async def bank_stats():
+    """
+    Банк заранее синтезированных фраз: размер, попадания и промахи
+    """
+    if phrase_bank is None:
+        raise HTTPException(status_code=404, detail="Phrase bank is not loaded (TTS_PHRASE_BANK)")
+    return phrase_bank.stats()
+
+
+@app.get("/api/reactions")
+async def reactions_stats():
+    """
+    Звуки-реакции: список, объём в памяти, число запусков и время передачи звука
+    """
+    if reactions is None:
+        raise HTTPException(status_code=404, detail="Reactions are not loaded (TTS_REACTIONS_FILE)")
+    return reactions.stats()
+
+
+@app.post("/api/reactions/reload")
+async def reactions_reload():
+    """
+    Перечитывает справочник реакций и декодирует звуки заново, без перезапуска.
+    Пока новый банк собирается, реакции играют из прежнего; при ошибке или
+    пропавшем справочнике прежний банк остаётся.
+    """
+    try:
+        bank = await asyncio.get_running_loop().run_in_executor(None, _load_reactions)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Reactions are not loaded: {e}")
+    if bank is None:
+        raise HTTPException(status_code=404, detail=f"Reactions file not found: {TTS_REACTIONS_FILE}")
+    return bank.stats()
+
+
+@app.post("/api/react/{reaction_id}")
+async def react(reaction_id: str, mode: str = MODE_MIX, priority: int = PRIORITY_NORMAL):
+    """
+    Проигрывает звук-реакцию из памяти: mix — поверх текущего звука (если
+    приёмник не умеет смешивать — в очередь), queue — в очередь
+    воспроизведения с приоритетом priority.
+
+    Пример: curl -X POST "http://localhost:8081/api/react/hoot?mode=mix"
+    """
+    started = time.perf_counter()
+    if mode not in (MODE_MIX, MODE_QUEUE):
+        raise HTTPException(status_code=400, detail=f"Unsupported mode: {mode} ({MODE_MIX}, {MODE_QUEUE})")
+    bank = reactions
+    pcm = bank.get(reaction_id) if bank is not None else None
+    if pcm is None:
+        raise HTTPException(status_code=404, detail=f"Reaction not found: {reaction_id}")
+
+    job_id = None
+    if mode == MODE_MIX:
+        try:
+            mixed = sink.mix(pcm, bank.sample_rate)
+        except Exception as e:
+            log.warning(f"Реакция {reaction_id} не подмешана: {e}")
+            mixed = False
+        if not mixed:
+            mode = MODE_QUEUE
+    if mode == MODE_QUEUE:
+        if scheduler.active_count() >= TTS_MAX_JOBS:
+            _reject("playback", scheduler.retry_after())
+        job = scheduler.create_job(f"[reaction] {reaction_id}", priority)
+        scheduler.enqueue(job, pcm, bank.sample_rate)
+        job_id = job.id
+    dispatch = time.perf_counter() - started
+    bank.observe(mode, dispatch)
+    return {
+        "reaction": reaction_id,
+        "mode": mode,
+        "job_id": job_id,
+        "duration": round(len(pcm) / bank.sample_rate, 3),
+        "dispatch_ms": round(dispatch * 1000, 3),
+    }
+
+
+@app.get("/api/jobs")
+async def jobs_stats():
+    """
+    Глубина очереди воспроизведения и текущее задание
+    """
+    return scheduler.stats()
+
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str):
+    """
+    Статус задания на озвучку
+    """
+    job = scheduler.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.delete("/api/jobs/{job_id}")
+async def job_cancel(job_id: str):
+    """
+    Отмена задания: снимает его с очереди или прерывает звучание
+    """
+    job = _cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
 @app.post("/api/tts")
-async def text_to_speech(text: str):
+async def text_to_speech(
+    text: str,
+    priority: int = PRIORITY_NORMAL,
+    timeout: Optional[float] = None,
+    stream: Optional[bool] = None,
+    sample_rate: Optional[int] = None,
+    quality: Optional[str] = None,
+    x_deadline_ms: Optional[float] = Header(None),
+):
     """
     Обработка POST-запроса с формой (application/x-www-form-urlencoded)
     """
     if not text.strip():
         raise HTTPException(status_code=400, detail="Text is required")
+    _require_ready()
     try:
-        tts_engine.text_to_speech(text_in=text)
-        return JSONResponse(content={"status": "success", "text": text})
+        return JSONResponse(
+            status_code=202,
+            content=_speak(text, priority, timeout, stream, x_deadline_ms, sample_rate, quality),
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         log.warn(e)
         raise HTTPException(status_code=500, detail=f"TTS error: {str(e)}")
 
 
-@app.post("/api/tts/json")
-async def text_to_speech_json(request: TTSTextRequest):
+@app.post("/api/tts/json", status_code=202)
+async def text_to_speech_json(
+    request: TTSTextRequest, x_deadline_ms: Optional[float] = Header(None)
+):
     """
     Обработка JSON POST-запроса
     """
     if not request.text.strip():
         raise HTTPException(status_code=400, detail="Text is required")
+    _require_ready()
     try:
-        tts_engine.text_to_speech(text_in=request.text)
-        return {"status": "success", "text": request.text}
+        return _speak(
+            request.text,
+            request.priority,
+            request.timeout,
+            request.stream,
+            x_deadline_ms,
+            request.sample_rate,
+            request.quality,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         log.warn(e)
         raise HTTPException(status_code=500, detail=f"TTS error: {str(e)}")
 
 
-@app.get("/api/speak")
-async def speak_get(text: str):
+@app.get("/api/speak", status_code=202)
+async def speak_get(
+    text: str,
+    priority: int = PRIORITY_NORMAL,
+    timeout: Optional[float] = None,
+    stream: Optional[bool] = None,
+    sample_rate: Optional[int] = None,
+    quality: Optional[str] = None,
+    x_deadline_ms: Optional[float] = Header(None),
+):
     """
     GET-эндпоинт для озвучки текста
-    Пример: /api/speak?text=Привет
+    Пример: /api/speak?text=Привет&quality=telephony
     """
     if not text.strip():
         raise HTTPException(status_code=400, detail="Text is required")
+    _require_ready()
     try:
-        tts_engine.text_to_speech(text_in=text)
-        return {"status": "success", "text": text}
+        return _speak(text, priority, timeout, stream, x_deadline_ms, sample_rate, quality)
+    except HTTPException:
+        raise
     except Exception as e:
         log.warn(e)
         raise HTTPException(status_code=500, detail=f"TTS error: {str(e)}")
+
+
+@app.get("/api/tts/stream")
+async def text_to_speech_stream(
+    request: Request,
+    text: str,
+    format: Optional[str] = None,
+    timeout: Optional[float] = None,
+    sample_rate: Optional[int] = None,
+    quality: Optional[str] = None,
+    x_deadline_ms: Optional[float] = Header(None),
+):
+    """
+    Потоковая выдача аудио без воспроизведения на сервере
+    (format=wav|pcm|mulaw|alaw, без format — по заголовку Accept).
+    Пример: /api/tts/stream?text=Привет&format=mulaw&quality=telephony
+    """
+    return _stream_response(
+        request,
+        text,
+        format,
+        _resolve_rate(sample_rate, quality),
+        _request_timeout(timeout, x_deadline_ms),
+    )
+
+
+@app.post("/api/tts/stream")
+async def text_to_speech_stream_json(
+    http_request: Request,
+    request: TTSTextRequest,
+    format: Optional[str] = None,
+    x_deadline_ms: Optional[float] = Header(None),
+):
+    """
+    Потоковая выдача аудио по JSON-запросу (format=wav|pcm|mulaw|alaw)
+    """
+    samplerate = _resolve_rate(request.sample_rate, request.quality)
+    timeout = _request_timeout(request.timeout, x_deadline_ms)
+    return _stream_response(http_request, request.text, format, samplerate, timeout)
+
+
+@app.get("/api/tts/audio")
+async def text_to_audio(
+    request: Request,
+    text: str,
+    format: Optional[str] = None,
+    timeout: Optional[float] = None,
+    sample_rate: Optional[int] = None,
+    quality: Optional[str] = None,
+    x_deadline_ms: Optional[float] = Header(None),
+):
+    """
+    Аудиофайл целиком без воспроизведения на сервере
+    (format=wav|pcm|mulaw|alaw|flac|opus, без format — по заголовку Accept).
+    Пример: /api/tts/audio?text=Привет&format=opus&sample_rate=16000
+    """
+    return await _audio_response(
+        request,
+        text,
+        format,
+        _resolve_rate(sample_rate, quality),
+        _request_timeout(timeout, x_deadline_ms),
+    )
+
+
+@app.post("/api/tts/audio")
+async def text_to_audio_json(
+    http_request: Request,
+    request: TTSTextRequest,
+    format: Optional[str] = None,
+    x_deadline_ms: Optional[float] = Header(None),
+):
+    """
+    Аудиофайл целиком по JSON-запросу
+    """
+    samplerate = _resolve_rate(request.sample_rate, request.quality)
+    timeout = _request_timeout(request.timeout, x_deadline_ms)
+    return await _audio_response(http_request, request.text, format, samplerate, timeout)
+
+
+@app.websocket("/ws/tts")
+async def text_to_speech_ws(
+    websocket: WebSocket,
+    format: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+    quality: Optional[str] = None,
+    timeout: Optional[float] = None,
+):
+    """
+    Потоковый синтез текста, поступающего по частям (токены LLM): каждое
+    законченное предложение синтезируется сразу и уходит бинарным кадром
+    (format=pcm|mulaw|alaw, по умолчанию pcm). Сообщения клиента и ответы —
+    см. speech_session.
+    Пример: ws://localhost:8081/ws/tts?quality=standard
+    """
+    await websocket.accept()
+    try:
+        samplerate = _resolve_rate(sample_rate, quality)
+        format_name = (format or FORMAT_PCM).lower()
+        if format_name not in WS_FORMATS:
+            raise HTTPException(
+                status_code=400, detail=f"Unsupported format: {format} ({', '.join(WS_FORMATS)})"
+            )
+        codec = get_codec(format_name, streaming=True)
+        _require_ready()
+        _admit(playback=False)
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "status": e.status_code, "detail": e.detail})
+        retry = e.status_code in (429, 503)
+        await websocket.close(code=WS_CLOSE_TRY_AGAIN if retry else WS_CLOSE_POLICY)
+        return
+
+    session = SpeechSession(
+        _segment_synthesizer(samplerate),
+        websocket.send_json,
+        websocket.send_bytes,
+        lambda pcm: codec.encode_chunk(pcm, samplerate),
+        concurrency=inference.parallelism,
+        timeout=timeout,
+        max_chars=TTS_LONG_TEXT_MAX_CHARS,
+    )
+    await websocket.send_json({
+        "type": "ready",
+        "sample_rate": samplerate,
+        "format": codec.name,
+        "content_type": codec.content_type(samplerate),
+    })
+    sender = asyncio.ensure_future(session.run())
+    try:
+        while not session.finished:
+            await session.handle(await websocket.receive_text())
+        await sender  # end: дожидаемся отправки всего аудио
+        await websocket.close()
+    except WebSocketDisconnect:
+        log.info("WebSocket: клиент отключился, синтез прерван")
+    finally:
+        session.close()
+        sender.cancel()
+
+
+@app.post("/api/tts/batch")
+async def text_to_speech_batch(request: TTSBatchRequest):
+    """
+    Пакетный рендер без воспроизведения: ZIP-архив WAV-файлов и manifest.json
+    с временем синтеза каждого файла и общей пропускной способностью.
+    Файлы уходят клиенту по мере готовности.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Items are required")
+    if len(request.items) > TTS_RENDER_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"Too many items (max {TTS_RENDER_MAX_ITEMS})"
+        )
+    items = []
+    for i, item in enumerate(request.items):
+        if not item.text.strip():
+            raise HTTPException(status_code=400, detail=f"Item {i}: text is required")
+        try:
+            rate = resolve_sample_rate(item.sample_rate, item.quality)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Item {i}: {e}")
+        items.append(RenderItem(i, item.text, item.speaker, rate, item.name))
+    _require_ready()
+    _admit(playback=False)
+
+    def synthesize(text, speaker, sample_rate, timeout):
+        return _synthesize_at(text, timeout, speaker, sample_rate)
+
+    return StreamingResponse(
+        render_zip(items, synthesize, inference.parallelism, TTS_SAMPLE_RATE, request.timeout),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="tts_batch.zip"'},
+    )
+
+
+# Время импорта модуля (включая torch, pygame и объявление маршрутов)
+startup.mark_imported(time.perf_counter() - IMPORT_STARTED)
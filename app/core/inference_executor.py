@@ -0,0 +1,369 @@
+"""
+Исполнитель синтеза речи вне event loop.
+
+Модель живёт в отдельном пуле, а обработчики FastAPI
+получают awaitable-API `synthesize()` с таймаутом на каждый запрос. Пока пул
+занят синтезом, event loop продолжает обслуживать остальные запросы.
+
+Режимы:
+- thread  — одна модель, пул потоков;
+- process — пул процессов, в каждом своя копия модели (работает и без fork);
+- pool    — процессы через fork с общими весами модели и отправкой запроса
+            наименее загруженному процессу (см. worker_pool).
+"""
+
+import asyncio
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.config.config import (
+    TTS_EXECUTOR_MODE,
+    TTS_EXECUTOR_WORKERS,
+    TTS_SYNTHESIS_TIMEOUT_SEC,
+    TTS_BATCH_MAX_SIZE,
+    TTS_BATCH_MAX_WAIT_MS,
+    TTS_POOL_THREADS_PER_WORKER,
+)
+from app.core import metrics
+from app.core.batcher import MicroBatcher
+from app.core.logger import get_logger
+from app.core.single_flight import SingleFlight
+from app.core.thread_plan import ThreadPlan, apply_threads, load_plan
+from app.core.worker_pool import ModelWorkerPool
+
+
+log = get_logger(__name__)
+
+MODE_THREAD = "thread"
+MODE_PROCESS = "process"
+MODE_POOL = "pool"
+
+# Сглаживание скользящей средней длительности задачи (для Retry-After)
+DURATION_EWMA_ALPHA = 0.2
+
+
+class SynthesisTimeoutError(TimeoutError):
+    """Синтез не уложился в отведённое время."""
+
+
+# --- Замер ожидания в очереди ----------------------------------------------
+# Задача возвращает вместе с результатом момент начала выполнения по
+# time.monotonic(): эти часы общие для всех процессов, поэтому ожидание
+# считается одинаково в режимах thread, process и pool.
+def _timed(func, *args) -> Tuple[float, object]:
+    started = time.monotonic()
+    return started, func(*args)
+
+
+def _timed_batch(func, *args) -> List[Tuple[float, np.ndarray]]:
+    started, outputs = _timed(func, *args)
+    return [(started, output) for output in outputs]
+
+
+def _timed_method(tts, method: str, *args) -> Tuple[float, object]:
+    return _timed(getattr(tts, method), *args)
+
+
+def _timed_batch_method(tts, method: str, *args) -> List[Tuple[float, np.ndarray]]:
+    return _timed_batch(getattr(tts, method), *args)
+
+
+# --- Код рабочих процессов ---------------------------------------------------
+# Экземпляр TTS создаётся один раз на процесс в инициализаторе пула.
+_worker_tts = None
+
+
+def _init_worker(threads: int = 0, interop_threads: int = 0) -> None:
+    global _worker_tts
+    from app.core.text_to_speech import TTS
+
+    apply_threads(threads, interop_threads)
+    _worker_tts = TTS()
+
+
+def _worker_synthesize(text_in: str, speaker: Optional[str], sample_rate: Optional[int]) -> np.ndarray:
+    return _worker_tts.synthesize(text_in, speaker, sample_rate)
+
+
+def _worker_synthesize_batch(
+    texts: List[str], speaker: Optional[str], sample_rate: Optional[int]
+) -> List[np.ndarray]:
+    return _worker_tts.synthesize_batch(texts, True, speaker, sample_rate)
+
+
+def _worker_warmup(text_in: str) -> float:
+    return _worker_tts.warmup(text_in)
+
+
+def _worker_samplerate() -> int:
+    return _worker_tts.samplerate
+
+
+def _worker_model_version() -> str:
+    return _worker_tts.model_version
+
+
+def _worker_cache_stats() -> dict:
+    return _worker_tts.cache_stats()
+
+
+# --- Исполнитель -------------------------------------------------------------
+class InferenceExecutor:
+    """Пул, владеющий моделью, с асинхронным API синтеза."""
+
+    def __init__(
+        self,
+        mode: str = TTS_EXECUTOR_MODE,
+        workers: int = TTS_EXECUTOR_WORKERS,
+        timeout: float = TTS_SYNTHESIS_TIMEOUT_SEC,
+        batch_max_size: int = TTS_BATCH_MAX_SIZE,
+        batch_max_wait_ms: float = TTS_BATCH_MAX_WAIT_MS,
+        plan: Optional[ThreadPlan] = None,
+    ):
+        """
+        :param plan: план потоков; по умолчанию читается сохранённый
+                     `cyber-owl-tts autotune` (см. thread_plan)
+        """
+        if mode not in (MODE_THREAD, MODE_PROCESS, MODE_POOL):
+            raise ValueError(f"Неизвестный режим исполнителя: {mode}")
+        self._mode = mode
+        self._workers = max(1, workers)
+        self._batch_max_size = max(1, batch_max_size)
+        self._timeout = timeout
+        self._plan = plan
+        self._pool = None  # Executor или ModelWorkerPool
+        self._tts = None
+        self._samplerate: Optional[int] = None
+        self._model_version: Optional[str] = None
+        self._in_flight = 0
+        self._duration_ewma: Optional[float] = None
+        self._lock = threading.Lock()
+        # Одинаковые одновременные запросы синтезируются один раз
+        self._flights = SingleFlight()
+        self._batcher: Optional[MicroBatcher] = None
+        if batch_max_size > 1:
+            self._batcher = MicroBatcher(self._submit_batch, batch_max_size, batch_max_wait_ms)
+
+    @property
+    def samplerate(self) -> int:
+        return self._samplerate
+
+    @property
+    def model_version(self) -> Optional[str]:
+        """Версия модели (входит в ключи кэшей аудио)."""
+        return self._model_version
+
+    @property
+    def in_flight(self) -> int:
+        """Задач синтеза в пуле (поставленных и выполняющихся)."""
+        with self._lock:
+            return self._in_flight
+
+    @property
+    def parallelism(self) -> int:
+        """Сколько запросов одновременно загружают все рабочие (с учётом пачек)."""
+        return self._workers * self._batch_max_size
+
+    def joins_in_flight(
+        self, text_in: str, speaker: Optional[str] = None, sample_rate: Optional[int] = None
+    ) -> bool:
+        """
+        Идёт ли уже синтез этого текста: такой запрос присоединится к нему
+        (single-flight) и места в пуле не займёт.
+        """
+        return (text_in, speaker, sample_rate or self._samplerate) in self._flights
+
+    def retry_after(self) -> int:
+        """Оценка, через сколько секунд в пуле освободится место."""
+        with self._lock:
+            duration = self._duration_ewma
+        return max(1, math.ceil(duration or 1.0))
+
+    def start(self) -> None:
+        """Создаёт пул и загружает модель (блокирующий вызов)."""
+        if self._pool is not None:
+            return
+        plan = self._plan = self._plan or load_plan(mode=self._mode)
+        if plan is not None:
+            self._workers = plan.workers
+            log.info(f"План потоков: {plan.describe()}")
+        log.info(f"Запуск исполнителя синтеза: mode={self._mode}, workers={self._workers}")
+        if self._mode == MODE_THREAD:
+            from app.core.text_to_speech import TTS
+
+            if plan is not None:
+                # Рабочие-потоки делят один пул потоков torch и общий набор ядер
+                cpus = sorted({cpu for cpus in plan.cpus for cpu in cpus}) if plan.pinned else None
+                apply_threads(plan.threads, plan.interop_threads, cpus)
+            self._tts = TTS()
+            self._samplerate = self._tts.samplerate
+            self._model_version = self._tts.model_version
+            self._pool = ThreadPoolExecutor(
+                max_workers=self._workers, thread_name_prefix="tts-inference"
+            )
+        elif self._mode == MODE_POOL:
+            from app.core.text_to_speech import TTS
+
+            if plan is not None:
+                self._pool = ModelWorkerPool(
+                    TTS, plan.workers, plan.threads, plan.interop_threads, plan.cpus
+                )
+            else:
+                self._pool = ModelWorkerPool(TTS, self._workers, TTS_POOL_THREADS_PER_WORKER)
+            self._pool.start()
+            self._samplerate = self._pool.samplerate
+            self._model_version = self._pool.model_version
+        else:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(plan.threads, plan.interop_threads) if plan is not None else (),
+            )
+            self._samplerate = self._pool.submit(_worker_samplerate).result()
+            self._model_version = self._pool.submit(_worker_model_version).result()
+        if self._batcher is not None:
+            self._batcher.start()
+
+    def shutdown(self) -> None:
+        """Останавливает пул, отменяя ещё не начатые задачи."""
+        if self._pool is None:
+            return
+        if self._batcher is not None:
+            self._batcher.stop()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        if self._tts is not None:
+            self._tts.close()
+            self._tts = None
+
+    async def synthesize(
+        self,
+        text_in: str,
+        timeout: Optional[float] = None,
+        speaker: Optional[str] = None,
+        sample_rate: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Синтезирует текст в int16 PCM, не блокируя event loop.
+
+        :param text_in: текст или SSML
+        :param timeout: таймаут запроса, с (по умолчанию из конфигурации)
+        :param speaker: голос (по умолчанию — голос модели)
+        :param sample_rate: частота дискретизации (по умолчанию — self.samplerate)
+        :return: массив int16
+        :raises SynthesisTimeoutError: если синтез не уложился в таймаут
+        """
+        if self._pool is None:
+            raise RuntimeError("Исполнитель синтеза не запущен")
+        timeout = self._timeout if timeout is None else timeout
+
+        # Ключ как у кэша аудио (версия модели у исполнителя одна)
+        voice = (speaker, sample_rate or self._samplerate)
+        key = (text_in,) + voice
+        future, _ = self._flights.acquire(key, lambda: self._submit(text_in, *voice))
+        try:
+            # shield: таймаут одного из ожидающих не отменяет общую задачу
+            _, audio = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+            return audio
+        except asyncio.TimeoutError:
+            # Ещё не начатая задача снимается с очереди, когда её больше никто
+            # не ждёт; начатую дорабатываем вхолостую — результат попадёт в кэш.
+            if self._flights.release(key, future):
+                future.cancel()
+            raise SynthesisTimeoutError(f"Синтез не уложился в {timeout:.3f} с")
+        except asyncio.CancelledError:
+            # Клиент ушёл или задание отменено
+            if self._flights.release(key, future):
+                future.cancel()
+            raise
+
+    async def warmup(self, text_in: str) -> None:
+        """
+        Прогревочный синтез мимо кэша в каждой копии модели
+        (в режиме process — по одному вызову на процесс без гарантии
+        распределения).
+        """
+        if self._pool is None:
+            raise RuntimeError("Исполнитель синтеза не запущен")
+        if self._mode == MODE_THREAD:
+            futures = [self._pool.submit(self._tts.warmup, text_in)]
+        elif self._mode == MODE_POOL:
+            futures = self._pool.broadcast("warmup", text_in)
+        else:
+            futures = [self._pool.submit(_worker_warmup, text_in) for _ in range(self._workers)]
+        await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+
+    async def cache_stats(self) -> dict:
+        """Счётчики кэша (в режимах process/pool — одного из рабочих процессов)."""
+        if self._mode == MODE_THREAD:
+            return self._tts.cache_stats()
+        if self._mode == MODE_POOL:
+            return await asyncio.wrap_future(self._pool.submit("cache_stats"))
+        return await asyncio.wrap_future(self._pool.submit(_worker_cache_stats))
+
+    def stats(self) -> dict:
+        """Состояние пула."""
+        with self._lock:
+            in_flight = self._in_flight
+        return {
+            "mode": self._mode,
+            "workers": self._workers,
+            "thread_plan": self._plan.describe() if self._plan is not None else None,
+            "in_flight": in_flight,
+            "started": self._pool is not None,
+            "single_flight": self._flights.stats(),
+            "batching": self._batcher.stats() if self._batcher is not None else None,
+            "pool": self._pool.stats() if self._mode == MODE_POOL and self._pool is not None else None,
+        }
+
+    def _submit(self, text_in: str, speaker: Optional[str], sample_rate: int) -> Future:
+        """
+        Отправляет один текст в пул (или батчер).
+
+        :return: Future с парой (момент начала синтеза, PCM)
+        """
+        queued = time.monotonic()
+        if self._batcher is not None:
+            future = self._batcher.submit(text_in, (speaker, sample_rate))
+        elif self._mode == MODE_THREAD:
+            future = self._pool.submit(_timed, self._tts.synthesize, text_in, speaker, sample_rate)
+        elif self._mode == MODE_POOL:
+            future = self._pool.submit(_timed_method, "synthesize", text_in, speaker, sample_rate)
+        else:
+            future = self._pool.submit(_timed, _worker_synthesize, text_in, speaker, sample_rate)
+        with self._lock:
+            self._in_flight += 1
+        submitted = time.perf_counter()
+        future.add_done_callback(lambda done: self._on_done(done, submitted, queued))
+        return future
+
+    def _submit_batch(self, texts: List[str], voice: Tuple[Optional[str], int]):
+        """Отправляет собранную батчером пачку одного голоса в пул одним вызовом."""
+        speaker, sample_rate = voice
+        if self._mode == MODE_THREAD:
+            return self._pool.submit(_timed_batch, self._tts.synthesize_batch, texts, True, speaker, sample_rate)
+        if self._mode == MODE_POOL:
+            return self._pool.submit(_timed_batch_method, "synthesize_batch", texts, True, speaker, sample_rate)
+        return self._pool.submit(_timed_batch, _worker_synthesize_batch, texts, speaker, sample_rate)
+
+    def _on_done(self, future: Future, submitted: float, queued: float) -> None:
+        if not future.cancelled() and future.exception() is None:
+            # Ожидание в очереди исполнителя (с батчером — включая сборку пачки)
+            started, _ = future.result()
+            metrics.QUEUE_WAIT_SECONDS.labels(queue=metrics.QUEUE_SYNTHESIS).observe(max(0.0, started - queued))
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled():
+                return
+            duration = time.perf_counter() - submitted
+            if self._duration_ewma is None:
+                self._duration_ewma = duration
+            else:
+                self._duration_ewma += DURATION_EWMA_ALPHA * (duration - self._duration_ewma)
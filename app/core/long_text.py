@@ -0,0 +1,437 @@
+"""
+Синтез длинных текстов и SSML-документов.
+
+Документ разбирается на последовательность сегментов: речь (предложение,
+для SSML — вместе с открытыми на нём `<prosody>` и другими тегами) и паузы
+(`<break>`, границы абзацев). SSML разбирается через ElementTree.
+
+Речевые сегменты синтезируются параллельно — по вызову модели на сегмент,
+одновременно не больше, чем может взять исполнитель, — и склеиваются по
+порядку:
+- пауза вставляется тишиной точной длины, а тишина, которую модель оставила
+  на краях соседней речи, обрезается;
+- соседние предложения сшиваются коротким кроссфейдом, без щелчков на стыке.
+
+Первый готовый кусок отдаётся, как только синтезировано первое предложение,
+поэтому тот же движок работает и для потокового ответа. Документ целиком
+(synthesize_document) собирается за один проход в заранее выделенный буфер
+(assemble): каждый отсчёт копируется один раз, кроссфейд считается прямо на
+стыке в буфере.
+"""
+
+import asyncio
+import re
+import xml.etree.ElementTree as ET
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+from app.config.config import TTS_CROSSFADE_MS, TTS_LONG_TEXT_MAX_CHARS
+from app.core.logger import get_logger
+from app.utils.text_splitter import iter_sentences, split_sentences, split_text
+
+
+log = get_logger(__name__)
+
+SEGMENT_SPEECH = "speech"
+SEGMENT_BREAK = "break"
+
+# Длительность <break strength="..."/>, с (без атрибутов — medium)
+BREAK_STRENGTH_SEC = {
+    "none": 0.0,
+    "x-weak": 0.1,
+    "weak": 0.25,
+    "medium": 0.4,
+    "strong": 0.75,
+    "x-strong": 1.2,
+}
+# Пауза между абзацами (<p> или пустая строка в обычном тексте)
+PARAGRAPH_BREAK_SEC = BREAK_STRENGTH_SEC["strong"]
+MAX_BREAK_SEC = 10.0
+
+# Амплитуда int16, ниже которой отсчёт считается тишиной (около -54 dBFS)
+SILENCE_THRESHOLD = 64
+# Сколько тишины оставить у края речи при обрезке, мс (затухание звука)
+SILENCE_MARGIN_MS = 5
+
+PARAGRAPH_RE = re.compile(r"\n\s*\n")
+BREAK_TIME_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s)\s*$", re.I)
+
+# Синтез одного сегмента: (текст или SSML, таймаут) -> int16 PCM
+Synthesize = Callable[[str, Optional[float]], Awaitable[np.ndarray]]
+
+
+class Segment:
+    """Речь (text) или пауза (seconds)."""
+
+    def __init__(self, kind: str, text: str = "", seconds: float = 0.0):
+        self.kind = kind
+        self.text = text
+        self.seconds = seconds
+
+    def __repr__(self) -> str:
+        if self.kind == SEGMENT_BREAK:
+            return f"Segment(break, {self.seconds:.3f} с)"
+        return f"Segment(speech, {self.text!r})"
+
+
+def parse_document(text: str, max_chars: int = TTS_LONG_TEXT_MAX_CHARS) -> List[Segment]:
+    """
+    Разбивает текст или SSML на сегменты речи и пауз.
+
+    :param text: обычный текст или документ `<speak>…</speak>`
+    :param max_chars: максимум символов текста в одном сегменте речи
+    """
+    if "<speak" in text:
+        try:
+            return _SsmlSegmenter(max_chars).run(ET.fromstring(text.strip()))
+        except ET.ParseError as e:
+            # Некорректный XML — режем по тегам, без точных пауз
+            log.warning(f"SSML не разобран ({e}), разбиение по предложениям")
+            return [Segment(SEGMENT_SPEECH, chunk) for chunk in split_text(text)]
+    return _plain_segments(text, max_chars)
+
+
+def _plain_segments(text: str, max_chars: int) -> List[Segment]:
+    segments: List[Segment] = []
+    for paragraph in PARAGRAPH_RE.split(text.strip()):
+        sentences = split_sentences(paragraph)
+        if sentences and segments:
+            segments.append(Segment(SEGMENT_BREAK, seconds=PARAGRAPH_BREAK_SEC))
+        for sentence in sentences:
+            segments.extend(Segment(SEGMENT_SPEECH, piece) for piece in _split_words(sentence, max_chars))
+    return segments
+
+
+def _split_words(text: str, max_chars: int) -> List[str]:
+    """Режет слишком длинный фрагмент по пробелам (слово длиннее лимита не режется)."""
+    if len(text) <= max_chars:
+        return [text]
+    pieces, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+class _SsmlSegmenter:
+    """
+    Обход дерева SSML. Текущее предложение копится XML-фрагментами; на
+    границе (конец предложения, <s>, <p>, <break>) оно становится отдельным
+    документом `<speak>`, в котором открытые теги закрываются, а следующее
+    предложение открывает их заново.
+    """
+
+    def __init__(self, max_chars: int):
+        self._max_chars = max_chars
+        self._segments: List[Segment] = []
+        self._open: List[str] = []  # открытые теги (<prosody ...>) от корня
+        self._buffer: List[str] = []
+        self._chars = 0
+
+    def run(self, root: ET.Element) -> List[Segment]:
+        if _local_name(root.tag) != "speak":
+            raise ET.ParseError(f"корневой элемент {root.tag}, ожидался speak")
+        self._content(root)
+        self._flush()
+        return self._segments
+
+    def _content(self, element: ET.Element) -> None:
+        self._text(element.text)
+        for child in element:
+            self._element(child)
+            self._text(child.tail)
+
+    def _element(self, element: ET.Element) -> None:
+        name = _local_name(element.tag)
+        if name == "break":
+            self._flush()
+            self._pause(_break_seconds(element))
+        elif name in ("p", "s"):
+            self._flush()
+            if name == "p" and self._segments:
+                self._pause(PARAGRAPH_BREAK_SEC)
+            self._content(element)
+            self._flush()
+        else:
+            # <prosody>, <say-as> и прочие — как есть, с переносом через границы
+            attributes = "".join(
+                f" {_local_name(key)}={quoteattr(value)}" for key, value in element.attrib.items()
+            )
+            tag = f"<{name}{attributes}>"
+            self._open.append(tag)
+            self._buffer.append(tag)
+            self._content(element)
+            self._open.pop()
+            self._buffer.append(f"</{name}>")
+
+    def _text(self, text: Optional[str]) -> None:
+        if not text:
+            return
+        if self._chars and text[:1].isspace():
+            self._buffer.append(" ")
+        for sentence, terminated in iter_sentences(text):
+            pieces = _split_words(sentence, self._max_chars)
+            for i, piece in enumerate(pieces):
+                if self._chars and (i > 0 or self._chars + len(piece) > self._max_chars):
+                    self._flush()
+                self._buffer.append(escape(piece))
+                self._chars += len(piece.strip())
+            if terminated:
+                self._flush()
+
+    def _pause(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        if self._segments and self._segments[-1].kind == SEGMENT_BREAK:
+            self._segments[-1].seconds = min(self._segments[-1].seconds + seconds, MAX_BREAK_SEC)
+        else:
+            self._segments.append(Segment(SEGMENT_BREAK, seconds=seconds))
+
+    def _flush(self) -> None:
+        if self._chars:
+            closing = "".join(f"</{_tag_name(tag)}>" for tag in reversed(self._open))
+            body = "".join(self._buffer).strip()
+            self._segments.append(Segment(SEGMENT_SPEECH, f"<speak>{body}{closing}</speak>"))
+        self._buffer = list(self._open)
+        self._chars = 0
+
+
+def _local_name(tag: str) -> str:
+    """Имя тега или атрибута без пространства имён ({...synthesis}speak -> speak)."""
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+def _tag_name(open_tag: str) -> str:
+    return open_tag[1:].split(None, 1)[0].rstrip(">")
+
+
+def _break_seconds(element: ET.Element) -> float:
+    """Длительность <break/>: атрибут time (500ms, 2s) или strength."""
+    match = BREAK_TIME_RE.match(element.get("time", ""))
+    if match:
+        value = float(match.group(1))
+        seconds = value / 1000.0 if match.group(2).lower() == "ms" else value
+    else:
+        seconds = BREAK_STRENGTH_SEC.get(element.get("strength", "medium").lower(), BREAK_STRENGTH_SEC["medium"])
+    return min(seconds, MAX_BREAK_SEC)
+
+
+# --- Синтез и склейка --------------------------------------------------------
+
+async def render(
+    segments: List[Segment],
+    synthesize: Synthesize,
+    sample_rate: int,
+    concurrency: int,
+    timeout: Optional[float] = None,
+    crossfade_ms: float = TTS_CROSSFADE_MS,
+) -> AsyncIterator[np.ndarray]:
+    """
+    Синтезирует речевые сегменты параллельно и отдаёт склеенное аудио по
+    порядку: по куску на предложение, паузы — в конце куска перед ними.
+
+    :param segments: сегменты из parse_document
+    :param synthesize: асинхронный синтез одного сегмента
+    :param sample_rate: частота дискретизации результата
+    :param concurrency: сколько сегментов синтезировать одновременно
+    :param timeout: таймаут на весь документ, с
+    :param crossfade_ms: длительность кроссфейда между предложениями, мс
+    """
+    tasks = _start_synthesis(segments, synthesize, concurrency, timeout)
+    fade = int(sample_rate * crossfade_ms / 1000)
+    margin = int(sample_rate * SILENCE_MARGIN_MS / 1000)
+    tail: Optional[np.ndarray] = None  # конец предыдущего предложения для кроссфейда
+    first = True
+    try:
+        for i, (segment, task) in enumerate(zip(segments, tasks)):
+            if task is None:
+                continue  # паузы добавляются к соседней речи
+            pcm = await task
+            before = _pause_samples(segments, range(i - 1, -1, -1), sample_rate)
+            after = _pause_samples(segments, range(i + 1, len(segments)), sample_rate)
+            if before:
+                pcm = _trim_silence(pcm, leading=True, margin=margin)
+            if after:
+                pcm = _trim_silence(pcm, leading=False, margin=margin)
+            if tail is not None:
+                pcm = crossfade(tail, pcm)
+                tail = None
+            if fade and not after and _has_speech_after(segments, i) and len(pcm) > fade:
+                pcm, tail = pcm[:-fade], pcm[-fade:]
+            parts = [pcm]
+            if first and before:
+                parts.insert(0, np.zeros(before, dtype=np.int16))  # пауза в начале документа
+            if after:
+                parts.append(np.zeros(after, dtype=np.int16))
+            first = False
+            yield np.concatenate(parts) if len(parts) > 1 else pcm
+        if first:
+            # В документе только паузы
+            yield np.zeros(_pause_samples(segments, range(len(segments)), sample_rate), dtype=np.int16)
+    finally:
+        _cancel_synthesis(tasks)
+
+
+async def synthesize_document(
+    text: str,
+    synthesize: Synthesize,
+    sample_rate: int,
+    concurrency: int,
+    timeout: Optional[float] = None,
+) -> np.ndarray:
+    """Синтезирует весь документ в один int16 PCM (см. assemble)."""
+    return await synthesize_segments(parse_document(text), synthesize, sample_rate, concurrency, timeout)
+
+
+async def synthesize_segments(
+    segments: List[Segment],
+    synthesize: Synthesize,
+    sample_rate: int,
+    concurrency: int,
+    timeout: Optional[float] = None,
+) -> np.ndarray:
+    """Синтезирует разобранный документ в один int16 PCM (см. assemble)."""
+    tasks = _start_synthesis(segments, synthesize, concurrency, timeout)
+    try:
+        pcms = [None if task is None else await task for task in tasks]
+    finally:
+        _cancel_synthesis(tasks)
+    return assemble(segments, pcms, sample_rate)
+
+
+def assemble(
+    segments: List[Segment],
+    pcms: List[Optional[np.ndarray]],
+    sample_rate: int,
+    crossfade_ms: float = TTS_CROSSFADE_MS,
+) -> np.ndarray:
+    """
+    Склеивает синтезированные сегменты в один int16 PCM — тот же результат,
+    что у render, но за один проход: сначала считаются обрезка тишины,
+    перекрытия и итоговая длина, затем каждый фрагмент копируется в заранее
+    выделенный буфер, а кроссфейд смешивается прямо в нём.
+
+    :param segments: сегменты из parse_document
+    :param pcms: PCM речевых сегментов по тем же индексам (для пауз — None)
+    :param sample_rate: частота дискретизации
+    :param crossfade_ms: длительность кроссфейда между предложениями, мс
+    """
+    fade = int(sample_rate * crossfade_ms / 1000)
+    margin = int(sample_rate * SILENCE_MARGIN_MS / 1000)
+    # (PCM, перекрытие с предыдущим, пауза перед, пауза после) в отсчётах
+    layout = []
+    total = 0
+    pending = 0  # хвост предыдущего предложения, отданный под кроссфейд
+    for i, segment in enumerate(segments):
+        if segment.kind != SEGMENT_SPEECH:
+            continue
+        pcm = pcms[i]
+        before = _pause_samples(segments, range(i - 1, -1, -1), sample_rate)
+        after = _pause_samples(segments, range(i + 1, len(segments)), sample_rate)
+        if before:
+            pcm = _trim_silence(pcm, leading=True, margin=margin)
+        if after:
+            pcm = _trim_silence(pcm, leading=False, margin=margin)
+        overlap = min(pending, len(pcm))
+        lead = before if not layout else 0  # пауза в начале документа
+        layout.append((pcm, overlap, lead, after))
+        total += lead + len(pcm) - overlap + after
+        pending = fade if fade and not after and _has_speech_after(segments, i) and len(pcm) > fade else 0
+    if not layout:
+        # В документе только паузы
+        return np.zeros(_pause_samples(segments, range(len(segments)), sample_rate), dtype=np.int16)
+
+    out = np.empty(total, dtype=np.int16)
+    position = 0
+    for pcm, overlap, lead, after in layout:
+        out[position:position + lead] = 0
+        position += lead
+        if overlap:
+            joint = out[position - overlap:position]
+            joint[:] = _mix(joint, pcm[:overlap])
+        size = len(pcm) - overlap
+        out[position:position + size] = pcm[overlap:]
+        position += size
+        out[position:position + after] = 0
+        position += after
+    return out
+
+
+def crossfade(tail: np.ndarray, head: np.ndarray) -> np.ndarray:
+    """
+    Сшивает конец предыдущего фрагмента с началом следующего линейным
+    кроссфейдом на длине tail; возвращает следующий фрагмент с вмешанным tail.
+    """
+    count = min(len(tail), len(head))
+    if count == 0:
+        return np.concatenate([tail, head])
+    mixed = _mix(tail[len(tail) - count:], head[:count])
+    return np.concatenate([tail[:len(tail) - count], mixed, head[count:]])
+
+
+def _mix(tail: np.ndarray, head: np.ndarray) -> np.ndarray:
+    """Линейный кроссфейд двух отрезков одинаковой длины."""
+    ramp = np.linspace(0.0, 1.0, len(head), endpoint=False, dtype=np.float32)
+    mixed = tail * (1.0 - ramp) + head * ramp
+    return np.clip(np.rint(mixed), -32768, 32767).astype(np.int16)
+
+
+def _start_synthesis(
+    segments: List[Segment], synthesize: Synthesize, concurrency: int, timeout: Optional[float]
+) -> List[Optional[asyncio.Future]]:
+    """Запускает синтез речевых сегментов (для пауз — None); таймаут — на все сразу."""
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(text: str) -> np.ndarray:
+        async with semaphore:
+            remaining = None if deadline is None else max(deadline - loop.time(), 0.0)
+            return await synthesize(text, remaining)
+
+    # Задачи создаются по порядку — первые предложения первыми занимают рабочих
+    return [
+        asyncio.ensure_future(run(s.text)) if s.kind == SEGMENT_SPEECH else None for s in segments
+    ]
+
+
+def _cancel_synthesis(tasks: List[Optional[asyncio.Future]]) -> None:
+    for task in tasks:
+        if task is None:
+            continue
+        if task.done():
+            if not task.cancelled():
+                task.exception()  # ошибка уже обработана или не нужна
+        else:
+            task.cancel()
+
+
+def _trim_silence(pcm: np.ndarray, leading: bool, margin: int) -> np.ndarray:
+    """Обрезает тишину в начале или в конце, оставляя margin отсчётов."""
+    loud = np.flatnonzero((pcm > SILENCE_THRESHOLD) | (pcm < -SILENCE_THRESHOLD))
+    if len(loud) == 0:
+        return pcm[:0]
+    if leading:
+        return pcm[max(0, loud[0] - margin):]
+    return pcm[:loud[-1] + 1 + margin]
+
+
+def _pause_samples(segments: List[Segment], indexes, sample_rate: int) -> int:
+    """Суммарная длина подряд идущих пауз по индексам (до первой речи), в отсчётах."""
+    seconds = 0.0
+    for i in indexes:
+        if segments[i].kind != SEGMENT_BREAK:
+            break
+        seconds += segments[i].seconds
+    return int(round(seconds * sample_rate))
+
+
+def _has_speech_after(segments: List[Segment], index: int) -> bool:
+    return index + 1 < len(segments) and segments[index + 1].kind == SEGMENT_SPEECH
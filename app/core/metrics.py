@@ -0,0 +1,124 @@
+"""
+Метрики Prometheus для пути синтеза и воспроизведения (сигналы SLO).
+
+Гистограммы длительности этапов:
+- подготовка текста (разбиение на предложения, нормализация),
+- инференс модели,
+- кодирование аудио (float -> PCM16, PCM -> WAV/байты),
+- ожидание в очередях (сборка пачки синтеза, очередь воспроизведения),
+- воспроизведение.
+
+Показатели: real-time factor, символов в секунду, доля попаданий в кэш,
+глубина очереди воспроизведения, память весов модели, недогрузки буфера
+вывода звука.
+
+Метрики отдаёт `/metrics` (см. httpd). В режимах исполнителя process/pool
+синтез идёт в других процессах: чтобы их метрики попали в `/metrics`, задайте
+PROMETHEUS_MULTIPROC_DIR (пустой каталог) до запуска сервера.
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+
+# --- Этапы -------------------------------------------------------------------
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+INFERENCE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PLAYBACK_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Очереди для tts_queue_wait_seconds
+QUEUE_SYNTHESIS = "synthesis"  # от постановки в исполнитель до начала синтеза
+QUEUE_PLAYBACK = "playback"  # от готовности аудио до начала звучания
+
+NORMALIZATION_SECONDS = Histogram(
+    "tts_text_normalization_seconds",
+    "Подготовка текста к синтезу (разбиение, нормализация)",
+    buckets=STAGE_BUCKETS,
+)
+INFERENCE_SECONDS = Histogram(
+    "tts_inference_seconds",
+    "Вызов модели (одиночный текст или пачка)",
+    buckets=INFERENCE_BUCKETS,
+)
+ENCODING_SECONDS = Histogram(
+    "tts_encoding_seconds",
+    "Кодирование аудио",
+    ["format"],
+    buckets=STAGE_BUCKETS,
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "tts_queue_wait_seconds",
+    "Ожидание в очереди",
+    ["queue"],
+    buckets=INFERENCE_BUCKETS,
+)
+PLAYBACK_SECONDS = Histogram(
+    "tts_playback_seconds",
+    "Воспроизведение фрагмента аудио",
+    buckets=PLAYBACK_BUCKETS,
+)
+
+# --- Счётчики для расчёта по окну (rate(...) / rate(...)) --------------------
+
+SYNTHESIZED_CHARS = Counter("tts_synthesized_chars", "Символов отправлено в модель")
+SYNTHESIZED_AUDIO_SECONDS = Counter("tts_synthesized_audio_seconds", "Секунд аудио синтезировано")
+CACHE_LOOKUPS = Counter("tts_cache_lookups", "Обращения к кэшу аудио", ["result"])
+COALESCED_REQUESTS = Counter(
+    "tts_coalesced_requests", "Запросы, присоединённые к уже идущему синтезу того же текста"
+)
+REJECTED_REQUESTS = Counter(
+    "tts_rejected_requests", "Запросы, отклонённые из-за переполнения очередей", ["queue"]
+)
+AUDIO_UNDERRUNS = Counter("tts_audio_underruns", "Недогрузки буфера вывода звука")
+ENCODED_BYTES = Counter("tts_encoded_bytes", "Байт аудио после кодирования", ["format"])
+
+# --- Текущие значения --------------------------------------------------------
+
+REAL_TIME_FACTOR = Gauge(
+    "tts_real_time_factor",
+    "Время инференса / длительность аудио (последний вызов модели)",
+    multiprocess_mode="livemostrecent",
+)
+CHARS_PER_SECOND = Gauge(
+    "tts_chars_per_second",
+    "Символов в секунду инференса (последний вызов модели)",
+    multiprocess_mode="livemostrecent",
+)
+CACHE_HIT_RATIO = Gauge(
+    "tts_cache_hit_ratio",
+    "Доля попаданий в кэш аудио",
+    multiprocess_mode="livemostrecent",
+)
+QUEUE_DEPTH = Gauge(
+    "tts_playback_queue_depth",
+    "Заданий с готовым аудио, ожидающих устройство",
+    multiprocess_mode="livemax",
+)
+MODEL_MEMORY_BYTES = Gauge(
+    "tts_model_memory_bytes",
+    "Память весов и буферов одной копии модели",
+    multiprocess_mode="max",
+)
+
+
+def observe_inference(chars: int, seconds: float, audio_seconds: float) -> None:
+    """
+    Учитывает один вызов модели.
+
+    :param chars: символов во входных текстах
+    :param seconds: длительность вызова
+    :param audio_seconds: длительность полученного аудио
+    """
+    INFERENCE_SECONDS.observe(seconds)
+    SYNTHESIZED_CHARS.inc(chars)
+    SYNTHESIZED_AUDIO_SECONDS.inc(audio_seconds)
+    if audio_seconds > 0:
+        REAL_TIME_FACTOR.set(seconds / audio_seconds)
+    if seconds > 0:
+        CHARS_PER_SECOND.set(chars / seconds)
+
+
+def observe_cache(hit: bool, hit_ratio: float) -> None:
+    """Учитывает обращение к кэшу аудио."""
+    CACHE_LOOKUPS.labels(result="hit" if hit else "miss").inc()
+    CACHE_HIT_RATIO.set(hit_ratio)
@@ -0,0 +1,84 @@
+"""
+Бэкенды исполнения модели Silero.
+
+- eager       — модель из пакета silero_model_ru.pt как есть;
+- torchscript — внутренняя сеть заменяется замороженным TorchScript-модулем;
+- int8        — внутренняя сеть с динамической int8-квантизацией (CPU).
+
+Скомпилированные варианты собирает команда `cyber-owl-tts compile`
+(app/utils/model_translator.py) и кладёт рядом с исходной моделью.
+"""
+
+import os
+from typing import List, Tuple
+
+import torch
+
+from app.core.logger import get_logger
+
+
+log = get_logger(__name__)
+
+BACKEND_EAGER = "eager"
+BACKEND_TORCHSCRIPT = "torchscript"
+BACKEND_INT8 = "int8"
+BACKENDS = (BACKEND_EAGER, BACKEND_TORCHSCRIPT, BACKEND_INT8)
+
+# Дополнительные файлы внутри TorchScript-архива
+EXTRA_INNER_ATTR = "inner_attr"
+EXTRA_SOURCE_VERSION = "source_version"
+
+CURRENT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIRECTORY = os.path.join(CURRENT_DIRECTORY, "..", "models")
+
+_SUFFIXES = {BACKEND_TORCHSCRIPT: "jit", BACKEND_INT8: "int8"}
+
+
+def compiled_model_path(backend: str, base_name: str = "silero_model_ru") -> str:
+    """Путь к скомпилированному варианту модели."""
+    return os.path.join(MODELS_DIRECTORY, f"{base_name}_{_SUFFIXES[backend]}.pt")
+
+
+def inner_modules(model) -> List[Tuple[str, torch.nn.Module]]:
+    """
+    nn.Module внутри модели Silero.
+    Обёртка из пакета — не Module, сама сеть лежит в её атрибутах.
+    """
+    if isinstance(model, torch.nn.Module):
+        return [("", model)]
+    return [(name, value) for name, value in vars(model).items() if isinstance(value, torch.nn.Module)]
+
+
+def apply_backend(model, backend: str, source_version: str) -> str:
+    """
+    Подменяет внутреннюю сеть модели скомпилированным вариантом.
+
+    :param model: eager-модель Silero
+    :param backend: один из BACKENDS
+    :param source_version: версия исходной модели (для проверки совместимости)
+    :return: версия модели с учётом бэкенда (входит в ключ кэша аудио)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд модели: {backend}")
+    if backend == BACKEND_EAGER:
+        return source_version
+
+    path = compiled_model_path(backend)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Скомпилированная модель не найдена: {path} (запустите `cyber-owl-tts compile`)"
+        )
+    extra = {EXTRA_INNER_ATTR: "", EXTRA_SOURCE_VERSION: ""}
+    compiled = torch.jit.load(path, map_location="cpu", _extra_files=extra)
+    inner_attr = extra[EXTRA_INNER_ATTR].decode("utf-8")
+    compiled_from = extra[EXTRA_SOURCE_VERSION].decode("utf-8")
+    if compiled_from != source_version:
+        log.warning(
+            f"Модель {path} собрана из {compiled_from}, а загружена {source_version} — "
+            f"пересоберите её командой `cyber-owl-tts compile`"
+        )
+    if not inner_attr:
+        raise ValueError(f"В {path} не указан атрибут внутренней сети")
+    setattr(model, inner_attr, compiled)
+    log.info(f"Бэкенд модели: {backend} ({path})")
+    return f"{source_version}+{backend}"
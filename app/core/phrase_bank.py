@@ -0,0 +1,194 @@
+"""
+Банк заранее синтезированных фраз: время (все 1440 минут суток в
+официальном и разговорном стиле), приветствия, служебные реплики.
+
+Файл банка (собирает `cyber-owl-tts build-bank`):
+    [0:64)       заголовок BANK_HEADER
+    [64:...)     int16 PCM всех фраз подряд
+    [index:...)  JSON-индекс: голос, частота, версия модели и
+                 фраза -> (смещение, длина) в отсчётах
+
+При запуске файл отображается в память (mmap) только для чтения: страницы
+берутся из page cache и общие для всех процессов, открывших банк, а фраза
+отдаётся видом на отображённый буфер, без копирования и без модели.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from app.core.logger import get_logger
+
+
+log = get_logger(__name__)
+
+BANK_MAGIC = b"OWLBANK1"
+# magic, частота, число фраз, смещение индекса, длина индекса
+BANK_HEADER = struct.Struct("<8sIIQQ")
+BANK_DATA_OFFSET = 64
+
+
+def bank_key(text: str) -> str:
+    """Ключ фразы: текст со схлопнутыми пробелами (регистр и ударения важны)."""
+    return " ".join(text.split())
+
+
+class PhraseBank:
+    """Банк фраз, отображённый в память."""
+
+    def __init__(self, path: str):
+        """
+        :param path: файл банка
+        :raises ValueError: файл не является банком фраз
+        """
+        self._path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._sample_rate, count, index_offset, index_size = BANK_HEADER.unpack_from(self._mmap)
+        if magic != BANK_MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path}: не банк фраз")
+        index = json.loads(self._mmap[index_offset:index_offset + index_size].decode("utf-8"))
+        self._speaker: str = index["speaker"]
+        self._model_version: str = index["model_version"]
+        self._entries: Dict[str, Tuple[int, int]] = {
+            text: (offset, length) for text, (offset, length) in index["entries"].items()
+        }
+        # Вид на весь PCM-блок: фразы — его срезы
+        self._pcm = np.frombuffer(
+            self._mmap, dtype="<i2", count=(index_offset - BANK_DATA_OFFSET) // 2, offset=BANK_DATA_OFFSET
+        )
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        log.info(
+            f"Банк фраз {path}: {count} фраз, {self._sample_rate} Гц, "
+            f"{len(self._pcm) / self._sample_rate / 60:.1f} мин аудио"
+        )
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def speaker(self) -> str:
+        return self._speaker
+
+    @property
+    def model_version(self) -> str:
+        return self._model_version
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def contains(self, text: str, speaker: Optional[str] = None) -> bool:
+        """Есть ли фраза в банке (без учёта в счётчиках попаданий)."""
+        return self._entry(text, speaker) is not None
+
+    def lookup(self, text: str, speaker: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Ищет фразу.
+
+        :param text: текст фразы
+        :param speaker: голос (None — голос по умолчанию, с которым собран банк)
+        :return: int16 PCM (вид на отображённый файл, только чтение) или None
+        """
+        entry = self._entry(text, speaker)
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        offset, length = entry
+        return self._pcm[offset:offset + length]
+
+    def _entry(self, text: str, speaker: Optional[str]) -> Optional[Tuple[int, int]]:
+        return self._entries.get(bank_key(text)) if speaker in (None, self._speaker) else None
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        return {
+            "path": self._path,
+            "phrases": len(self._entries),
+            "sample_rate": self._sample_rate,
+            "speaker": self._speaker,
+            "model_version": self._model_version,
+            "bytes": len(self._pcm) * 2,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+    def close(self) -> None:
+        self._pcm = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # фразы ещё в работе — отображение закроется вместе с ними
+
+
+def open_bank(path: str) -> Optional[PhraseBank]:
+    """Открывает банк; нет пути или файла — None, битый файл — None с предупреждением."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return PhraseBank(path)
+    except (OSError, ValueError, KeyError) as e:
+        log.warning(f"Банк фраз {path} не открыт: {e}")
+        return None
+
+
+def write_bank(
+    path: str,
+    phrases: Iterable[Tuple[str, np.ndarray]],
+    sample_rate: int,
+    speaker: str,
+    model_version: str,
+) -> int:
+    """
+    Пишет банк фраз (через временный файл, заменяя старый атомарно).
+    PCM пишется по мере поступления и в памяти не копится.
+
+    :param phrases: пары (текст, int16 PCM)
+    :return: число фраз в банке
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    entries: Dict[str, Tuple[int, int]] = {}
+    offset = 0
+    with open(tmp_path, "wb") as f:
+        f.write(bytes(BANK_DATA_OFFSET))
+        for text, pcm in phrases:
+            key = bank_key(text)
+            if key in entries:
+                continue
+            data = np.ascontiguousarray(pcm, dtype="<i2")
+            f.write(data.tobytes())
+            entries[key] = (offset, len(data))
+            offset += len(data)
+        index_offset = f.tell()
+        index = json.dumps(
+            {"speaker": speaker, "model_version": model_version, "entries": entries},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        f.write(index)
+        f.seek(0)
+        f.write(BANK_HEADER.pack(BANK_MAGIC, sample_rate, len(entries), index_offset, len(index)))
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+def iter_unique(texts: Iterable[str]) -> Iterator[str]:
+    """Тексты без повторов (по ключу банка), в исходном порядке."""
+    seen = set()
+    for text in texts:
+        key = bank_key(text)
+        if key and key not in seen:
+            seen.add(key)
+            yield key
@@ -0,0 +1,386 @@
+"""
+Планировщик воспроизведения: неблокирующая очередь заданий с приоритетами.
+
+HTTP-обработчик ставит задание в очередь и сразу получает его идентификатор.
+Задание с большим приоритетом вытесняет звучащее задание с меньшим
+(например, тревога прерывает болтовню). Окончание звучания ожидается по
+событию, без опроса устройства.
+
+У задания может быть крайний срок начала звучания: задание, не дождавшееся
+устройства к этому моменту, снимается со статусом expired.
+
+Аудио задания поступает фрагментами (по предложениям): воспроизведение
+первого фрагмента начинается, пока следующие ещё синтезируются.
+"""
+
+import heapq
+import itertools
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.config import TTS_JOB_HISTORY
+from app.core import metrics
+from app.core.logger import get_logger
+
+
+log = get_logger(__name__)
+
+# --- Приоритеты (больше — важнее) ---
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 10
+PRIORITY_HIGH = 50
+PRIORITY_ALARM = 100
+
+# --- Статусы заданий ---
+STATUS_PENDING = "pending"  # принято, идёт синтез
+STATUS_QUEUED = "queued"  # аудио готово, ждёт устройство
+STATUS_PLAYING = "playing"
+STATUS_DONE = "done"
+STATUS_INTERRUPTED = "interrupted"  # вытеснено более приоритетным заданием
+STATUS_CANCELLED = "cancelled"
+STATUS_FAILED = "failed"
+STATUS_EXPIRED = "expired"  # истёк крайний срок до начала звучания
+
+FINAL_STATUSES = (STATUS_DONE, STATUS_INTERRUPTED, STATUS_CANCELLED, STATUS_FAILED, STATUS_EXPIRED)
+
+# Сглаживание скользящей средней длительности задания (для Retry-After)
+LATENCY_EWMA_ALPHA = 0.2
+
+# Функция воспроизведения: (pcm, samplerate, interrupt) -> доиграно ли до конца
+PlayFunc = Callable[[np.ndarray, int, threading.Event], bool]
+
+
+class PlaybackJob:
+    """Задание на воспроизведение."""
+
+    def __init__(self, text: str, priority: int, deadline: Optional[float] = None):
+        """
+        :param deadline: крайний срок начала звучания (time.time()) или None
+        """
+        self.id = uuid.uuid4().hex
+        self.text = text
+        self.priority = priority
+        self.deadline = deadline
+        self.status = STATUS_PENDING
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.queued_at: Optional[float] = None  # первый фрагмент готов
+        self.started_at: Optional[float] = None
+        self.first_audio_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Готовые к воспроизведению фрагменты: (pcm, samplerate)
+        self.segments: "deque[Tuple[np.ndarray, int]]" = deque()
+        self.segments_total = 0
+        self.complete = False  # синтез всех фрагментов завершён
+        self.done = threading.Event()
+
+    @property
+    def time_to_first_audio(self) -> Optional[float]:
+        """Время от приёма задания до начала звучания первого фрагмента, с."""
+        if self.first_audio_at is None:
+            return None
+        return self.first_audio_at - self.created_at
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        """Прошёл ли крайний срок начала звучания."""
+        if self.deadline is None:
+            return False
+        return (time.time() if now is None else now) >= self.deadline
+
+    @property
+    def total_latency(self) -> Optional[float]:
+        """Время от приёма задания до его завершения, с."""
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.created_at
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "text": self.text,
+            "error": self.error,
+            "deadline": self.deadline,
+            "segments": self.segments_total,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "time_to_first_audio": self.time_to_first_audio,
+            "total_latency": self.total_latency,
+        }
+
+
+class PlaybackScheduler:
+    """Очередь воспроизведения с приоритетами в отдельном потоке."""
+
+    def __init__(self, play_func: PlayFunc, history: int = TTS_JOB_HISTORY):
+        self._play = play_func
+        self._history = history
+
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int, PlaybackJob]] = []
+        self._seq = itertools.count()
+        self._jobs: "OrderedDict[str, PlaybackJob]" = OrderedDict()
+        self._current: Optional[PlaybackJob] = None
+        self._active = 0  # незавершённые задания
+        self._latency_ewma: Optional[float] = None
+        self._interrupt = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Запускает поток воспроизведения."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._loop, name="tts-playback", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Останавливает поток, прерывая текущее воспроизведение."""
+        with self._cond:
+            self._running = False
+            self._interrupt.set()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    # --- Управление заданиями ------------------------------------------------
+
+    def create_job(
+        self, text: str, priority: int = PRIORITY_NORMAL, deadline: Optional[float] = None
+    ) -> PlaybackJob:
+        """Регистрирует задание в статусе pending (аудио ещё синтезируется)."""
+        job = PlaybackJob(text, priority, deadline)
+        with self._cond:
+            self._jobs[job.id] = job
+            self._active += 1
+            self._trim_history()
+        return job
+
+    def add_segment(self, job: PlaybackJob, pcm: np.ndarray, samplerate: int) -> bool:
+        """
+        Добавляет к заданию очередной фрагмент аудио.
+        Первый фрагмент ставит задание в очередь воспроизведения.
+
+        :return: False, если задание уже завершено (отменено, вытеснено) —
+                 синтезировать оставшиеся фрагменты не нужно
+        """
+        with self._cond:
+            if job.status in FINAL_STATUSES or job.complete:
+                return False
+            job.segments.append((pcm, samplerate))
+            job.segments_total += 1
+            if job.status == STATUS_PENDING:
+                job.status = STATUS_QUEUED
+                job.queued_at = time.time()
+                heapq.heappush(self._heap, (-job.priority, next(self._seq), job))
+                self._publish_depth()
+                current = self._current
+                if current is not None and job.priority > current.priority:
+                    log.info(f"Задание {job.id} (приоритет {job.priority}) вытесняет {current.id}")
+                    self._interrupt.set()
+            self._cond.notify_all()
+            return True
+
+    def complete(self, job: PlaybackJob) -> None:
+        """Сообщает, что все фрагменты задания синтезированы."""
+        with self._cond:
+            if job.status in FINAL_STATUSES:
+                return
+            job.complete = True
+            if job.status == STATUS_PENDING:
+                self._finish(job, STATUS_DONE)  # озвучивать нечего
+            self._cond.notify_all()
+
+    def enqueue(self, job: PlaybackJob, pcm: np.ndarray, samplerate: int) -> None:
+        """Ставит задание с готовым аудио целиком в очередь воспроизведения."""
+        self.add_segment(job, pcm, samplerate)
+        self.complete(job)
+
+    def is_active(self, job: PlaybackJob) -> bool:
+        """Нужно ли ещё аудио для задания."""
+        with self._cond:
+            return job.status not in FINAL_STATUSES
+
+    def fail(self, job: PlaybackJob, error: str) -> None:
+        """Помечает задание как завершившееся ошибкой (например, синтеза)."""
+        with self._cond:
+            if job.status in FINAL_STATUSES:
+                return
+            job.error = error
+            if job is self._current:
+                # Доигрываем уже готовые фрагменты, затем задание завершится с ошибкой
+                job.complete = True
+                self._cond.notify_all()
+            else:
+                self._finish(job, STATUS_FAILED)
+
+    def cancel(self, job_id: str) -> Optional[PlaybackJob]:
+        """Отменяет задание: снимает с очереди или прерывает звучание."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINAL_STATUSES:
+                return job
+            if job is self._current:
+                job.status = STATUS_CANCELLED
+                self._interrupt.set()
+                self._cond.notify_all()
+            else:
+                self._finish(job, STATUS_CANCELLED)
+            return job
+
+    def expire(self, job: PlaybackJob) -> None:
+        """Снимает задание, не успевшее зазвучать к крайнему сроку."""
+        with self._cond:
+            if job.status in FINAL_STATUSES or job is self._current:
+                return
+            job.error = "Deadline exceeded"
+            self._finish(job, STATUS_EXPIRED)
+
+    def get_job(self, job_id: str) -> Optional[PlaybackJob]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def queue_depth(self) -> int:
+        """Число заданий, ожидающих устройство (с готовым аудио)."""
+        with self._cond:
+            return self._depth()
+
+    def active_count(self) -> int:
+        """Число незавершённых заданий (синтез, очередь, звучание)."""
+        with self._cond:
+            return self._active
+
+    def retry_after(self) -> int:
+        """Оценка, через сколько секунд освободится место в очереди."""
+        with self._cond:
+            latency = self._latency_ewma
+        return max(1, math.ceil(latency or 1.0))
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            pending = sum(1 for job in self._jobs.values() if job.status == STATUS_PENDING)
+            depth = self._depth()
+            current = self._current.id if self._current is not None else None
+            active = self._active
+        return {"queue_depth": depth, "pending": pending, "active": active, "playing": current}
+
+    # --- Поток воспроизведения -----------------------------------------------
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None and self._running:
+                    self._cond.wait()
+                    job = self._next_job()
+                if not self._running:
+                    return
+                job.status = STATUS_PLAYING
+                job.started_at = time.time()
+                self._current = job
+                self._interrupt.clear()
+                self._publish_depth()
+                metrics.QUEUE_WAIT_SECONDS.labels(queue=metrics.QUEUE_PLAYBACK).observe(
+                    job.started_at - job.queued_at
+                )
+
+            played_all = self._play_segments(job)
+
+            with self._cond:
+                self._current = None
+                if job.status == STATUS_CANCELLED:
+                    self._finish(job, STATUS_CANCELLED)
+                elif job.error is not None:
+                    self._finish(job, STATUS_FAILED)
+                else:
+                    self._finish(job, STATUS_DONE if played_all else STATUS_INTERRUPTED)
+                log.info(
+                    f"Задание {job.id}: {job.status}, фрагментов {job.segments_total}, "
+                    f"до первого звука {_fmt_sec(job.time_to_first_audio)}, "
+                    f"всего {_fmt_sec(job.total_latency)}"
+                )
+
+    def _play_segments(self, job: PlaybackJob) -> bool:
+        """
+        Воспроизводит фрагменты задания по мере их готовности.
+
+        :return: True, если воспроизведены все фрагменты
+        """
+        while True:
+            with self._cond:
+                while not job.segments and not job.complete and not self._interrupt.is_set():
+                    self._cond.wait()
+                if self._interrupt.is_set():
+                    return False
+                if not job.segments:
+                    return True  # синтез завершён, всё воспроизведено
+                pcm, samplerate = job.segments.popleft()
+                if job.first_audio_at is None:
+                    job.first_audio_at = time.time()
+
+            try:
+                with metrics.PLAYBACK_SECONDS.time():
+                    played = self._play(pcm, samplerate, self._interrupt)
+                if not played:
+                    return False
+            except Exception as e:
+                log.warning(f"Ошибка воспроизведения задания {job.id}: {e}")
+                job.error = str(e)
+                return False
+
+    def _next_job(self) -> Optional[PlaybackJob]:
+        now = time.time()
+        while self._heap:
+            _, _, job = heapq.heappop(self._heap)
+            if job.status != STATUS_QUEUED:
+                continue
+            if job.expired(now):
+                log.info(f"Задание {job.id} не дождалось устройства до крайнего срока")
+                job.error = "Deadline exceeded"
+                self._finish(job, STATUS_EXPIRED)
+                continue
+            return job
+        return None
+
+    def _finish(self, job: PlaybackJob, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        self._active -= 1
+        if status == STATUS_DONE:
+            latency = job.finished_at - job.created_at
+            if self._latency_ewma is None:
+                self._latency_ewma = latency
+            else:
+                self._latency_ewma += LATENCY_EWMA_ALPHA * (latency - self._latency_ewma)
+        job.segments.clear()  # аудио больше не нужно, освобождаем память
+        job.done.set()
+        self._publish_depth()
+
+    def _depth(self) -> int:
+        return sum(1 for _, _, job in self._heap if job.status == STATUS_QUEUED)
+
+    def _publish_depth(self) -> None:
+        metrics.QUEUE_DEPTH.set(self._depth())
+
+    def _trim_history(self) -> None:
+        """Удаляет самые старые завершённые задания сверх лимита истории."""
+        excess = len(self._jobs) - self._history
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.status in FINAL_STATUSES][:excess]:
+            del self._jobs[job_id]
+
+
+def _fmt_sec(value: Optional[float]) -> str:
+    return "—" if value is None else f"{value:.3f} с"
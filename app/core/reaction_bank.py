@@ -0,0 +1,187 @@
+"""
+Банк звуков-реакций: короткие клипы, заранее декодированные в память.
+
+Справочник реакций — JSON (тот же, что читает Utils.audio_reactions_load):
+список элементов или {"items": [...]}; у элемента идентификатор в `id` или
+`name`, файл — в `file`, `sound` или `path` (относительно каталога JSON).
+
+При загрузке каждый клип декодируется один раз (soundfile, без него — WAV
+через scipy), сводится в моно и пересчитывается на частоту устройства
+вывода. Все клипы лежат подряд в одном заранее выделенном буфере int16,
+реакция — вид на него только для чтения, поэтому воспроизведение не читает
+диск и не декодирует.
+
+Банк неизменяем: перезагрузка собирает новый и подменяет ссылку на него.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.io import wavfile
+
+from app.core.logger import get_logger
+from app.utils.audio_utils import resample_pcm16
+
+try:
+    import soundfile
+except (ImportError, OSError):  # нет пакета или libsndfile
+    soundfile = None
+
+
+log = get_logger(__name__)
+
+# Ключи идентификатора и файла реакции (первый найденный)
+ID_KEYS = ("id", "name")
+FILE_KEYS = ("file", "sound", "path")
+
+MODE_MIX = "mix"  # поверх текущего звука
+MODE_QUEUE = "queue"  # в очередь воспроизведения
+
+
+def read_items(path: str) -> List[dict]:
+    """Элементы справочника реакций: список или поле items."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    items = data.get("items", []) if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError(f"{path}: items должен быть списком")
+    return [item for item in items if isinstance(item, dict)]
+
+
+def decode_clip(path: str, sample_rate: int) -> np.ndarray:
+    """
+    Декодирует звуковой файл в моно int16 PCM с частотой sample_rate.
+
+    :raises ValueError: формат не поддерживается
+    """
+    if soundfile is not None:
+        # В int16 libsndfile читает float-файлы без масштаба (0.5 -> 0), поэтому
+        # читаем float64: целые форматы при умножении на 32768 восстанавливаются точно
+        data, rate = soundfile.read(path, dtype="float64", always_2d=True)
+        data = np.clip(np.rint(data * 32768), -32768, 32767).astype(np.int16)
+    else:
+        rate, data = wavfile.read(path)
+        data = _to_int16(data.reshape(len(data), -1))
+    if data.shape[1] > 1:
+        data = np.rint(data.mean(axis=1)).astype(np.int16)
+    else:
+        data = data[:, 0]
+    return resample_pcm16(np.ascontiguousarray(data), rate, sample_rate)
+
+
+def _to_int16(data: np.ndarray) -> np.ndarray:
+    """Отсчёты WAV любой разрядности — в int16."""
+    if data.dtype == np.int16:
+        return data
+    if data.dtype == np.uint8:
+        return ((data.astype(np.int16) - 128) << 8).astype(np.int16)
+    if data.dtype == np.int32:
+        return (data >> 16).astype(np.int16)
+    if data.dtype.kind == "f":
+        return np.clip(np.rint(data * 32767), -32768, 32767).astype(np.int16)
+    raise ValueError(f"Неподдерживаемый формат отсчётов WAV: {data.dtype}")
+
+
+class ReactionBank:
+    """Клипы реакций в одном буфере int16 со счётчиками воспроизведений."""
+
+    def __init__(self, path: str, sample_rate: int):
+        """
+        Читает справочник и декодирует все клипы. Клип, который не удалось
+        прочитать, пропускается (см. stats()["errors"]).
+
+        :param path: JSON-справочник реакций
+        :param sample_rate: частота устройства вывода
+        :raises OSError, ValueError: справочник не прочитан
+        """
+        started = time.perf_counter()
+        self._path = path
+        self._sample_rate = sample_rate
+        self._errors: Dict[str, str] = {}
+        base = os.path.dirname(os.path.abspath(path))
+
+        clips: List[Tuple[str, np.ndarray]] = []
+        for index, item in enumerate(read_items(path)):
+            reaction_id = _first(item, ID_KEYS)
+            file_name = _first(item, FILE_KEYS)
+            if reaction_id is None or file_name is None:
+                self._errors[str(reaction_id or f"#{index}")] = "нет id или файла"
+                continue
+            try:
+                clips.append((str(reaction_id), decode_clip(os.path.join(base, file_name), sample_rate)))
+            except Exception as e:
+                self._errors[str(reaction_id)] = str(e)
+                log.warning(f"Реакция {reaction_id}: {file_name} не декодирован: {e}")
+
+        # Один буфер на все клипы: реакция — его срез
+        self._pcm = np.empty(sum(len(pcm) for _, pcm in clips), dtype=np.int16)
+        self._clips: Dict[str, Tuple[int, int]] = {}
+        offset = 0
+        for reaction_id, pcm in clips:
+            self._pcm[offset:offset + len(pcm)] = pcm
+            self._clips[reaction_id] = (offset, len(pcm))
+            offset += len(pcm)
+        self._pcm.setflags(write=False)
+
+        self._load_seconds = time.perf_counter() - started
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {MODE_MIX: 0, MODE_QUEUE: 0, "dispatch_seconds": 0.0}
+        log.info(
+            f"Реакции {path}: {len(self._clips)} звуков, {self._pcm.nbytes / 1024:.0f} КБ, "
+            f"{sample_rate} Гц, за {self._load_seconds:.2f} с"
+        )
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    def __len__(self) -> int:
+        return len(self._clips)
+
+    def get(self, reaction_id: str) -> Optional[np.ndarray]:
+        """PCM реакции (вид на общий буфер, только чтение) или None."""
+        entry = self._clips.get(reaction_id)
+        if entry is None:
+            return None
+        offset, length = entry
+        return self._pcm[offset:offset + length]
+
+    def observe(self, mode: str, seconds: float) -> None:
+        """Учитывает запуск реакции и время от запроса до передачи звука."""
+        with self._lock:
+            self._counters[mode] += 1
+            self._counters["dispatch_seconds"] += seconds
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            counters = dict(self._counters)
+        plays = counters[MODE_MIX] + counters[MODE_QUEUE]
+        return {
+            "path": self._path,
+            "reactions": sorted(self._clips),
+            "sample_rate": self._sample_rate,
+            "bytes": self._pcm.nbytes,
+            "load_seconds": round(self._load_seconds, 3),
+            "errors": self._errors,
+            "mixed": counters[MODE_MIX],
+            "queued": counters[MODE_QUEUE],
+            "avg_dispatch_ms": round(counters["dispatch_seconds"] / plays * 1000, 3) if plays else None,
+        }
+
+
+def open_reactions(path: str, sample_rate: int) -> Optional[ReactionBank]:
+    """Загружает банк реакций; нет пути или файла — None."""
+    if not path or not os.path.exists(path):
+        return None
+    return ReactionBank(path, sample_rate)
+
+
+def _first(item: dict, keys: Tuple[str, ...]) -> Optional[str]:
+    for key in keys:
+        if item.get(key) not in (None, ""):
+            return item[key]
+    return None
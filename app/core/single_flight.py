@@ -0,0 +1,86 @@
+"""
+Склейка одинаковых одновременных запросов синтеза (single-flight).
+
+Если один и тот же текст запрошен, пока его синтез ещё идёт (например,
+тревожное оповещение разослано всему парку сов), модель запускается один
+раз: первый запрос («ведущий») отправляет задачу в пул, остальные ждут тот же
+Future. Задача отменяется, только когда от неё отказались все ожидающие.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Tuple
+
+from app.core import metrics
+
+
+class _Flight:
+    def __init__(self, future: Future):
+        self.future = future
+        self.waiters = 1
+
+
+class SingleFlight:
+    """Реестр выполняющихся задач по ключу запроса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    def acquire(self, key: Hashable, submit: Callable[[], Future]) -> Tuple[Future, bool]:
+        """
+        Возвращает Future задачи для ключа, запуская её при отсутствии.
+
+        :param key: ключ запроса (одинаковый ключ — одинаковый результат)
+        :param submit: запуск задачи, вызывается только ведущим запросом
+        :return: (Future, True для ведущего запроса)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self._coalesced += 1
+                metrics.COALESCED_REQUESTS.inc()
+                return flight.future, False
+            future = submit()
+            flight = _Flight(future)
+            self._flights[key] = flight
+            self._leaders += 1
+        future.add_done_callback(lambda _: self._forget(key, flight))
+        return future, True
+
+    def release(self, key: Hashable, future: Future) -> bool:
+        """
+        Сообщает, что ожидающий запрос отказался от результата (таймаут).
+
+        :return: True, если ожидающих не осталось и задачу можно отменить
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None or flight.future is not future:
+                return True
+            flight.waiters -= 1
+            if flight.waiters > 0:
+                return False
+            del self._flights[key]
+            return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Выполняется ли сейчас задача для ключа."""
+        with self._lock:
+            return key in self._flights
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "leaders": self._leaders,
+                "coalesced": self._coalesced,
+                "in_flight_keys": len(self._flights),
+            }
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
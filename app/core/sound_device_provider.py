@@ -13,14 +13,18 @@ import pygame._sdl2.audio as sdl2_audio
 from pygame import mixer
 from scipy.io import wavfile
 
-from app.config.config import TTS_SOUND_DEVICE_NAME
+from app.config.config import TTS_SINK_SAMPLE_RATE, TTS_SOUND_DEVICE_NAME
+from app.utils.audio_utils import float_to_pcm16
 
 
 # Глобальные переменные
 mutex = threading.Lock()
+_mixer_lock = threading.Lock()
+_mixer_ready = False
 
 # Настройка параметров ПЕРЕД инициализацией
-FREQUENCY = 48000
+# (частота устройства; звук с другой частотой пересчитывается перед выводом)
+FREQUENCY = TTS_SINK_SAMPLE_RATE or 48000
 SIZE = -16  # 16-битный звук
 CHANNELS = 2  # Стерео (PCM2902 — стерео-кодек)
 BUFFER = 2048  # Размер буфера (увеличен для стабильности на Jetson)
@@ -61,8 +65,26 @@ def _initialize_mixer():
         print("✅ Mixer инициализирован с дефолтным устройством.")
 
 
-# Инициализация при импорте
-_initialize_mixer()
+def init_mixer():
+    """
+    Инициализирует mixer один раз (потокобезопасно).
+    Вызывается явно при запуске сервиса или лениво перед первым звуком —
+    импорт модуля аудиоустройство не трогает.
+    """
+    global _mixer_ready
+    with _mixer_lock:
+        if _mixer_ready:
+            return
+        _initialize_mixer()
+        _mixer_ready = True
+
+
+def mixer_frequency():
+    """Частота, на которой открыт mixer (None, пока он не инициализирован)."""
+    if not _mixer_ready:
+        return None
+    spec = mixer.get_init()
+    return spec[0] if spec else None
 
 
 def play_sound(audio, samplerate):
@@ -73,13 +95,66 @@ def play_sound(audio, samplerate):
     :param samplerate: Частота дискретизации
     """
     try:
+        play_pcm(float_to_pcm16(audio), samplerate)
+    except Exception as e:
+        print(f"❌ Ошибка в play_sound: {e}")
+
+
+def play_pcm(pcm, samplerate):
+    """
+    Воспроизводит готовый int16 PCM (блокирует до окончания звучания).
+
+    :param pcm: Аудиоданные (np.ndarray int16)
+    :param samplerate: Частота дискретизации
+    """
+    try:
+        init_mixer()
         buffer = io.BytesIO()
-        wav_data = (audio * 32767).numpy().astype(np.int16)
-        wavfile.write(buffer, rate=FREQUENCY, data=wav_data)
+        wavfile.write(buffer, rate=samplerate, data=pcm)
         buffer.seek(0)
         play_sound_mixer(buffer)
     except Exception as e:
-        print(f"❌ Ошибка в play_sound: {e}")
+        print(f"❌ Ошибка в play_pcm: {e}")
+
+
+def play_pcm_interruptible(pcm, samplerate, interrupt):
+    """
+    Воспроизводит int16 PCM и ждёт окончания звучания либо события прерывания.
+
+    Длительность известна заранее, поэтому устройство не опрашивается:
+    поток спит на событии до конца звука.
+
+    :param pcm: Аудиоданные (np.ndarray int16)
+    :param samplerate: Частота дискретизации
+    :param interrupt: threading.Event, установка которого прерывает звук
+    :return: True, если звук доигран до конца
+    """
+    init_mixer()
+    buffer = io.BytesIO()
+    wavfile.write(buffer, rate=samplerate, data=pcm)
+    buffer.seek(0)
+    with mutex:
+        sound = mixer.Sound(buffer)
+        channel = sound.play()
+        interrupted = interrupt.wait(sound.get_length())
+        if interrupted and channel is not None:
+            channel.stop()
+    return not interrupted
+
+
+def mix_pcm(pcm):
+    """
+    Запускает int16 PCM (моно, на частоте mixer) на свободном канале и сразу
+    возвращается: mixer сам смешивает его с тем, что уже звучит.
+
+    :param pcm: Аудиоданные (np.ndarray int16)
+    :return: False, если свободных каналов нет
+    """
+    init_mixer()
+    channels = mixer.get_init()[2]
+    data = np.repeat(np.asarray(pcm, dtype=np.int16), channels) if channels > 1 else pcm
+    sound = mixer.Sound(buffer=np.ascontiguousarray(data, dtype=np.int16).tobytes())
+    return sound.play() is not None
 
 
 def play_sound_mixer(audio_bytes):
@@ -89,6 +164,7 @@ def play_sound_mixer(audio_bytes):
     :param audio_bytes: Байтовый поток .wav
     """
     thread_name = threading.current_thread().name
+    init_mixer()
     mutex.acquire()
     try:
         mixer.music.load(audio_bytes)
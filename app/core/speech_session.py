@@ -0,0 +1,184 @@
+"""
+Потоковая сессия синтеза: текст приходит по частям (например, токены LLM),
+аудио уходит по предложениям.
+
+Каждое законченное предложение (см. SentenceStream) сразу отправляется на
+синтез — одновременно не больше, чем может взять исполнитель, — а готовое
+аудио уходит клиенту строго по порядку предложений. Поэтому речь начинается,
+пока реплика ещё генерируется.
+
+Управляющие сообщения клиента (JSON):
+- {"type": "text", "text": "..."} — очередной фрагмент текста;
+- {"type": "flush"}  — синтезировать накопленный хвост, не дожидаясь конца
+                       предложения;
+- {"type": "cancel"} — отбросить накопленный текст и всё ещё не отправленное
+                       аудио (перебивание);
+- {"type": "end"}    — как flush, затем завершить сессию после отправки.
+
+Ответы сервера: JSON {"type": "sentence", ...} и следом бинарный кадр аудио
+на каждое предложение, {"type": "flushed"}, {"type": "cancelled"},
+{"type": "error", ...}.
+"""
+
+import asyncio
+import json
+from typing import Awaitable, Callable, Optional, Set
+
+import numpy as np
+
+from app.core.logger import get_logger
+from app.utils.text_splitter import SentenceStream
+
+
+log = get_logger(__name__)
+
+MESSAGE_TEXT = "text"
+MESSAGE_FLUSH = "flush"
+MESSAGE_CANCEL = "cancel"
+MESSAGE_END = "end"
+
+# Синтез предложения: (текст, таймаут) -> int16 PCM
+Synthesize = Callable[[str, Optional[float]], Awaitable[np.ndarray]]
+SendJson = Callable[[dict], Awaitable[None]]
+SendBytes = Callable[[bytes], Awaitable[None]]
+
+
+class SpeechSession:
+    """Одна потоковая сессия: разбиение текста, синтез и отправка по порядку."""
+
+    def __init__(
+        self,
+        synthesize: Synthesize,
+        send_json: SendJson,
+        send_bytes: SendBytes,
+        encode: Callable[[np.ndarray], bytes],
+        concurrency: int = 1,
+        timeout: Optional[float] = None,
+        max_chars: Optional[int] = None,
+    ):
+        """
+        :param synthesize: синтез одного предложения
+        :param send_json: отправка управляющего сообщения клиенту
+        :param send_bytes: отправка кадра аудио клиенту
+        :param encode: кодек кадра: int16 PCM -> байты
+        :param concurrency: сколько предложений синтезировать одновременно
+        :param timeout: таймаут синтеза одного предложения, с
+        :param max_chars: предел хвоста без знаков конца предложения
+        """
+        self._synthesize = synthesize
+        self._send_json = send_json
+        self._send_bytes = send_bytes
+        self._encode = encode
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._timeout = timeout
+        self._splitter = SentenceStream(max_chars)
+        # Очередь отправки: (поколение, тип, номер, текст, задача синтеза);
+        # None — конец сессии
+        self._outbox: asyncio.Queue = asyncio.Queue()
+        # Поколение растёт при cancel: элементы старых поколений отбрасываются
+        self._generation = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self._sentences = 0
+        self._finished = False
+
+    @property
+    def finished(self) -> bool:
+        """Клиент завершил сессию сообщением end."""
+        return self._finished
+
+    async def handle(self, message: str) -> None:
+        """
+        Обрабатывает сообщение клиента.
+
+        :param message: JSON-сообщение (см. описание модуля)
+        """
+        try:
+            data = json.loads(message)
+            kind = data.get("type") if isinstance(data, dict) else None
+        except ValueError:
+            kind, data = None, None
+        if kind == MESSAGE_TEXT and isinstance(data.get("text"), str):
+            self.feed(data["text"])
+        elif kind == MESSAGE_FLUSH:
+            self.flush()
+        elif kind == MESSAGE_CANCEL:
+            self.cancel()
+        elif kind == MESSAGE_END:
+            self.end()
+        else:
+            await self._send_json({"type": "error", "detail": f"Неизвестное сообщение: {message[:100]}"})
+
+    def feed(self, fragment: str) -> None:
+        """Добавляет фрагмент текста; законченные предложения идут в синтез."""
+        for sentence in self._splitter.feed(fragment):
+            self._submit(sentence)
+
+    def flush(self) -> None:
+        """Отправляет в синтез накопленный хвост."""
+        for sentence in self._splitter.flush():
+            self._submit(sentence)
+        self._outbox.put_nowait((self._generation, MESSAGE_FLUSH, None, None, None))
+
+    def cancel(self) -> None:
+        """Отбрасывает накопленный текст, идущий синтез и неотправленное аудио."""
+        self._generation += 1
+        self._splitter.clear()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+        self._outbox.put_nowait((self._generation, MESSAGE_CANCEL, None, None, None))
+
+    def end(self) -> None:
+        """Досинтезирует хвост и завершает сессию после отправки всего аудио."""
+        self.flush()
+        self._finished = True
+        self._outbox.put_nowait(None)
+
+    def close(self) -> None:
+        """Прерывает синтез (клиент отключился)."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+
+    async def run(self) -> None:
+        """Отправляет результаты по порядку, пока сессия не завершена (end)."""
+        while True:
+            item = await self._outbox.get()
+            if item is None:
+                return
+            generation, kind, index, text, task = item
+            if generation != self._generation:
+                continue  # отменено
+            if kind == MESSAGE_TEXT:
+                await self._send_sentence(generation, index, text, task)
+            elif kind == MESSAGE_FLUSH:
+                await self._send_json({"type": "flushed"})
+            elif kind == MESSAGE_CANCEL:
+                await self._send_json({"type": "cancelled"})
+
+    def _submit(self, sentence: str) -> None:
+        index = self._sentences
+        self._sentences += 1
+        task = asyncio.ensure_future(self._synthesize_bounded(sentence))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self._outbox.put_nowait((self._generation, MESSAGE_TEXT, index, sentence, task))
+
+    async def _synthesize_bounded(self, sentence: str) -> np.ndarray:
+        async with self._slots:
+            return await self._synthesize(sentence, self._timeout)
+
+    async def _send_sentence(self, generation: int, index: int, text: str, task: asyncio.Task) -> None:
+        # wait, а не await task: отмена задачи (cancel) не должна
+        # прерывать саму отправку
+        await asyncio.wait([task])
+        if generation != self._generation or task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            log.warning(f"Ошибка синтеза предложения {index}: {error}")
+            await self._send_json({"type": "error", "id": index, "text": text, "detail": str(error)})
+            return
+        pcm = task.result()
+        await self._send_json({"type": "sentence", "id": index, "text": text, "samples": len(pcm)})
+        await self._send_bytes(self._encode(pcm))
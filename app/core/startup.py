@@ -0,0 +1,83 @@
+"""
+Состояние поэтапного запуска сервиса.
+
+Порт открывается сразу, а модель и аудиоустройство загружаются в фоне.
+Готовность (`/ready`) отделена от живости (`/health`): пока загрузка и
+прогрев не закончены, `/ready` отвечает 503. Время импорта и время до
+готовности замеряются и отдаются в ответе `/ready`.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from app.core.logger import get_logger
+
+
+log = get_logger(__name__)
+
+STAGE_STARTING = "starting"
+STAGE_LOADING = "loading"  # модель и аудиоустройство
+STAGE_WARMUP = "warmup"
+STAGE_READY = "ready"
+STAGE_FAILED = "failed"
+
+
+class StartupState:
+    """Этапы запуска с замером длительности каждого."""
+
+    def __init__(self, started: Optional[float] = None):
+        """
+        :param started: момент начала запуска по time.perf_counter()
+                        (по умолчанию — создание объекта)
+        """
+        self._lock = threading.Lock()
+        self._created = time.perf_counter() if started is None else started
+        self._stage = STAGE_STARTING
+        self._stage_started = self._created
+        self._durations: Dict[str, float] = {}
+        self._import_time: Optional[float] = None
+        self._time_to_ready: Optional[float] = None
+        self._error: Optional[str] = None
+
+    @property
+    def is_ready(self) -> bool:
+        with self._lock:
+            return self._stage == STAGE_READY
+
+    def mark_imported(self, seconds: float) -> None:
+        """Запоминает время импорта HTTP-модуля."""
+        with self._lock:
+            self._import_time = seconds
+        log.info(f"Импорт приложения: {seconds:.3f} с")
+
+    def stage(self, name: str) -> None:
+        """Переходит к следующему этапу, закрывая замер текущего."""
+        with self._lock:
+            now = time.perf_counter()
+            self._durations[self._stage] = now - self._stage_started
+            self._stage = name
+            self._stage_started = now
+            if name == STAGE_READY:
+                self._time_to_ready = now - self._created
+        if name == STAGE_READY:
+            log.info(f"Сервис готов за {self._time_to_ready:.3f} с, этапы: {self._durations}")
+        else:
+            log.info(f"Этап запуска: {name}")
+
+    def fail(self, error: str) -> None:
+        with self._lock:
+            self._error = error
+        self.stage(STAGE_FAILED)
+        log.error(f"Запуск не удался: {error}")
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self._stage == STAGE_READY,
+                "stage": self._stage,
+                "error": self._error,
+                "import_time_sec": self._import_time,
+                "time_to_ready_sec": self._time_to_ready,
+                "stages_sec": dict(self._durations),
+            }
@@ -1,12 +1,30 @@
+import inspect
+import itertools
 import os
+import queue
 import sys
-from functools import lru_cache
+import threading
+import time
+from typing import List, Optional
 
+import numpy as np
 import torch
-from omegaconf import OmegaConf
 
-from app.config.config import TTS_USE_TORCH_MODEL_MANAGER_BOOL
-from app.core.sound_device_provider import play_sound
+from app.config.config import (
+    TTS_USE_TORCH_MODEL_MANAGER_BOOL,
+    TTS_CACHE_DIR,
+    TTS_CACHE_MEMORY_MB,
+    TTS_CACHE_DISK_MB,
+    TTS_CACHE_TTL_SEC,
+    TTS_MODEL_BACKEND,
+    TTS_SAMPLE_RATE,
+)
+from app.core import metrics
+from app.core.audio_cache import AudioCache, make_cache_key
+from app.core.model_backends import BACKEND_INT8, apply_backend, inner_modules
+from app.core.audio_sinks import AudioSink, create_sink
+from app.utils.audio_utils import float_to_pcm16
+from app.utils.text_splitter import split_text
 from app.utils.utils import Utils
 
 # Абсолютные импорты
@@ -20,6 +38,15 @@ SPEAKER_KSENIYA = "kseniya"
 SPEAKER_XENIA = "xenia"
 SPEAKER_RANDOM = "random"
 
+# --- Частоты дискретизации, которые модель Silero выдаёт напрямую ---
+SAMPLE_RATES = (8000, 24000, 48000)
+
+# --- Уровни качества: частота ответа по имени ---
+QUALITY_TELEPHONY = "telephony"
+QUALITY_STANDARD = "standard"
+QUALITY_HIGH = "high"
+QUALITY_TIERS = {QUALITY_TELEPHONY: 8000, QUALITY_STANDARD: 24000, QUALITY_HIGH: 48000}
+
 # --- Константы: устройства ---
 DEVICE_CPU = "cpu"
 DEVICE_CUDA = "cuda"
@@ -31,6 +58,88 @@ log = Utils.create_logger(__name__)
 CURRENT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
 LOCAL_MODEL_PATH = os.path.join(CURRENT_DIRECTORY, "..", "models", "silero_model_ru.pt")
 
+# Версия модели из torch.hub (входит в ключ кэша аудио)
+HUB_MODEL_VERSION = "silero_tts:v4_ru"
+
+
+def _local_model_version(path: str) -> str:
+    """Версия локальной модели: имя, размер и время изменения файла."""
+    st = os.stat(path)
+    return f"{os.path.basename(path)}:{st.st_size}:{int(st.st_mtime)}"
+
+
+def load_model(device: torch.device, backend: str = TTS_MODEL_BACKEND):
+    """
+    Загружает модель Silero (локально или через torch.hub) и применяет бэкенд.
+
+    :return: (модель, версия модели для ключа кэша)
+    """
+    if backend == BACKEND_INT8 and device.type != DEVICE_CPU:
+        raise ValueError("Бэкенд int8 поддерживается только на CPU")
+
+    if TTS_USE_TORCH_MODEL_MANAGER_BOOL:
+        try:
+            # Список моделей (models.yml) hubconf Silero скачивает сам
+            model, _ = torch.hub.load(
+                repo_or_dir="snakers4/silero-models",
+                model="silero_tts",
+                language="ru",
+                speaker="v4_ru",
+            )
+            version = HUB_MODEL_VERSION
+        except Exception as e:
+            log.error(f"Failed to load model via torch.hub: {e}")
+            raise
+    else:
+        if not os.path.exists(LOCAL_MODEL_PATH):
+            raise FileNotFoundError(f"Локальная модель не найдена: {LOCAL_MODEL_PATH}")
+        log.info(f"Загружаем модель локально: {LOCAL_MODEL_PATH}")
+        model = torch.package.PackageImporter(LOCAL_MODEL_PATH).load_pickle("tts_models", "model")
+        version = _local_model_version(LOCAL_MODEL_PATH)
+
+    version = apply_backend(model, backend, version)
+    model.to(device)
+    return model, version
+
+
+def resolve_sample_rate(
+    sample_rate: Optional[int] = None, quality: Optional[str] = None, default: int = TTS_SAMPLE_RATE
+) -> int:
+    """
+    Частота ответа по параметрам запроса: явная sample_rate важнее quality.
+
+    :param sample_rate: частота, Гц (от 8000 до 48000, не обязательно частота Silero)
+    :param quality: уровень качества из QUALITY_TIERS
+    :param default: частота, если не задано ни то, ни другое
+    :return: частота ответа, Гц
+    :raises ValueError: частота вне диапазона или неизвестный уровень
+    """
+    if sample_rate is not None:
+        if not SAMPLE_RATES[0] <= sample_rate <= SAMPLE_RATES[-1]:
+            raise ValueError(
+                f"Неподдерживаемая частота дискретизации: {sample_rate} "
+                f"(от {SAMPLE_RATES[0]} до {SAMPLE_RATES[-1]})"
+            )
+        return int(sample_rate)
+    if quality is not None:
+        try:
+            return QUALITY_TIERS[quality.lower()]
+        except KeyError:
+            raise ValueError(f"Неизвестный уровень качества: {quality} (доступны: {', '.join(QUALITY_TIERS)})")
+    return default
+
+
+def synthesis_rate(samplerate: int) -> int:
+    """
+    Частота, на которой синтезировать звук для частоты samplerate: наименьшая
+    частота Silero не ниже неё — синтез дешевле, а понижение частоты не теряет
+    качества.
+    """
+    for rate in SAMPLE_RATES:
+        if rate >= samplerate:
+            return rate
+    return SAMPLE_RATES[-1]
+
 
 class TTS:
     is_busy = False
@@ -40,60 +149,257 @@ class TTS:
         speaker: str = SPEAKER_KSENIYA,
         device: str = DEVICE_CPU,
         samplerate: int = 48000,
+        backend: str = TTS_MODEL_BACKEND,
     ):
         self._speaker = speaker
         self._samplerate = samplerate
         self._device = torch.device(device)
 
-        if TTS_USE_TORCH_MODEL_MANAGER_BOOL:
-            try:
-                torch.hub.download_url_to_file(
-                    "https://raw.githubusercontent.com/snakers4/silero-models/master/models.yml",
-                    "latest_silero_models.yml",
-                    progress=False,
-                )
-                models = OmegaConf.load("latest_silero_models.yml")
-                model, _ = torch.hub.load(
-                    repo_or_dir="snakers4/silero-models",
-                    model="silero_tts",
-                    language="ru",
-                    speaker="v4_ru",
-                )
-            except Exception as e:
-                log.error(f"Failed to load model via torch.hub: {e}")
-                raise
-        else:
-            if not os.path.exists(LOCAL_MODEL_PATH):
-                raise FileNotFoundError(f"Локальная модель не найдена: {LOCAL_MODEL_PATH}")
-            log.info(f"Загружаем модель локально: {LOCAL_MODEL_PATH}")
-            model = torch.package.PackageImporter(LOCAL_MODEL_PATH).load_pickle("tts_models", "model")
-        model.to(self._device)
+        model, self._model_version = load_model(self._device, backend)
         self._model = model
+        # Пакетный вызов apply_tts(texts=[...]) есть не во всех версиях Silero
+        self._supports_batch = "texts" in inspect.signature(model.apply_tts).parameters
+
+        self._cache = AudioCache(
+            memory_limit_bytes=TTS_CACHE_MEMORY_MB * 1024 * 1024,
+            ttl_seconds=TTS_CACHE_TTL_SEC,
+            disk_dir=TTS_CACHE_DIR,
+            disk_limit_bytes=TTS_CACHE_DISK_MB * 1024 * 1024,
+        )
+        metrics.MODEL_MEMORY_BYTES.set(self.model_memory_bytes())
+        self._sink: Optional[AudioSink] = None
+
+    @property
+    def samplerate(self) -> int:
+        return self._samplerate
 
-    def text_to_speech(self, text_in: str) -> None:
+    @property
+    def model_version(self) -> str:
+        return self._model_version
+
+    @property
+    def speaker(self) -> str:
+        return self._speaker
+
+    def voice(self, speaker: Optional[str] = None, sample_rate: Optional[int] = None):
+        """
+        Проверяет параметры голоса, подставляя значения по умолчанию.
+
+        :return: (голос, частота дискретизации)
+        :raises ValueError: если голос или частота не поддерживаются
+        """
+        speaker = speaker or self._speaker
+        sample_rate = sample_rate or self._samplerate
+        speakers = getattr(self._model, "speakers", None)
+        if speakers and speaker not in speakers:
+            raise ValueError(f"Неизвестный голос: {speaker}")
+        if sample_rate not in SAMPLE_RATES:
+            raise ValueError(f"Неподдерживаемая частота дискретизации: {sample_rate}")
+        return speaker, sample_rate
+
+    def text_to_speech(self, text_in: str, stream: bool = False) -> None:
         """Преобразует текст в речь и воспроизводит звук."""
-        audio = self._generate_audio(text_in)
-        play_sound(audio, self._samplerate)
+        if stream:
+            self.text_to_speech_stream(text_in)
+            return
+        self._play(self.synthesize(text_in))
+
+    def text_to_speech_stream(self, text_in: str) -> dict:
+        """
+        Конвейерная озвучка по предложениям: предложение N воспроизводится,
+        пока синтезируется N+1.
+
+        :return: {"time_to_first_audio": с, "total_latency": с}
+        """
+        started = time.perf_counter()
+        segments: "queue.Queue" = queue.Queue(maxsize=2)
+        errors = []
+
+        def produce():
+            try:
+                with metrics.NORMALIZATION_SECONDS.time():
+                    sentences = split_text(text_in)
+                for sentence in sentences:
+                    segments.put(self.synthesize(sentence))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                segments.put(None)
+
+        producer = threading.Thread(target=produce, name="tts-stream-producer", daemon=True)
+        producer.start()
+
+        first_audio = None
+        while True:
+            pcm = segments.get()
+            if pcm is None:
+                break
+            if first_audio is None:
+                first_audio = time.perf_counter() - started
+            self._play(pcm)
+        producer.join()
+
+        timings = {"time_to_first_audio": first_audio, "total_latency": time.perf_counter() - started}
+        log.info(f"Потоковая озвучка: {timings}")
+        if errors:
+            raise errors[0]
+        return timings
+
+    def synthesize(
+        self, text_in: str, speaker: Optional[str] = None, sample_rate: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Синтезирует текст в int16 PCM без воспроизведения.
+        Возвращает аудио из кэша, синтезируя его при промахе.
+
+        :param speaker: голос (по умолчанию — голос экземпляра)
+        :param sample_rate: частота дискретизации (по умолчанию — частота экземпляра)
+        """
+        speaker, sample_rate = self.voice(speaker, sample_rate)
+        key = make_cache_key(text_in, speaker, sample_rate, self._model_version)
+        pcm = self._cache.get(key)
+        metrics.observe_cache(pcm is not None, self._cache.stats()["hit_ratio"])
+        if pcm is None:
+            started = time.perf_counter()
+            audio = self._apply_tts(text_in, speaker, sample_rate)
+            self._observe_inference([text_in], [audio], time.perf_counter() - started, sample_rate)
+            pcm = self._encode(audio)
+            self._cache.put(key, pcm)
+        return pcm
+
+    def synthesize_batch(
+        self,
+        texts: List[str],
+        use_cache: bool = True,
+        speaker: Optional[str] = None,
+        sample_rate: Optional[int] = None,
+    ) -> List[np.ndarray]:
+        """
+        Синтезирует пачку текстов одним голосом в int16 PCM (порядок
+        результатов совпадает с порядком текстов). Промахи кэша идут в модель
+        одним вызовом, если модель это поддерживает, иначе — последовательно
+        в одном вызове пула.
+        """
+        speaker, sample_rate = self.voice(speaker, sample_rate)
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        keys = [make_cache_key(t, speaker, sample_rate, self._model_version) for t in texts]
+        missing = []
+        for i, key in enumerate(keys):
+            pcm = self._cache.get(key) if use_cache else None
+            if use_cache:
+                metrics.observe_cache(pcm is not None, self._cache.stats()["hit_ratio"])
+            if pcm is None:
+                missing.append(i)
+            else:
+                results[i] = pcm
+
+        if missing:
+            batch = [texts[i] for i in missing]
+            started = time.perf_counter()
+            audios = self._apply_tts_batch(batch, speaker, sample_rate)
+            self._observe_inference(batch, audios, time.perf_counter() - started, sample_rate)
+            for i, audio in zip(missing, audios):
+                pcm = self._encode(audio)
+                if use_cache:
+                    self._cache.put(keys[i], pcm)
+                results[i] = pcm
+        return results
+
+    def warmup(self, text_in: str) -> float:
+        """
+        Прогревочный синтез мимо кэша: первый проход модели заметно дольше
+        последующих (инициализация ядер и буферов), платить за него должен
+        запуск сервиса, а не первый запрос.
+
+        :return: длительность прогрева, с
+        """
+        elapsed = self.infer(text_in)
+        log.info(f"Прогрев модели: {elapsed:.3f} с")
+        return elapsed
+
+    def infer(self, text_in: str) -> float:
+        """
+        Синтез мимо кэша без воспроизведения (прогрев, замеры autotune).
+
+        :return: длительность вызова модели, с
+        """
+        started = time.perf_counter()
+        with torch.inference_mode():
+            self._apply_tts(text_in, self._speaker, self._samplerate)
+        return time.perf_counter() - started
+
+    def share_memory(self) -> None:
+        """
+        Переносит веса модели в разделяемую память torch, чтобы процессы,
+        созданные через fork, использовали их без копирования.
+        """
+        for _, module in inner_modules(self._model):
+            module.share_memory()
+
+    def cache_stats(self) -> dict:
+        """Счётчики кэша аудио."""
+        return self._cache.stats()
+
+    def model_memory_bytes(self) -> int:
+        """Объём весов и буферов модели, байт."""
+        total = 0
+        for _, module in inner_modules(self._model):
+            for tensor in itertools.chain(module.parameters(), module.buffers()):
+                total += tensor.numel() * tensor.element_size()
+        return total
+
+    @staticmethod
+    def _observe_inference(texts: List[str], audios: list, seconds: float, sample_rate: int) -> None:
+        samples = sum(len(audio) for audio in audios)
+        metrics.observe_inference(sum(len(t) for t in texts), seconds, samples / sample_rate)
+
+    @staticmethod
+    def _encode(audio) -> np.ndarray:
+        with metrics.ENCODING_SECONDS.labels(format="pcm16").time():
+            return float_to_pcm16(audio)
+
+    def _play(self, pcm: np.ndarray) -> None:
+        """Воспроизводит PCM через приёмник аудио (создаётся при первом звуке)."""
+        if self._sink is None:
+            self._sink = create_sink()
+            self._sink.open(self._samplerate)
+        self._sink.play(pcm, self._samplerate, threading.Event())
+
+    def _apply_tts_batch(self, texts: List[str], speaker: str, sample_rate: int) -> list:
+        with torch.inference_mode():
+            plain = [t for t in texts if "<speak>" not in t]
+            if self._supports_batch and len(plain) > 1:
+                batch = iter(self._model.apply_tts(
+                    texts=plain,
+                    speaker=speaker,
+                    sample_rate=sample_rate,
+                ))
+                return [
+                    self._apply_tts(t, speaker, sample_rate) if "<speak>" in t else next(batch)
+                    for t in texts
+                ]
+            return [self._apply_tts(t, speaker, sample_rate) for t in texts]
 
-    @lru_cache(maxsize=None)
-    def _generate_audio(self, text_in: str):
+    def _apply_tts(self, text_in: str, speaker: str, sample_rate: int):
         if "<speak>" in text_in:
             generated_audio =  self._model.apply_tts(
                 ssml_text=text_in,
-                speaker=self._speaker,
-                sample_rate=self._samplerate,
+                speaker=speaker,
+                sample_rate=sample_rate,
             )
         else:
             generated_audio = self._model.apply_tts(
                 text=text_in,
-                speaker=self._speaker,
-                sample_rate=self._samplerate,
+                speaker=speaker,
+                sample_rate=sample_rate,
             )
         return generated_audio
 
     def close(self) -> None:
-        """Закрывает ресурсы (заглушка)."""
-        pass
+        """Закрывает ресурсы."""
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+"""
+План потоков инференса: сколько рабочих, сколько потоков torch на каждого и
+к каким ядрам их привязать.
+
+План подбирает `cyber-owl-tts autotune` (см. utils/autotune) под конкретную
+машину и сохраняет в JSON; при запуске сервиса исполнитель синтеза читает его
+и применяет. План, снятый на машине с другим набором ядер, игнорируется.
+
+Без плана torch берёт по потоку на каждое ядро в каждом процессе, и вместе с
+потоками uvicorn ядра оказываются переподписаны.
+"""
+
+import glob
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from app.config.config import TTS_THREAD_PLAN
+from app.core.logger import get_logger
+
+
+log = get_logger(__name__)
+
+# Цели подбора
+TARGET_THROUGHPUT = "throughput"
+TARGET_LATENCY = "latency"
+
+
+def available_cpus() -> List[int]:
+    """Логические CPU, на которых процессу разрешено работать."""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # не Linux
+        return list(range(os.cpu_count() or 1))
+
+
+def physical_cores() -> List[List[int]]:
+    """
+    Физические ядра среди доступных CPU: у каждого ядра — список его
+    логических CPU (SMT-соседей). Без sysfs каждый CPU считается ядром.
+    """
+    cores: Dict[tuple, List[int]] = {}
+    for cpu in available_cpus():
+        topology = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        try:
+            with open(os.path.join(topology, "physical_package_id")) as f:
+                package = int(f.read())
+            with open(os.path.join(topology, "core_id")) as f:
+                core = int(f.read())
+        except (OSError, ValueError):
+            package, core = 0, cpu
+        cores.setdefault((package, core), []).append(cpu)
+    return [sorted(cpus) for _, cpus in sorted(cores.items(), key=lambda item: min(item[1]))]
+
+
+def cpu_sets(workers: int, threads: int, cores: Optional[List[List[int]]] = None) -> List[List[int]]:
+    """
+    Раскладывает рабочих по физическим ядрам: каждому — `threads` своих ядер,
+    по одному логическому CPU с ядра (SMT-соседи не делят один рабочий).
+
+    :return: набор CPU для каждого рабочего
+    """
+    cores = physical_cores() if cores is None else cores
+    if workers * threads > len(cores):
+        raise ValueError(f"{workers} × {threads} потоков не помещаются в {len(cores)} ядер")
+    return [[core[0] for core in cores[i * threads:(i + 1) * threads]] for i in range(workers)]
+
+
+def _host() -> dict:
+    return {
+        "hostname": os.uname().nodename if hasattr(os, "uname") else None,
+        "cpus": available_cpus(),
+        "physical_cores": len(physical_cores()),
+    }
+
+
+class ThreadPlan:
+    """Конфигурация потоков инференса."""
+
+    def __init__(
+        self,
+        mode: str,
+        workers: int,
+        threads: int,
+        interop_threads: int = 1,
+        cpus: Optional[List[List[int]]] = None,
+        target: str = TARGET_THROUGHPUT,
+        host: Optional[dict] = None,
+        measured: Optional[dict] = None,
+        created: Optional[float] = None,
+    ):
+        self.mode = mode
+        self.workers = workers
+        self.threads = threads
+        self.interop_threads = interop_threads
+        self.cpus = cpus  # None — без привязки к ядрам
+        self.target = target
+        self.host = host or _host()
+        self.measured = measured or {}
+        self.created = created or time.time()
+
+    @property
+    def pinned(self) -> bool:
+        return bool(self.cpus)
+
+    def describe(self) -> str:
+        pin = " с привязкой к ядрам" if self.pinned else ""
+        return f"mode={self.mode}, {self.workers} × {self.threads} потоков torch{pin}"
+
+    def to_dict(self) -> dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "threads": self.threads,
+            "interop_threads": self.interop_threads,
+            "cpus": self.cpus,
+            "target": self.target,
+            "host": self.host,
+            "measured": self.measured,
+            "created": self.created,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ThreadPlan":
+        return cls(
+            mode=data["mode"],
+            workers=int(data["workers"]),
+            threads=int(data["threads"]),
+            interop_threads=int(data.get("interop_threads", 1)),
+            cpus=data.get("cpus"),
+            target=data.get("target", TARGET_THROUGHPUT),
+            host=data.get("host"),
+            measured=data.get("measured"),
+            created=data.get("created"),
+        )
+
+    def save(self, path: str = TTS_THREAD_PLAN) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def matches_host(self) -> bool:
+        """План снят на машине с тем же набором доступных CPU."""
+        return self.host.get("cpus") == available_cpus()
+
+
+def load_plan(path: str = TTS_THREAD_PLAN, mode: Optional[str] = None) -> Optional[ThreadPlan]:
+    """
+    Читает сохранённый план.
+
+    :param path: путь к JSON (пустой — планы отключены)
+    :param mode: режим исполнителя; план для другого режима не применяется
+    :return: план или None, если его нет или он не подходит
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            plan = ThreadPlan.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError) as e:
+        log.warning(f"План потоков {path} не прочитан: {e}")
+        return None
+    if mode is not None and plan.mode != mode:
+        log.info(f"План потоков {path} подобран для режима {plan.mode}, сейчас {mode} — не применяется")
+        return None
+    if not plan.matches_host():
+        log.warning(f"План потоков {path} снят на другом наборе CPU — не применяется")
+        return None
+    return plan
+
+
+def apply_threads(threads: int, interop_threads: int = 0, cpus: Optional[List[int]] = None) -> None:
+    """
+    Настраивает потоки torch и привязку текущего процесса к CPU.
+
+    :param threads: потоков intra-op (0 — не менять)
+    :param interop_threads: потоков inter-op (0 — не менять)
+    :param cpus: CPU для привязки процесса (None — не привязывать)
+    """
+    import torch
+
+    if threads > 0:
+        torch.set_num_threads(threads)
+    if interop_threads > 0 and torch.get_num_interop_threads() != interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            # Можно задать только до первой параллельной работы в процессе
+            log.warning(f"Не удалось задать inter-op потоки torch: {e}")
+    if cpus:
+        try:
+            os.sched_setaffinity(0, cpus)
+        except (AttributeError, OSError) as e:
+            log.warning(f"Не удалось привязать процесс к CPU {cpus}: {e}")
+
+
+def cpu_frequency_governors() -> List[str]:
+    """Регуляторы частоты CPU (для отчёта autotune: powersave искажает замеры)."""
+    governors = set()
+    for path in glob.glob("/sys/devices/system/cpu/cpu*/cpufreq/scaling_governor"):
+        try:
+            with open(path) as f:
+                governors.add(f.read().strip())
+        except OSError:
+            pass
+    return sorted(governors)
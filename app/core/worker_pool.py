@@ -0,0 +1,399 @@
+"""
+Пул процессов синтеза с общими весами модели.
+
+Модель загружается один раз в родительском процессе, её тензоры переносятся
+в разделяемую память torch (`share_memory()`), после чего рабочие процессы
+создаются через fork и получают ту же модель без копирования: прирост RSS на
+каждый процесс — только интерпретатор и рабочие буферы инференса.
+
+Родительский процесс многопоточный (event loop, потоки пулов и звука), а fork
+копирует только вызвавший его поток: замок, захваченный в момент fork другим
+потоком, в потомке не освободится никогда. Поэтому родитель делает fork один
+раз — при запуске пула, создавая «зиготу»: однопоточный процесс с моделью,
+который сам порождает рабочие процессы и перезапускает упавшие. Родитель
+после запуска не делает fork ни при каких обстоятельствах.
+
+Запрос отправляется наименее загруженному процессу (по числу выполняемых
+запросов). Упавший процесс перезапускается; ошибкой завершается только
+запрос, который он успел взять, остальные из его очереди выполнит замена.
+
+Только для Linux (нужен fork).
+"""
+
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from multiprocessing.connection import Connection
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from app.core.logger import get_logger
+from app.core.thread_plan import apply_threads
+
+
+log = get_logger(__name__)
+
+# Как часто поток результатов проверяет сообщения зиготы о перезапусках, с
+HEALTH_CHECK_INTERVAL = 1.0
+
+# Сколько ждать, пока зигота запустит рабочие процессы, с
+ZYGOTE_START_TIMEOUT = 60.0
+
+# Сообщения зиготы родителю: (событие, номер процесса, pid, код завершения,
+# запрос, взятый упавшим процессом)
+EVENT_STARTED = "started"
+EVENT_RESTARTED = "restarted"
+
+# Процесс ещё не брал запросов
+NO_REQUEST = -1
+
+
+class WorkerCrashedError(RuntimeError):
+    """Рабочий процесс завершился, не вернув результат."""
+
+
+def _worker_main(index: int, tts, requests, results, taken, threads: int, interop_threads: int,
+                 cpus: Optional[List[int]]) -> None:
+    """
+    Цикл рабочего процесса: выполняет методы TTS по запросам родителя.
+    Номер взятого запроса пишется в общую память (taken) до выполнения и
+    после ответа не сбрасывается: ответ мог не успеть уйти из буфера очереди.
+    """
+    apply_threads(threads, interop_threads, cpus)
+    while True:
+        item = requests.get()
+        if item is None:
+            return
+        request_id, method, args = item
+        taken.value = request_id
+        try:
+            payload = method(tts, *args) if callable(method) else getattr(tts, method)(*args)
+            results.put((request_id, True, payload))
+        except Exception as e:
+            # Исключение может не сериализоваться — передаём текстом
+            results.put((request_id, False, f"{type(e).__name__}: {e}"))
+
+
+def _zygote_child(control: Connection, *args) -> None:
+    """Рабочий процесс, порождённый зиготой: канал управления зиготы ему не нужен."""
+    control.close()
+    _worker_main(*args)
+
+
+def _zygote_main(tts, queues, taken, results, control: Connection, parent_end: Connection, threads: int,
+                 interop_threads: int, cpu_sets: Optional[List[List[int]]]) -> None:
+    """
+    Цикл зиготы: порождает рабочие процессы и перезапускает упавшие.
+    Процесс однопоточный, поэтому fork в нём безопасен.
+    """
+    parent_end.close()  # иначе зигота не заметит завершения родителя
+    # Зигота запущена как daemon (не переживает родителя), но должна иметь потомков
+    multiprocessing.current_process().daemon = False
+    ctx = multiprocessing.get_context("fork")
+
+    def spawn(index: int):
+        process = ctx.Process(
+            target=_zygote_child,
+            args=(control, index, tts, queues[index], results, taken[index], threads, interop_threads,
+                  cpu_sets[index] if cpu_sets else None),
+            name=f"tts-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    processes = [spawn(index) for index in range(len(queues))]
+    for index, process in enumerate(processes):
+        control.send((EVENT_STARTED, index, process.pid, None, NO_REQUEST))
+
+    # Команда родителя (или его завершение) — остановка; иначе ждём падения процессов
+    while True:
+        ready = multiprocessing.connection.wait([control] + [process.sentinel for process in processes])
+        if control in ready:
+            break
+        for index, process in enumerate(processes):
+            if process.sentinel in ready:
+                process.join()
+                # Взятый запрос читается до запуска замены: она перепишет номер
+                lost = taken[index].value
+                taken[index].value = NO_REQUEST
+                processes[index] = spawn(index)
+                control.send((EVENT_RESTARTED, index, processes[index].pid, process.exitcode, lost))
+
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+
+class _Worker:
+    def __init__(self, index: int):
+        self.index = index
+        self.pid: Optional[int] = None
+        self.requests = None
+        self.taken = None  # номер запроса, взятого процессом (общая память)
+        self.in_flight = 0
+        self.completed = 0
+        self.restarts = 0
+
+
+class ModelWorkerPool:
+    """Пул процессов, разделяющих веса одной модели."""
+
+    def __init__(
+        self,
+        tts_factory: Callable,
+        workers: int,
+        threads_per_worker: int = 0,
+        interop_threads: int = 0,
+        cpu_sets: Optional[List[List[int]]] = None,
+    ):
+        """
+        :param tts_factory: создаёт TTS в родительском процессе
+        :param workers: число рабочих процессов
+        :param threads_per_worker: потоков torch на процесс (0 — поровну делим ядра)
+        :param interop_threads: inter-op потоков torch на процесс (0 — по умолчанию torch)
+        :param cpu_sets: CPU для привязки каждого процесса (None — без привязки)
+        """
+        self._factory = tts_factory
+        self._size = max(1, workers)
+        if threads_per_worker <= 0:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // self._size)
+        self._threads = threads_per_worker
+        self._interop_threads = interop_threads
+        if cpu_sets is not None and len(cpu_sets) != self._size:
+            raise ValueError(f"Нужно {self._size} наборов CPU, передано {len(cpu_sets)}")
+        self._cpu_sets = cpu_sets
+
+        self._ctx = multiprocessing.get_context("fork")
+        self._tts = None
+        self._results = None
+        self._zygote = None
+        self._control: Optional[Connection] = None
+        self._workers: List[_Worker] = []
+        self._pending: Dict[int, Tuple[Future, _Worker]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._reader: Optional[threading.Thread] = None
+        self._running = False
+
+    @property
+    def samplerate(self) -> int:
+        return self._tts.samplerate
+
+    @property
+    def model_version(self) -> str:
+        return self._tts.model_version
+
+    def start(self) -> None:
+        """
+        Загружает модель, переносит веса в общую память и запускает зиготу,
+        а она — рабочие процессы.
+        """
+        self._tts = self._factory()
+        self._tts.share_memory()
+        self._results = self._ctx.Queue()
+        self._workers = [_Worker(i) for i in range(self._size)]
+        # Очереди запросов живут всё время работы пула: зигота передаёт очередь
+        # упавшего процесса его замене
+        for worker in self._workers:
+            worker.requests = self._ctx.Queue()
+            worker.taken = self._ctx.Value("q", NO_REQUEST, lock=False)
+        self._control, zygote_end = self._ctx.Pipe()
+        self._zygote = self._ctx.Process(
+            target=_zygote_main,
+            args=(
+                self._tts, [w.requests for w in self._workers], [w.taken for w in self._workers],
+                self._results, zygote_end,
+                self._control, self._threads, self._interop_threads, self._cpu_sets,
+            ),
+            name="tts-zygote",
+            daemon=True,
+        )
+        self._zygote.start()
+        zygote_end.close()
+        for _ in self._workers:
+            if not self._control.poll(ZYGOTE_START_TIMEOUT):
+                raise RuntimeError("Рабочие процессы не запустились")
+            self._on_event(*self._control.recv())
+        self._running = True
+        self._reader = threading.Thread(target=self._read_results, name="tts-pool-results", daemon=True)
+        self._reader.start()
+        pin = ", с привязкой к ядрам" if self._cpu_sets else ""
+        log.info(f"Пул процессов запущен: {self._size} × {self._threads} потоков torch{pin}")
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """Останавливает рабочие процессы; незавершённые запросы получают ошибку."""
+        self._running = False
+        if self._zygote is not None:
+            # Сначала зиготе: завершившиеся процессы не должны перезапускаться
+            try:
+                self._control.send(None)
+            except OSError:
+                pass
+            for worker in self._workers:
+                worker.requests.put(None)
+            self._zygote.join(timeout=10 if wait else 0.1)
+            if self._zygote.is_alive():
+                self._zygote.terminate()
+            self._control.close()
+            self._zygote = None
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future, _ in pending:
+            if cancel_futures:
+                future.cancel()
+            if not future.done():
+                future.set_exception(RuntimeError("Пул процессов остановлен"))
+
+    def submit(self, method: Union[str, Callable], *args) -> Future:
+        """
+        Отправляет вызов метода TTS наименее загруженному процессу.
+
+        :param method: имя метода TTS (например, "synthesize") или функция
+                       уровня модуля, вызываемая как method(tts, *args)
+        :return: Future с результатом
+        """
+        future: Future = Future()
+        with self._lock:
+            if not self._running:
+                raise RuntimeError("Пул процессов не запущен")
+            worker = min(self._workers, key=lambda w: w.in_flight)
+            request_id = next(self._ids)
+            self._pending[request_id] = (future, worker)
+            worker.in_flight += 1
+            worker.requests.put((request_id, method, args))
+        return future
+
+    def broadcast(self, method: str, *args) -> List[Future]:
+        """
+        Отправляет вызов метода TTS каждому рабочему процессу (например, прогрев).
+
+        :return: по одному Future на процесс
+        """
+        futures = []
+        with self._lock:
+            if not self._running:
+                raise RuntimeError("Пул процессов не запущен")
+            for worker in self._workers:
+                future: Future = Future()
+                request_id = next(self._ids)
+                self._pending[request_id] = (future, worker)
+                worker.in_flight += 1
+                worker.requests.put((request_id, method, args))
+                futures.append(future)
+        return futures
+
+    def stats(self) -> List[dict]:
+        """Загрузка и память каждого рабочего процесса."""
+        with self._lock:
+            workers = [(w.index, w.pid, w.in_flight, w.completed, w.restarts) for w in self._workers]
+        result = []
+        for index, pid, in_flight, completed, restarts in workers:
+            item = {
+                "index": index,
+                "pid": pid,
+                "alive": pid is not None and _process_alive(pid),
+                "in_flight": in_flight,
+                "completed": completed,
+                "restarts": restarts,
+            }
+            if pid is not None:
+                item.update(_process_memory(pid))
+            result.append(item)
+        return result
+
+    # --- Внутреннее ----------------------------------------------------------
+
+    def _on_event(self, event: str, index: int, pid: int, exitcode: Optional[int], lost: int) -> None:
+        """
+        Сообщение зиготы: процесс запущен или перезапущен после падения.
+        Ошибкой завершается только запрос, который упавший процесс взял;
+        запросы, ждущие в его очереди, выполнит замена.
+        """
+        entry = None
+        with self._lock:
+            worker = self._workers[index]
+            worker.pid = pid
+            if event != EVENT_RESTARTED:
+                return
+            log.warning(f"Рабочий процесс {index} завершился (код {exitcode}), перезапущен: pid {pid}")
+            worker.restarts += 1
+            if lost != NO_REQUEST:
+                entry = self._pending.pop(lost, None)  # None — ответ уже получен
+                if entry is not None:
+                    worker.in_flight -= 1
+        if entry is not None and not entry[0].done():
+            entry[0].set_exception(WorkerCrashedError(f"Рабочий процесс {index} упал"))
+
+    def _poll_events(self) -> None:
+        try:
+            if not self._control.poll():
+                return
+            # Ответы, отправленные процессом до падения, разбираются раньше
+            # события о нём: иначе доставленный ответ счёлся бы потерянным
+            self._drain_results()
+            while self._control.poll():
+                self._on_event(*self._control.recv())
+        except (EOFError, OSError):
+            if self._running:
+                log.error("Зигота пула процессов завершилась: упавшие процессы не будут перезапущены")
+                self._running = False
+
+    def _drain_results(self) -> None:
+        while True:
+            try:
+                self._on_result(*self._results.get_nowait())
+            except queue.Empty:
+                return
+
+    def _read_results(self) -> None:
+        while self._running:
+            self._poll_events()
+            try:
+                request_id, ok, payload = self._results.get(timeout=HEALTH_CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            self._on_result(request_id, ok, payload)
+
+    def _on_result(self, request_id: int, ok: bool, payload) -> None:
+        with self._lock:
+            entry = self._pending.pop(request_id, None)
+            if entry is not None:
+                entry[1].in_flight -= 1
+                entry[1].completed += 1
+        if entry is None or entry[0].done():
+            return  # запрос отменён (например, по таймауту)
+        if ok:
+            entry[0].set_result(payload)
+        else:
+            entry[0].set_exception(RuntimeError(payload))
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _process_memory(pid: int) -> dict:
+    """RSS и PSS процесса из /proc (PSS честно делит общие страницы весов)."""
+    result = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("Rss", "Pss"):
+                    result[f"{name.lower()}_kb"] = int(value.split()[0])
+    except OSError:
+        pass
+    return result
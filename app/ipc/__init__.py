@@ -0,0 +1,4 @@
+"""
+Модуль ipc — локальный транспорт для сервисов на той же машине:
+Unix-сокет с двоичным протоколом и кольцо аудио в общей памяти.
+"""
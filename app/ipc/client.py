@@ -0,0 +1,155 @@
+"""
+Клиент локального IPC для сервисов на той же машине (STT, диалог).
+
+Не зависит от конфигурации и моделей TTS: нужны только numpy и стандартная
+библиотека.
+
+    with TTSClient("/run/cyber-owl/tts.sock") as tts:
+        pcm, sample_rate = tts.synthesize("Привет!", sample_rate=24000)
+        job_id = tts.speak("Слушаю.")
+
+Клиент синхронный; один экземпляр — одно соединение, запросы по очереди.
+"""
+
+import socket
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.ipc.protocol import (
+    AUDIO_RESPONSE,
+    FLAG_SHM,
+    HEADER_SIZE,
+    HELLO_REQUEST,
+    HELLO_RESPONSE,
+    INLINE_POSITION,
+    MSG_AUDIO,
+    MSG_CANCEL,
+    MSG_ERROR,
+    MSG_HELLO,
+    MSG_JOB,
+    MSG_SPEAK,
+    MSG_SYNTHESIZE,
+    SPEAK_REQUEST,
+    SYNTHESIZE_REQUEST,
+    ProtocolError,
+    pack_frame,
+    unpack_error,
+    unpack_header,
+)
+from app.ipc.shm_ring import ShmRing
+
+
+# Приоритет озвучки по умолчанию (PRIORITY_NORMAL планировщика)
+DEFAULT_PRIORITY = 10
+
+
+class IpcError(Exception):
+    """Сервер ответил ошибкой; status — как код ответа HTTP."""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(f"{status}: {detail}")
+        self.status = status
+        self.detail = detail
+
+
+class TTSClient:
+    """Синхронный клиент Unix-сокета TTS."""
+
+    def __init__(self, path: str, use_shm: bool = True, timeout: Optional[float] = None):
+        """
+        :param path: путь Unix-сокета (TTS_IPC_SOCKET сервера)
+        :param use_shm: получать аудио через общую память
+        :param timeout: таймаут операций сокета, с (None — без таймаута)
+        """
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(path)
+        self._next_id = 0
+        self._ring: Optional[ShmRing] = None
+
+        payload = self._request(MSG_HELLO, HELLO_REQUEST.pack(FLAG_SHM if use_shm else 0))
+        (size,) = HELLO_RESPONSE.unpack_from(payload)
+        name = payload[HELLO_RESPONSE.size:].decode("utf-8")
+        if size and name:
+            self._ring = ShmRing.attach(name)
+
+    @property
+    def uses_shm(self) -> bool:
+        return self._ring is not None
+
+    def synthesize(
+        self, text: str, sample_rate: Optional[int] = None, timeout: Optional[float] = None
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Синтез без воспроизведения на сервере.
+
+        :param text: текст или SSML
+        :param sample_rate: частота, Гц (по умолчанию — частота сервера)
+        :param timeout: таймаут синтеза на сервере, с
+        :return: (int16 PCM, частота)
+        :raises IpcError: ошибка синтеза (504 — таймаут, 503 — сервер запускается)
+        """
+        payload = self._request(
+            MSG_SYNTHESIZE,
+            SYNTHESIZE_REQUEST.pack(sample_rate or 0, timeout or 0.0) + text.encode("utf-8"),
+        )
+        sample_rate, position, size = AUDIO_RESPONSE.unpack_from(payload)
+        if position == INLINE_POSITION:
+            pcm = np.frombuffer(payload, dtype="<i2", count=size // 2, offset=AUDIO_RESPONSE.size)
+        else:
+            pcm = self._ring.read(position, size)
+        return pcm, sample_rate
+
+    def speak(self, text: str, priority: int = DEFAULT_PRIORITY, timeout: Optional[float] = None) -> str:
+        """
+        Озвучка на сервере.
+
+        :return: id задания
+        """
+        payload = self._request(MSG_SPEAK, SPEAK_REQUEST.pack(priority, timeout or 0.0) + text.encode("utf-8"))
+        return payload.decode("utf-8")
+
+    def cancel(self, job_id: str) -> None:
+        """
+        Отменяет задание на озвучку.
+
+        :raises IpcError: 404, если задание не найдено
+        """
+        self._request(MSG_CANCEL, job_id.encode("utf-8"))
+
+    def close(self) -> None:
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+        self._socket.close()
+
+    def __enter__(self) -> "TTSClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _request(self, msg_type: int, payload: bytes) -> bytearray:
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        self._socket.sendall(pack_frame(msg_type, self._next_id, payload))
+        response_type, request_id, length = unpack_header(self._receive(HEADER_SIZE))
+        response = self._receive(length)
+        if request_id != self._next_id:
+            raise ProtocolError(f"Ответ на чужой запрос: {request_id}")
+        if response_type == MSG_ERROR:
+            raise IpcError(*unpack_error(response))
+        if response_type not in (MSG_HELLO, MSG_AUDIO, MSG_JOB):
+            raise ProtocolError(f"Неожиданный тип ответа: {response_type}")
+        return response
+
+    def _receive(self, size: int) -> bytearray:
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            count = self._socket.recv_into(view[received:])
+            if count == 0:
+                raise ConnectionError("Сервер закрыл соединение")
+            received += count
+        return buffer
@@ -0,0 +1,95 @@
+"""
+Двоичный протокол локального IPC (Unix-сокет).
+
+Кадр: 12-байтовый заголовок и полезная нагрузка.
+
+    magic   2 байта  b"OW"
+    version 1 байт   PROTOCOL_VERSION
+    type    1 байт   тип сообщения (MSG_*)
+    id      4 байта  номер запроса, ответ несёт тот же номер
+    length  4 байта  длина нагрузки
+
+Все числа — little-endian. Тексты — UTF-8 без завершающего нуля.
+
+Запросы клиента:
+- MSG_HELLO      <B flags> — начало сессии (FLAG_SHM — нужно кольцо общей памяти);
+- MSG_SYNTHESIZE <I sample_rate, f timeout> + текст — синтез без воспроизведения;
+- MSG_SPEAK      <i priority, f timeout> + текст — озвучка на сервере;
+- MSG_CANCEL     id задания — отмена озвучки.
+Нули в sample_rate и timeout означают значения по умолчанию.
+
+Ответы сервера:
+- MSG_HELLO  <I размер кольца> + имя сегмента общей памяти (пусто — без кольца);
+- MSG_AUDIO  <I sample_rate, Q позиция, I байт> + PCM, если позиция
+             INLINE_POSITION, иначе PCM лежит в кольце по этой позиции;
+- MSG_JOB    id задания;
+- MSG_ERROR  <H статус (как в HTTP)> + описание.
+"""
+
+import struct
+from typing import Tuple
+
+
+MAGIC = b"OW"
+PROTOCOL_VERSION = 1
+
+HEADER = struct.Struct("<2sBBII")
+HEADER_SIZE = HEADER.size
+
+# Типы запросов
+MSG_HELLO = 0x01
+MSG_SYNTHESIZE = 0x02
+MSG_SPEAK = 0x03
+MSG_CANCEL = 0x04
+# Типы ответов (MSG_HELLO — и запрос, и ответ)
+MSG_AUDIO = 0x82
+MSG_JOB = 0x83
+MSG_ERROR = 0xFF
+
+FLAG_SHM = 0x01
+
+HELLO_REQUEST = struct.Struct("<B")
+HELLO_RESPONSE = struct.Struct("<I")
+SYNTHESIZE_REQUEST = struct.Struct("<If")
+SPEAK_REQUEST = struct.Struct("<if")
+AUDIO_RESPONSE = struct.Struct("<IQI")
+ERROR_RESPONSE = struct.Struct("<H")
+
+# Позиция в MSG_AUDIO: данные идут в самом кадре, а не в кольце
+INLINE_POSITION = 0xFFFFFFFFFFFFFFFF
+
+# Защита от мусора в сокете: нагрузка запроса больше этого — ошибка протокола
+MAX_REQUEST_PAYLOAD = 1024 * 1024
+
+
+class ProtocolError(Exception):
+    """Нарушение формата кадра."""
+
+
+def pack_frame(msg_type: int, request_id: int, payload: bytes = b"") -> bytes:
+    """Собирает кадр: заголовок + нагрузка."""
+    return HEADER.pack(MAGIC, PROTOCOL_VERSION, msg_type, request_id, len(payload)) + payload
+
+
+def unpack_header(data: bytes) -> Tuple[int, int, int]:
+    """
+    Разбирает заголовок кадра.
+
+    :return: (тип, номер запроса, длина нагрузки)
+    :raises ProtocolError: чужой magic или версия протокола
+    """
+    magic, version, msg_type, request_id, length = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ProtocolError(f"Неверный magic: {magic!r}")
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"Неподдерживаемая версия протокола: {version}")
+    return msg_type, request_id, length
+
+
+def pack_error(request_id: int, status: int, detail: str) -> bytes:
+    return pack_frame(MSG_ERROR, request_id, ERROR_RESPONSE.pack(status) + detail.encode("utf-8"))
+
+
+def unpack_error(payload: bytes) -> Tuple[int, str]:
+    (status,) = ERROR_RESPONSE.unpack_from(payload)
+    return status, payload[ERROR_RESPONSE.size:].decode("utf-8", "replace")
@@ -0,0 +1,199 @@
+"""
+Сервер локального IPC: Unix-сокет с двоичным протоколом (см. protocol).
+
+Работает в event loop HTTP-сервера и пользуется тем же исполнителем синтеза
+и очередью воспроизведения, но без разбора HTTP и JSON. Аудио ответа
+кладётся в кольцо общей памяти соединения (если клиент его запросил и в нём
+есть место), а по сокету идёт только его позиция.
+
+Запросы одного соединения обрабатываются по очереди; для параллельного
+синтеза клиент открывает несколько соединений.
+"""
+
+import asyncio
+import os
+import stat
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.logger import get_logger
+from app.ipc.protocol import (
+    AUDIO_RESPONSE,
+    FLAG_SHM,
+    HEADER,
+    HEADER_SIZE,
+    HELLO_REQUEST,
+    HELLO_RESPONSE,
+    INLINE_POSITION,
+    MAGIC,
+    MAX_REQUEST_PAYLOAD,
+    MSG_AUDIO,
+    MSG_CANCEL,
+    MSG_HELLO,
+    MSG_JOB,
+    MSG_SPEAK,
+    MSG_SYNTHESIZE,
+    PROTOCOL_VERSION,
+    SPEAK_REQUEST,
+    SYNTHESIZE_REQUEST,
+    ProtocolError,
+    pack_error,
+    pack_frame,
+    unpack_header,
+)
+from app.ipc.shm_ring import ShmRing
+from app.utils.audio_utils import pcm16_to_bytes
+
+
+log = get_logger(__name__)
+
+# Синтез: (текст, частота или None, таймаут или None) -> (int16 PCM, частота)
+Synthesize = Callable[[str, Optional[int], Optional[float]], Awaitable[Tuple[np.ndarray, int]]]
+# Озвучка на сервере: (текст, приоритет, таймаут или None) -> id задания
+Speak = Callable[[str, int, Optional[float]], str]
+# Отмена озвучки: id задания -> найдено ли задание
+Cancel = Callable[[str], bool]
+
+
+class IpcServer:
+    """Сервер на Unix-сокете."""
+
+    def __init__(
+        self,
+        path: str,
+        synthesize: Synthesize,
+        speak: Speak,
+        cancel: Cancel,
+        ring_bytes: int = 0,
+    ):
+        """
+        :param path: путь Unix-сокета
+        :param synthesize: синтез без воспроизведения
+        :param speak: постановка озвучки в очередь
+        :param cancel: отмена озвучки
+        :param ring_bytes: ёмкость кольца общей памяти на соединение (0 — без кольца)
+        """
+        self._path = path
+        self._synthesize = synthesize
+        self._speak = speak
+        self._cancel = cancel
+        self._ring_bytes = ring_bytes - ring_bytes % 8  # кратно размеру отсчётов
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stats = {"connections": 0, "requests": 0, "errors": 0, "audio_shm": 0, "audio_inline": 0}
+
+    async def start(self) -> None:
+        """Открывает сокет (оставшийся от прошлого запуска файл удаляется)."""
+        if os.path.exists(self._path) and stat.S_ISSOCK(os.stat(self._path).st_mode):
+            os.unlink(self._path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self._path)
+        log.info(f"IPC: слушаем {self._path}, кольцо {self._ring_bytes} байт на соединение")
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+
+    def stats(self) -> Dict[str, object]:
+        result = dict(self._stats)
+        result.update({"socket": self._path, "ring_bytes": self._ring_bytes})
+        return result
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._count("connections")
+        ring: Optional[ShmRing] = None
+        try:
+            while True:
+                msg_type, request_id, length = unpack_header(await reader.readexactly(HEADER_SIZE))
+                if length > MAX_REQUEST_PAYLOAD:
+                    raise ProtocolError(f"Слишком длинный запрос: {length} байт")
+                payload = await reader.readexactly(length)
+                self._count("requests")
+                if msg_type == MSG_HELLO:
+                    if ring is None:
+                        ring = self._open_ring(payload)
+                    name = ring.name.encode("utf-8") if ring else b""
+                    size = ring.capacity if ring else 0
+                    writer.write(pack_frame(MSG_HELLO, request_id, HELLO_RESPONSE.pack(size) + name))
+                else:
+                    await self._dispatch(writer, msg_type, request_id, payload, ring)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # клиент закрыл соединение
+        except ProtocolError as e:
+            log.warning(f"IPC: {e}, соединение закрыто")
+        finally:
+            writer.close()
+            if ring is not None:
+                ring.close()
+
+    def _open_ring(self, payload: bytes) -> Optional[ShmRing]:
+        (flags,) = HELLO_REQUEST.unpack_from(payload)
+        if not flags & FLAG_SHM or self._ring_bytes <= 0:
+            return None
+        try:
+            return ShmRing.create(self._ring_bytes)
+        except OSError as e:
+            log.warning(f"IPC: кольцо общей памяти не создано, аудио пойдёт через сокет: {e}")
+            return None
+
+    async def _dispatch(
+        self,
+        writer: asyncio.StreamWriter,
+        msg_type: int,
+        request_id: int,
+        payload: bytes,
+        ring: Optional[ShmRing],
+    ) -> None:
+        try:
+            if msg_type == MSG_SYNTHESIZE:
+                sample_rate, timeout = SYNTHESIZE_REQUEST.unpack_from(payload)
+                text = payload[SYNTHESIZE_REQUEST.size:].decode("utf-8")
+                pcm, sample_rate = await self._synthesize(text, sample_rate or None, timeout or None)
+                self._write_audio(writer, request_id, pcm, sample_rate, ring)
+            elif msg_type == MSG_SPEAK:
+                priority, timeout = SPEAK_REQUEST.unpack_from(payload)
+                text = payload[SPEAK_REQUEST.size:].decode("utf-8")
+                job_id = self._speak(text, priority, timeout or None)
+                writer.write(pack_frame(MSG_JOB, request_id, job_id.encode("utf-8")))
+            elif msg_type == MSG_CANCEL:
+                job_id = payload.decode("utf-8")
+                if not self._cancel(job_id):
+                    writer.write(pack_error(request_id, 404, "Job not found"))
+                else:
+                    writer.write(pack_frame(MSG_JOB, request_id, payload))
+            else:
+                writer.write(pack_error(request_id, 400, f"Unknown message type: {msg_type}"))
+        except Exception as e:
+            # HTTPException и подобные несут статус; остальное — 500
+            self._count("errors")
+            status = getattr(e, "status_code", 500)
+            detail = getattr(e, "detail", None) or str(e) or type(e).__name__
+            writer.write(pack_error(request_id, status, str(detail)))
+
+    def _write_audio(
+        self,
+        writer: asyncio.StreamWriter,
+        request_id: int,
+        pcm: np.ndarray,
+        sample_rate: int,
+        ring: Optional[ShmRing],
+    ) -> None:
+        size = len(pcm) * 2
+        position = ring.write(pcm) if ring is not None else None
+        if position is not None:
+            self._count("audio_shm")
+            writer.write(pack_frame(MSG_AUDIO, request_id, AUDIO_RESPONSE.pack(sample_rate, position, size)))
+            return
+        # Нет кольца или в нём нет места — данные в самом кадре
+        self._count("audio_inline")
+        meta = AUDIO_RESPONSE.pack(sample_rate, INLINE_POSITION, size)
+        writer.write(HEADER.pack(MAGIC, PROTOCOL_VERSION, MSG_AUDIO, request_id, len(meta) + size) + meta)
+        writer.write(pcm16_to_bytes(pcm))
+
+    def _count(self, name: str) -> None:
+        self._stats[name] += 1
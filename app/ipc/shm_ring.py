@@ -0,0 +1,123 @@
+"""
+Кольцо аудио в общей памяти: сервер пишет PCM, клиент читает его на месте,
+без копирования через сокет.
+
+Сегмент начинается с 64-байтового заголовка:
+    [0:8]   позиция записи (пишет сервер)
+    [8:16]  позиция чтения (пишет клиент, освобождая прочитанное)
+Позиции — сквозные счётчики байт, смещение в области данных — позиция по
+модулю ёмкости. Блок всегда непрерывен: если до конца области места не
+хватает, запись начинается с её начала, а хвост пропускается (клиент,
+освобождая блок, сдвигает позицию чтения сразу за его конец).
+
+Кольцо — одно на соединение: один писатель и один читатель.
+"""
+
+import struct
+import uuid
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+import numpy as np
+
+
+RING_HEADER_SIZE = 64
+_POSITION = struct.Struct("<Q")
+_WRITE_OFFSET = 0
+_READ_OFFSET = 8
+
+
+class ShmRing:
+    """Кольцевой буфер байт в сегменте общей памяти."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self._capacity = shm.size - RING_HEADER_SIZE
+        self._data: Optional[np.ndarray] = np.ndarray(
+            (self._capacity,), dtype=np.uint8, buffer=shm.buf, offset=RING_HEADER_SIZE
+        )
+        self._write = self._load(_WRITE_OFFSET)
+
+    @classmethod
+    def create(cls, size: int) -> "ShmRing":
+        """
+        Создаёт сегмент (сервер).
+
+        :param size: ёмкость области данных, байт
+        """
+        name = f"owl_tts_{uuid.uuid4().hex[:16]}"
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size + RING_HEADER_SIZE)
+        shm.buf[:RING_HEADER_SIZE] = bytes(RING_HEADER_SIZE)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "ShmRing":
+        """Подключается к сегменту сервера (клиент)."""
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+            # Иначе трекер ресурсов клиента удалит чужой сегмент при выходе
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def write(self, data: np.ndarray) -> Optional[int]:
+        """
+        Копирует блок в кольцо (сервер).
+
+        :param data: аудио (любой dtype, копируются байты)
+        :return: позиция блока или None, если места нет (клиент не успел
+                 прочитать или блок больше кольца) — тогда данные идут через сокет
+        """
+        block = np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+        size = len(block)
+        if size > self._capacity:
+            return None
+        position = self._write
+        offset = position % self._capacity
+        if offset + size > self._capacity:
+            position += self._capacity - offset  # пропускаем хвост области
+            offset = 0
+        if position + size - self._load(_READ_OFFSET) > self._capacity:
+            return None
+        self._data[offset:offset + size] = block
+        self._write = position + size
+        self._store(_WRITE_OFFSET, self._write)
+        return position
+
+    def read(self, position: int, size: int, dtype=np.int16) -> np.ndarray:
+        """
+        Копия блока из кольца (клиент); место сразу освобождается.
+
+        :param position: позиция блока из ответа сервера
+        :param size: размер блока, байт
+        :param dtype: тип отсчётов
+        """
+        offset = position % self._capacity
+        result = self._data[offset:offset + size].view(dtype).copy()
+        self._store(_READ_OFFSET, position + size)
+        return result
+
+    def close(self) -> None:
+        """Отключается от сегмента; владелец его удаляет."""
+        if self._data is None:
+            return
+        self._data = None  # иначе буфер сегмента нельзя закрыть
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def _load(self, offset: int) -> int:
+        return _POSITION.unpack_from(self._shm.buf, offset)[0]
+
+    def _store(self, offset: int, value: int) -> None:
+        _POSITION.pack_into(self._shm.buf, offset, value)
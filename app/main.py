@@ -6,7 +6,7 @@ from app.core.httpd import app
 from app.config.config import TTS_HOST, TTS_PORT, TTS_LOG_LEVEL
 
 
-if __name__ == "__main__":
+def main():
     import uvicorn
 
     uvicorn.run(
@@ -14,4 +14,8 @@ if __name__ == "__main__":
         host=TTS_HOST,
         port=TTS_PORT,
         log_level=TTS_LOG_LEVEL,
-    )
\ No newline at end of file
+    )
+
+
+if __name__ == "__main__":
+    main()
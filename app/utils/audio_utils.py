@@ -0,0 +1,87 @@
+"""
+Аудио-утилиты: преобразование между float-тензорами модели и int16 PCM,
+сборка WAV-заголовков, пересчёт частоты дискретизации.
+"""
+
+import struct
+from math import gcd
+from typing import Optional
+
+import numpy as np
+import torch
+from scipy.signal import resample_poly
+
+
+PCM16_SCALE = 32767
+
+
+def float_to_pcm16(audio) -> np.ndarray:
+    """
+    Переводит float-аудио (Tensor или ndarray в диапазоне -1..1) в int16 PCM.
+
+    :param audio: аудиоданные модели
+    :return: одномерный массив int16
+    """
+    if isinstance(audio, torch.Tensor):
+        audio = audio.detach().cpu().numpy()
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    return (np.clip(audio, -1.0, 1.0) * PCM16_SCALE).astype(np.int16)
+
+
+def pcm16_to_tensor(pcm: np.ndarray) -> torch.Tensor:
+    """
+    Переводит int16 PCM обратно в float32-тензор в диапазоне -1..1.
+
+    :param pcm: массив int16
+    :return: одномерный тензор float32
+    """
+    return torch.from_numpy(pcm.astype(np.float32) / PCM16_SCALE)
+
+
+# Размер данных в потоковом WAV-заголовке неизвестен заранее — ставим максимум
+WAV_UNKNOWN_SIZE = 0xFFFFFFFF
+
+
+def pcm16_to_bytes(pcm: np.ndarray) -> bytes:
+    """Сериализует int16 PCM в байты little-endian (как в WAV)."""
+    return np.asarray(pcm, dtype="<i2").tobytes()
+
+
+def wav_header(samplerate: int, channels: int = 1, data_size: Optional[int] = None) -> bytes:
+    """
+    Собирает 44-байтовый заголовок WAV (PCM, 16 бит).
+
+    :param samplerate: частота дискретизации
+    :param channels: число каналов
+    :param data_size: размер данных в байтах; None — потоковый заголовок
+                      с максимальными размерами (длина заранее неизвестна)
+    :return: заголовок WAV
+    """
+    block_align = channels * 2
+    if data_size is None:
+        riff_size = data_size = WAV_UNKNOWN_SIZE
+    else:
+        riff_size = 36 + data_size
+    return (
+        b"RIFF" + struct.pack("<I", riff_size) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, samplerate,
+                                samplerate * block_align, block_align, 16)
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+
+def resample_pcm16(pcm: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """
+    Пересчитывает int16 PCM на другую частоту дискретизации (полифазный
+    фильтр scipy, весь фрагмент за один векторный вызов).
+
+    :param pcm: массив int16
+    :param src_rate: исходная частота
+    :param dst_rate: нужная частота
+    :return: массив int16 (тот же массив, если частоты совпадают)
+    """
+    if src_rate == dst_rate or len(pcm) == 0:
+        return pcm
+    divisor = gcd(src_rate, dst_rate)
+    audio = resample_poly(np.asarray(pcm, dtype=np.float32), dst_rate // divisor, src_rate // divisor)
+    return np.clip(np.rint(audio), -32768, 32767).astype(np.int16)
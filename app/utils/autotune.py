@@ -0,0 +1,207 @@
+"""
+Подбор плана потоков инференса под машину (`cyber-owl-tts autotune`).
+
+Перебирает сочетания «число рабочих × потоков torch на рабочего» в пределах
+физических ядер, с привязкой рабочих к ядрам и без неё, меряет синтез (мимо
+кэша) и сохраняет лучший вариант для выбранной цели:
+
+- throughput — максимум запросов в секунду при полной загрузке рабочих;
+- latency    — минимум p95 задержки одиночного запроса.
+
+Сохранённый план исполнитель синтеза применяет при запуске (см. thread_plan).
+
+Пример:
+    cyber-owl-tts autotune --mode pool --target throughput
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from app.config.config import TTS_EXECUTOR_MODE, TTS_THREAD_PLAN
+from app.core.inference_executor import MODE_POOL, MODE_THREAD
+from app.core.text_to_speech import TTS
+from app.core.thread_plan import (
+    TARGET_THROUGHPUT,
+    ThreadPlan,
+    apply_threads,
+    available_cpus,
+    cpu_frequency_governors,
+    cpu_sets,
+    physical_cores,
+)
+from app.core.worker_pool import ModelWorkerPool
+from app.utils.batch_bench import DEFAULT_TEXTS, _percentile
+
+
+def _powers_of_two(limit: int) -> List[int]:
+    """1, 2, 4, ... до limit, и сам limit."""
+    values = {limit}
+    value = 1
+    while value < limit:
+        values.add(value)
+        value *= 2
+    return sorted(values)
+
+
+def candidates(mode: str, cores: int, max_workers: int, pin: bool) -> List[tuple]:
+    """
+    Варианты (рабочих, потоков, привязка) для перебора.
+
+    В режиме pool у каждого рабочего свои ядра (рабочих × потоков ≤ ядер),
+    в режиме thread рабочие-потоки делят один пул потоков torch.
+    """
+    result = []
+    for workers in _powers_of_two(max(1, min(max_workers, cores))):
+        budget = cores // workers if mode == MODE_POOL else cores
+        for threads in _powers_of_two(budget):
+            result.append((workers, threads, False))
+            if pin:
+                result.append((workers, threads, True))
+    return result
+
+
+def _run_load(submit: Callable[[str], object], requests: int, clients: int) -> dict:
+    """Прогоняет `requests` запросов от `clients` клиентов, меряет задержку."""
+    latencies: List[float] = []
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            started = time.perf_counter()
+            submit(DEFAULT_TEXTS[i % len(DEFAULT_TEXTS)]).result()
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "throughput_rps": requests / elapsed,
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "latency_p95_ms": _percentile(latencies, 0.95) * 1000,
+    }
+
+
+def measure(tts: TTS, mode: str, workers: int, threads: int, interop_threads: int,
+            cpus: Optional[List[List[int]]], requests: int, clients: int) -> dict:
+    """Меряет один вариант: прогрев каждого рабочего, затем нагрузка."""
+    if mode == MODE_POOL:
+        pool = ModelWorkerPool(lambda: tts, workers, threads, interop_threads, cpus)
+        pool.start()
+        try:
+            for future in pool.broadcast("infer", DEFAULT_TEXTS[0]):
+                future.result()
+            return _run_load(lambda text: pool.submit("infer", text), requests, clients)
+        finally:
+            pool.shutdown()
+
+    # thread: потоки torch и привязка — на весь процесс
+    apply_threads(threads, cpus=cpus[0] if cpus else available_cpus())
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pool.submit(tts.infer, DEFAULT_TEXTS[0]).result()
+        return _run_load(lambda text: pool.submit(tts.infer, text), requests, clients)
+    finally:
+        pool.shutdown()
+
+
+def autotune(mode: str, target: str, requests: int, clients: Optional[int], max_workers: int,
+             pin: bool, interop_threads: int) -> Optional[ThreadPlan]:
+    """
+    Перебирает варианты, печатает таблицу замеров и возвращает лучший план.
+
+    :param clients: одновременных клиентов (по умолчанию: 2 × рабочих для
+                    throughput, 1 для latency)
+    """
+    cores = physical_cores()
+    all_cpus = available_cpus()
+    print(f"CPU: {len(all_cpus)} логических, {len(cores)} физических ядер")
+    governors = cpu_frequency_governors()
+    if "powersave" in governors:
+        print("⚠️ Регулятор частоты CPU powersave — замеры будут занижены")
+
+    if mode == MODE_THREAD:
+        apply_threads(0, interop_threads)  # inter-op задаётся один раз до инференса
+    tts = TTS()
+
+    rows = []
+    print(f"{'workers':>7} {'threads':>7} {'pin':>4} {'rps':>8} {'p50,ms':>9} {'p95,ms':>9}")
+    for workers, threads, pinned in candidates(mode, len(cores), max_workers, pin):
+        sets = None
+        if pinned:
+            sets = cpu_sets(workers if mode == MODE_POOL else 1, threads, cores)
+        load_clients = clients or (2 * workers if target == TARGET_THROUGHPUT else 1)
+        try:
+            result = measure(tts, mode, workers, threads, interop_threads, sets, requests, load_clients)
+        except Exception as e:
+            print(f"{workers:>7} {threads:>7} {'yes' if pinned else 'no':>4} ❌ {e}")
+            continue
+        result.update(workers=workers, threads=threads, cpus=sets, clients=load_clients)
+        rows.append(result)
+        print(f"{workers:>7} {threads:>7} {'yes' if pinned else 'no':>4} {result['throughput_rps']:>8.2f} "
+              f"{result['latency_p50_ms']:>9.1f} {result['latency_p95_ms']:>9.1f}")
+
+    if mode == MODE_THREAD:
+        apply_threads(0, cpus=all_cpus)
+    tts.close()
+    if not rows:
+        return None
+
+    if target == TARGET_THROUGHPUT:
+        best = max(rows, key=lambda r: r["throughput_rps"])
+    else:
+        best = min(rows, key=lambda r: r["latency_p95_ms"])
+    measured = {k: round(best[k], 3) for k in ("throughput_rps", "latency_p50_ms", "latency_p95_ms")}
+    measured["clients"] = best["clients"]
+    return ThreadPlan(
+        mode=mode,
+        workers=best["workers"],
+        threads=best["threads"],
+        interop_threads=interop_threads,
+        cpus=best["cpus"],
+        target=target,
+        measured=measured,
+    )
+
+
+# --- Командная строка --------------------------------------------------------
+
+def run(args: argparse.Namespace) -> int:
+    """Точка входа команды `cyber-owl-tts autotune`."""
+    mode = args.mode or (TTS_EXECUTOR_MODE if TTS_EXECUTOR_MODE in (MODE_THREAD, MODE_POOL) else MODE_POOL)
+    plan = autotune(mode, args.target, args.requests, args.clients, args.max_workers,
+                    not args.no_pin, args.interop_threads)
+    if plan is None:
+        print("❌ Ни один вариант не удалось замерить")
+        return 1
+    print(f"✅ Лучший вариант ({plan.target}): {plan.describe()}, {plan.measured}")
+    if args.dry_run:
+        return 0
+    output = args.output or TTS_THREAD_PLAN
+    plan.save(output)
+    print(f"План сохранён: {os.path.abspath(output)}")
+    if mode != TTS_EXECUTOR_MODE:
+        print(f"⚠️ План применится при TTS_EXECUTOR_MODE={mode}")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.cli import main
+
+    sys.exit(main(["autotune"] + sys.argv[1:]))
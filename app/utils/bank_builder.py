@@ -0,0 +1,130 @@
+"""
+Сборка банка фраз (`cyber-owl-tts build-bank`).
+
+В банк входят:
+- время: все 1440 минут суток в официальном и разговорном стиле
+  (time_to_text), совпадающие формулировки — один раз;
+- приветствия и служебные реплики (PHRASES);
+- фразы из файла --phrases (по одной в строке).
+
+Фразы синтезируются пачками голосом и моделью по умолчанию, мимо кэша, и
+пишутся в один файл: PCM подряд плюс индекс (см. phrase_bank). Банк
+собирается под версию модели: после смены модели его надо пересобрать.
+
+Пример:
+    cyber-owl-tts build-bank --sample-rate 24000 --phrases prompts.txt
+"""
+
+import argparse
+import os
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.config import TTS_PHRASE_BANK, TTS_SAMPLE_RATE
+from app.core.phrase_bank import iter_unique, write_bank
+from app.core.text_to_speech import TTS, synthesis_rate
+from app.utils.text_normalizer import normalizer
+from app.utils.time2words import time_to_text
+
+
+# Приветствия и служебные реплики
+PHRASES = [
+    "Привет!",
+    "Здравствуйте!",
+    "Доброе утро!",
+    "Добрый день!",
+    "Добрый вечер!",
+    "Спокойной ночи!",
+    "До свидания!",
+    "Слушаю.",
+    "Да.",
+    "Нет.",
+    "Хорошо.",
+    "Готово.",
+    "Секунду.",
+    "Минутку, уточняю.",
+    "Не поняла, повторите, пожалуйста.",
+    "Повторите, пожалуйста.",
+    "Извините, я не расслышала.",
+    "Команда выполнена.",
+    "Не удалось выполнить команду.",
+    "Нет связи с сервером.",
+    "Связь восстановлена.",
+    "Батарея разряжена.",
+    "Система готова к работе.",
+    "Включаюсь.",
+    "Выключаюсь.",
+]
+
+TIME_STYLES = ("formal", "spoken")
+
+# Фраз на один вызов модели
+BUILD_BATCH_SIZE = 8
+
+
+def time_phrases() -> List[str]:
+    """Время для каждой минуты суток во всех стилях."""
+    return [
+        time_to_text((hour, minute), style)
+        for style in TIME_STYLES
+        for hour in range(24)
+        for minute in range(60)
+    ]
+
+
+def load_phrases(path: Optional[str]) -> List[str]:
+    """Фразы из файла (по одной в строке, пустые и `#`-строки пропускаются)."""
+    if not path:
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def render(tts: TTS, texts: List[str], sample_rate: int) -> Iterator[Tuple[str, np.ndarray]]:
+    """Синтезирует фразы пачками, выдаёт (текст, PCM) по мере готовности."""
+    started = time.perf_counter()
+    for start in range(0, len(texts), BUILD_BATCH_SIZE):
+        batch = texts[start:start + BUILD_BATCH_SIZE]
+        yield from zip(batch, tts.synthesize_batch(batch, False, None, sample_rate))
+        done = start + len(batch)
+        elapsed = time.perf_counter() - started
+        print(f"\r🦉 {done}/{len(texts)} фраз, осталось ~{elapsed / done * (len(texts) - done):.0f} с",
+              end="", flush=True)
+    print()
+
+
+def run(args: argparse.Namespace) -> int:
+    """Точка входа команды `cyber-owl-tts build-bank`."""
+    sample_rate = args.sample_rate or TTS_SAMPLE_RATE
+    if synthesis_rate(sample_rate) != sample_rate:
+        print(f"❌ Банк собирается на частоте модели: {sample_rate} Гц не поддерживается")
+        return 1
+    # Фразы в канонической форме — той, с которой их ищет сервер
+    texts = list(iter_unique(
+        normalizer.normalize(text)
+        for text in ([] if args.no_time else time_phrases()) + PHRASES + load_phrases(args.phrases)
+    ))
+    output = args.output or TTS_PHRASE_BANK
+    if not output:
+        print("❌ Не задан путь банка (--output или TTS_PHRASE_BANK)")
+        return 1
+    print(f"Фраз: {len(texts)}, частота {sample_rate} Гц")
+
+    tts = TTS()
+    speaker, _ = tts.voice()
+    started = time.perf_counter()
+    count = write_bank(output, render(tts, texts, sample_rate), sample_rate, speaker, tts.model_version)
+    size = os.path.getsize(output)
+    print(f"✅ Банк: {count} фраз, {size / 1024 / 1024:.1f} МБ за {time.perf_counter() - started:.0f} с")
+    print(f"Сохранён: {os.path.abspath(output)}")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.cli import main
+
+    sys.exit(main(["build-bank"] + sys.argv[1:]))
@@ -0,0 +1,106 @@
+"""
+Бенчмарк микро-батчирования: пропускная способность и задержка синтеза
+для сетки настроек (максимальный размер пачки × максимальное ожидание).
+
+Кэш аудио не используется — меряется чистая работа модели.
+
+Пример:
+    python -m app.utils.batch_bench --sizes 1,4,8 --waits 2,5,10 --requests 64 --concurrency 8
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from app.core.batcher import MicroBatcher
+from app.core.text_to_speech import TTS
+
+
+DEFAULT_TEXTS = [
+    "Привет, я кибер сова.",
+    "Сейчас на улице тепло и солнечно.",
+    "Внимание, начинается проверка системы.",
+    "Батарея заряжена на восемьдесят процентов.",
+    "Хорошего дня и отличного настроения!",
+    "Температура в комнате двадцать два градуса.",
+]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_setting(tts: TTS, max_batch: int, max_wait_ms: float, requests: int,
+                concurrency: int, workers: int) -> dict:
+    """Прогоняет `requests` запросов от `concurrency` клиентов через батчер."""
+    pool = ThreadPoolExecutor(max_workers=workers)
+    batcher = MicroBatcher(
+        lambda texts, _group: pool.submit(tts.synthesize_batch, texts, False),
+        max_batch,
+        max_wait_ms,
+    )
+    batcher.start()
+
+    latencies: List[float] = []
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            started = time.perf_counter()
+            batcher.submit(DEFAULT_TEXTS[i % len(DEFAULT_TEXTS)]).result()
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    stats = batcher.stats()
+    batcher.stop()
+    pool.shutdown()
+    return {
+        "max_batch": max_batch,
+        "max_wait_ms": max_wait_ms,
+        "throughput_rps": requests / elapsed,
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "latency_p95_ms": _percentile(latencies, 0.95) * 1000,
+        "avg_batch_size": stats["avg_batch_size"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк микро-батчирования синтеза")
+    parser.add_argument("--sizes", default="1,2,4,8", help="максимальные размеры пачки")
+    parser.add_argument("--waits", default="0,2,5,10", help="максимальные ожидания, мс")
+    parser.add_argument("--requests", type=int, default=48)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1, help="потоков синтеза")
+    args = parser.parse_args()
+
+    tts = TTS()
+    tts.synthesize_batch(DEFAULT_TEXTS[:1], use_cache=False)  # прогрев
+
+    print(f"{'batch':>5} {'wait,ms':>8} {'rps':>8} {'p50,ms':>9} {'p95,ms':>9} {'avg batch':>10}")
+    for size in (int(v) for v in args.sizes.split(",")):
+        for wait in (float(v) for v in args.waits.split(",")):
+            r = run_setting(tts, size, wait, args.requests, args.concurrency, args.workers)
+            print(f"{r['max_batch']:>5} {r['max_wait_ms']:>8.1f} {r['throughput_rps']:>8.2f} "
+                  f"{r['latency_p50_ms']:>9.1f} {r['latency_p95_ms']:>9.1f} {r['avg_batch_size']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
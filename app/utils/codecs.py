@@ -0,0 +1,331 @@
+"""
+Кодеки выходного аудио: int16 PCM (моно) -> байты ответа.
+
+- wav   — PCM 16 бит в контейнере WAV (по умолчанию);
+- pcm   — «сырой» PCM 16 бит little-endian;
+- mulaw — G.711 μ-law, 8 бит на отсчёт (телефония);
+- alaw  — G.711 A-law, 8 бит на отсчёт (телефония);
+- flac  — сжатие без потерь (нужен soundfile);
+- opus  — Ogg/Opus, сжатие с потерями для удалённых клиентов (нужен
+          soundfile на libsndfile >= 1.0.29). Opus кодирует только на
+          8/12/16/24/48 кГц: другая частота заменяется ближайшей не меньшей
+          (Codec.output_rate).
+
+G.711 кодируется векторно в numpy. wav, pcm, mulaw и alaw кодируются
+поблочно и годятся для потокового ответа; flac и opus — только целиком.
+
+Кодек выбирается параметром `format` или, если его нет, заголовком `Accept`.
+"""
+
+import io
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core import metrics
+from app.utils.audio_utils import pcm16_to_bytes, wav_header
+
+try:
+    import soundfile
+except (ImportError, OSError):  # нет пакета или libsndfile
+    soundfile = None
+
+
+FORMAT_WAV = "wav"
+FORMAT_PCM = "pcm"
+FORMAT_MULAW = "mulaw"
+FORMAT_ALAW = "alaw"
+FORMAT_FLAC = "flac"
+FORMAT_OPUS = "opus"
+
+DEFAULT_FORMAT = FORMAT_WAV
+
+# Частоты, которые принимает кодер Opus
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+class CodecError(ValueError):
+    """Неизвестный или недоступный кодек."""
+
+
+class Codec:
+    """Кодек выходного аудио."""
+
+    name = ""
+    extension = ""
+    # Типы из Accept, которые выбирают этот кодек
+    media_types: tuple = ()
+    # Можно кодировать поблочно (для потокового ответа)
+    streamable = True
+
+    def content_type(self, samplerate: int) -> str:
+        return self.media_types[0]
+
+    def available(self) -> bool:
+        return True
+
+    def output_rate(self, samplerate: int) -> int:
+        """Частота, с которой кодек закодирует ответ на запрошенную samplerate."""
+        return samplerate
+
+    def encode(self, pcm: np.ndarray, samplerate: int) -> bytes:
+        """Кодирует фрагмент целиком (готовый файл)."""
+        return self.stream_header(samplerate) + self.encode_chunk(pcm, samplerate)
+
+    def stream_header(self, samplerate: int) -> bytes:
+        """Начало потокового ответа (для wav — заголовок без длины)."""
+        return b""
+
+    def encode_chunk(self, pcm: np.ndarray, samplerate: int) -> bytes:
+        """Кодирует очередной блок потокового ответа."""
+        raise NotImplementedError
+
+
+class WavCodec(Codec):
+    name = FORMAT_WAV
+    extension = "wav"
+    media_types = ("audio/wav", "audio/x-wav", "audio/wave")
+
+    def encode(self, pcm: np.ndarray, samplerate: int) -> bytes:
+        data = pcm16_to_bytes(pcm)
+        return wav_header(samplerate, data_size=len(data)) + data
+
+    def stream_header(self, samplerate: int) -> bytes:
+        return wav_header(samplerate)
+
+    def encode_chunk(self, pcm: np.ndarray, samplerate: int) -> bytes:
+        return pcm16_to_bytes(pcm)
+
+
+class PcmCodec(Codec):
+    name = FORMAT_PCM
+    extension = "pcm"
+    media_types = ("audio/L16",)
+
+    def content_type(self, samplerate: int) -> str:
+        return f"audio/L16; rate={samplerate}; channels=1"
+
+    def encode_chunk(self, pcm: np.ndarray, samplerate: int) -> bytes:
+        return pcm16_to_bytes(pcm)
+
+
+class MulawCodec(Codec):
+    name = FORMAT_MULAW
+    extension = "ulaw"
+    media_types = ("audio/PCMU", "audio/basic", "audio/x-mulaw")
+
+    def content_type(self, samplerate: int) -> str:
+        return f"audio/PCMU; rate={samplerate}; channels=1"
+
+    def encode_chunk(self, pcm: np.ndarray, samplerate: int) -> bytes:
+        return linear_to_mulaw(pcm).tobytes()
+
+
+class AlawCodec(Codec):
+    name = FORMAT_ALAW
+    extension = "alaw"
+    media_types = ("audio/PCMA", "audio/x-alaw")
+
+    def content_type(self, samplerate: int) -> str:
+        return f"audio/PCMA; rate={samplerate}; channels=1"
+
+    def encode_chunk(self, pcm: np.ndarray, samplerate: int) -> bytes:
+        return linear_to_alaw(pcm).tobytes()
+
+
+class _SoundfileCodec(Codec):
+    """Кодирование целого файла через libsndfile."""
+
+    streamable = False
+    container = ""
+    subtype = ""
+
+    def available(self) -> bool:
+        return soundfile is not None and self.subtype in soundfile.available_subtypes(self.container)
+
+    def encode(self, pcm: np.ndarray, samplerate: int) -> bytes:
+        if not self.available():
+            raise CodecError(f"Кодек {self.name} недоступен: нужен soundfile с поддержкой {self.subtype}")
+        buffer = io.BytesIO()
+        try:
+            soundfile.write(buffer, np.asarray(pcm, dtype=np.int16), samplerate,
+                            format=self.container, subtype=self.subtype)
+        except Exception as e:  # soundfile.LibsndfileError, RuntimeError в старых версиях
+            raise CodecError(f"Кодек {self.name}: ошибка кодирования ({samplerate} Гц): {e}") from e
+        return buffer.getvalue()
+
+    def encode_chunk(self, pcm: np.ndarray, samplerate: int) -> bytes:
+        raise CodecError(f"Кодек {self.name} не поддерживает потоковую выдачу")
+
+
+class FlacCodec(_SoundfileCodec):
+    name = FORMAT_FLAC
+    extension = "flac"
+    media_types = ("audio/flac", "audio/x-flac")
+    container = "FLAC"
+    subtype = "PCM_16"
+
+
+class OpusCodec(_SoundfileCodec):
+    name = FORMAT_OPUS
+    extension = "opus"
+    media_types = ("audio/ogg", "audio/opus")
+    container = "OGG"
+    subtype = "OPUS"
+
+    def content_type(self, samplerate: int) -> str:
+        return "audio/ogg; codecs=opus"
+
+    def output_rate(self, samplerate: int) -> int:
+        """Ближайшая частота Opus не ниже запрошенной (22050 -> 24000)."""
+        for rate in OPUS_SAMPLE_RATES:
+            if rate >= samplerate:
+                return rate
+        return OPUS_SAMPLE_RATES[-1]
+
+
+CODECS: Dict[str, Codec] = {
+    codec.name: codec
+    for codec in (WavCodec(), PcmCodec(), MulawCodec(), AlawCodec(), FlacCodec(), OpusCodec())
+}
+
+
+def get_codec(name: str, streaming: bool = False) -> Codec:
+    """
+    Кодек по имени формата.
+
+    :param streaming: кодек нужен для потокового ответа
+    :raises CodecError: формат неизвестен, недоступен или не потоковый
+    """
+    codec = CODECS.get((name or "").lower())
+    if codec is None:
+        raise CodecError(f"Неизвестный формат: {name} (доступны: {', '.join(available_formats())})")
+    if not codec.available():
+        raise CodecError(f"Формат {name} недоступен: нужен soundfile")
+    if streaming and not codec.streamable:
+        raise CodecError(f"Формат {name} не поддерживает потоковую выдачу")
+    return codec
+
+
+def select_codec(format_name: Optional[str], accept: Optional[str], streaming: bool = False) -> Codec:
+    """
+    Выбирает кодек: параметр `format`, иначе `Accept` (с учётом q),
+    иначе формат по умолчанию.
+
+    :raises CodecError: явно запрошенный формат недоступен
+    """
+    if format_name:
+        return get_codec(format_name, streaming)
+    for media_type in _accepted_types(accept):
+        if media_type in ("*/*", "audio/*"):
+            break
+        for codec in CODECS.values():
+            if media_type in (t.lower() for t in codec.media_types) and codec.available():
+                if codec.streamable or not streaming:
+                    return codec
+    return CODECS[DEFAULT_FORMAT]
+
+
+def available_formats() -> List[str]:
+    return [name for name, codec in CODECS.items() if codec.available()]
+
+
+def _accepted_types(accept: Optional[str]) -> List[str]:
+    """Типы из Accept по убыванию q (тип с q=0 исключается)."""
+    weighted = []
+    for position, item in enumerate((accept or "").split(",")):
+        parts = [part.strip() for part in item.split(";")]
+        if not parts[0]:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            weighted.append((-quality, position, parts[0].lower()))
+    return [media_type for _, _, media_type in sorted(weighted)]
+
+
+# --- G.711 -------------------------------------------------------------------
+# Границы сегментов из эталонной реализации g711.c (Sun Microsystems)
+
+_ULAW_SEGMENT_END = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF], dtype=np.int32)
+_ALAW_SEGMENT_END = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF], dtype=np.int32)
+_ULAW_BIAS = 0x21
+_ULAW_CLIP = 8159
+
+
+def linear_to_mulaw(pcm: np.ndarray) -> np.ndarray:
+    """int16 PCM -> байты G.711 μ-law (uint8)."""
+    value = np.asarray(pcm, dtype=np.int16).astype(np.int32) >> 2
+    mask = np.where(value < 0, 0x7F, 0xFF)
+    value = np.minimum(np.abs(value), _ULAW_CLIP) + _ULAW_BIAS
+    segment = np.searchsorted(_ULAW_SEGMENT_END, value)
+    encoded = np.where(segment >= 8, 0x7F, (segment << 4) | ((value >> (segment + 1)) & 0x0F))
+    return (encoded ^ mask).astype(np.uint8)
+
+
+def linear_to_alaw(pcm: np.ndarray) -> np.ndarray:
+    """int16 PCM -> байты G.711 A-law (uint8)."""
+    value = np.asarray(pcm, dtype=np.int16).astype(np.int32) >> 3
+    negative = value < 0
+    mask = np.where(negative, 0x55, 0xD5)
+    value = np.where(negative, -value - 1, value)
+    segment = np.searchsorted(_ALAW_SEGMENT_END, value)
+    mantissa = np.where(segment < 2, value >> 1, value >> np.maximum(segment, 1)) & 0x0F
+    encoded = np.where(segment >= 8, 0x7F, (segment << 4) | mantissa)
+    return (encoded ^ mask).astype(np.uint8)
+
+
+# --- Учёт ----------------------------------------------------------------------
+
+class CodecStats:
+    """Время кодирования и размер результата по кодекам."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def observe(self, codec: str, seconds: float, size: int, audio_seconds: float) -> None:
+        metrics.ENCODING_SECONDS.labels(format=codec).observe(seconds)
+        metrics.ENCODED_BYTES.labels(format=codec).inc(size)
+        with self._lock:
+            item = self._stats.setdefault(
+                codec, {"encodes": 0, "encode_seconds": 0.0, "bytes": 0, "audio_seconds": 0.0}
+            )
+            item["encodes"] += 1
+            item["encode_seconds"] += seconds
+            item["bytes"] += size
+            item["audio_seconds"] += audio_seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            result = {}
+            for codec, item in self._stats.items():
+                result[codec] = {
+                    "encodes": item["encodes"],
+                    "avg_encode_ms": round(item["encode_seconds"] / item["encodes"] * 1000, 3),
+                    "bytes": item["bytes"],
+                    "avg_bytes": round(item["bytes"] / item["encodes"]),
+                    # Средний битрейт результата
+                    "kbps": round(item["bytes"] * 8 / item["audio_seconds"] / 1000, 1)
+                    if item["audio_seconds"] else None,
+                }
+            return result
+
+
+codec_stats = CodecStats()
+
+
+def encode(codec: Codec, pcm: np.ndarray, samplerate: int) -> bytes:
+    """Кодирует фрагмент целиком с учётом времени и размера."""
+    started = time.perf_counter()
+    data = codec.encode(pcm, samplerate)
+    codec_stats.observe(codec.name, time.perf_counter() - started, len(data), len(pcm) / samplerate)
+    return data
@@ -0,0 +1,105 @@
+"""
+Бенчмарк приблизительного поиска слов: прежний перебор окон fuzz.ratio
+(по слову за раз) против FuzzyMatcher (все слова за один проход).
+Результаты обоих способов сверяются.
+
+Пример:
+    python -m app.utils.fuzzy_bench --words bad_words.txt --threshold 80
+    python -m app.utils.fuzzy_bench --keywords 500 --repeat 5
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from app.utils.fuzzy_matcher import FuzzyMatcher, Hit, fuzzy_find_reference
+from app.utils.utils import Utils
+
+
+DEFAULT_PHRASES = [
+    "Сегодня потрясающая погода, поедем гулять у пагоды?",
+    "Привет, кибер сова, расскажи, который сейчас час.",
+    "Включи, пожалуйста, свет в гостиной и выключи музыку на кухне.",
+    "Какая температура будет завтра утром в Москве и нужен ли зонтик?",
+    "Ты сегодня какая-то ленивая, давай поживее, сова!",
+    "Напомни мне через двадцать минут снять чайник с плиты.",
+]
+
+SYLLABLES = ["ба", "ва", "го", "ду", "же", "зи", "ка", "ло", "ма", "не", "по", "ру", "са", "ти", "фу", "ча"]
+
+
+def synthetic_keywords(count: int, seed: int = 0) -> List[str]:
+    """Псевдослова из слогов (от 2 до 5 слогов), без повторов."""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))))
+    return sorted(words)
+
+
+def reference_find(keywords: List[str], phrase: str, threshold: int) -> Dict[str, List[Hit]]:
+    found = {}
+    for keyword in keywords:
+        hits = fuzzy_find_reference(keyword, phrase, threshold)
+        if hits:
+            found[keyword] = hits
+    return found
+
+
+def run(keywords: List[str], phrases: List[str], threshold: int, repeat: int) -> dict:
+    """Меряет оба способа на всех фразах; время — медиана из repeat прогонов."""
+    started = time.perf_counter()
+    matcher = FuzzyMatcher(keywords, threshold)
+    compile_seconds = time.perf_counter() - started
+
+    reference_times, matcher_times = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        expected = [reference_find(keywords, phrase, threshold) for phrase in phrases]
+        reference_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        actual = [matcher.find(phrase) for phrase in phrases]
+        matcher_times.append(time.perf_counter() - started)
+
+    reference = statistics.median(reference_times) / len(phrases)
+    fast = statistics.median(matcher_times) / len(phrases)
+    return {
+        "keywords": len(keywords),
+        "phrases": len(phrases),
+        "compile_ms": compile_seconds * 1000,
+        "reference_ms": reference * 1000,
+        "matcher_ms": fast * 1000,
+        "speedup": reference / fast if fast else float("inf"),
+        "hits": sum(len(hits) for found in actual for hits in found.values()),
+        "identical": expected == actual,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк приблизительного поиска слов")
+    parser.add_argument("--words", help="справочник слов (по одному в строке, как bad_words_load)")
+    parser.add_argument("--keywords", type=int, default=300, help="псевдослов, если --words не задан")
+    parser.add_argument("--phrases", help="файл фраз (по одной в строке)")
+    parser.add_argument("--threshold", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    keywords = sorted(Utils.bad_words_load(args.words)) if args.words else synthetic_keywords(args.keywords)
+    phrases = DEFAULT_PHRASES
+    if args.phrases:
+        with open(args.phrases, encoding="utf-8") as f:
+            phrases = [line.strip() for line in f if line.strip()]
+
+    result = run(keywords, phrases, args.threshold, args.repeat)
+    print(f"Слов: {result['keywords']}, фраз: {result['phrases']}, порог {args.threshold}")
+    print(f"Сборка FuzzyMatcher: {result['compile_ms']:.1f} мс")
+    print(f"fuzz.ratio по окнам: {result['reference_ms']:8.2f} мс на фразу")
+    print(f"FuzzyMatcher:        {result['matcher_ms']:8.2f} мс на фразу")
+    print(f"Ускорение: ×{result['speedup']:.0f}, вхождений: {result['hits']}")
+    print("✅ Результаты совпадают" if result["identical"] else "❌ Результаты различаются")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Приблизительный поиск сразу всех слов справочника во фразе.
+
+Utils.fuzzy_find_fw сравнивает fuzz.ratio каждое окно фразы с одним словом —
+это O(длина фразы × длина слова) вызовов Python на слово, а в справочниках
+реакций сотни слов. FuzzyMatcher собирается один раз из всего справочника и
+находит те же вхождения за один проход по фразе.
+
+Для окна той же длины k, что и слово, fuzz.ratio (python-Levenshtein) — это
+доля общей подпоследовательности: 100 · LCS / k с округлением. LCS считается
+бит-параллельно (Allison–Dix, Hyyrö): слово — битовые маски его букв в
+uint64, окно — k шагов по две операции сложения. Слова одной длины идут
+одной матрицей numpy (окна × слова), поэтому число операций numpy зависит
+от числа разных длин слов, а не от числа слов.
+
+Слова длиннее 64 букв ищутся прежним способом (fuzzy_find_reference).
+
+    matcher = FuzzyMatcher(Utils.bad_words_load(path), threshold=80)
+    matcher.find("Сегодня потрясающая погода")
+    # {"пагода": [(20, "погода", 83)]}
+
+Бенчмарк против fuzz.ratio: python -m app.utils.fuzzy_bench
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from fuzzywuzzy import fuzz
+
+
+# Длина слова, помещающаяся в одну битовую маску
+WORD_BITS = 64
+
+# Вхождение: (позиция, фрагмент в исходном регистре, сходство 0–100)
+Hit = Tuple[int, str, int]
+
+# Число единичных битов в каждом байте
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount64(values: np.ndarray) -> np.ndarray:
+    """Число единичных битов в каждом элементе массива uint64 (по таблице байтов)."""
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    return _POPCOUNT8[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1, dtype=np.int64)
+
+
+def fuzzy_find_reference(keyword: str, phrase: str, threshold: int = 80) -> List[Hit]:
+    """
+    Прежний поиск: fuzz.ratio на каждом окне фразы длиной в слово.
+    Эталон для бенчмарка и поиск слов длиннее WORD_BITS.
+    """
+    kw = keyword.lower()
+    text = phrase.lower()
+    k = len(kw)
+    hits: List[Hit] = []
+    if k == 0 or k > len(text):
+        return hits
+    for i in range(len(text) - k + 1):
+        score = fuzz.ratio(kw, text[i:i + k])
+        if score >= threshold:
+            hits.append((i, phrase[i:i + k], score))
+    return hits
+
+
+def _score_table(k: int) -> List[int]:
+    """
+    fuzz.ratio для окна длины k по длине LCS (0..k). Считается самим
+    fuzz.ratio на строках с заданной LCS, чтобы округление совпадало до единицы.
+    """
+    return [fuzz.ratio("a" * k, "a" * lcs + "b" * (k - lcs)) for lcs in range(k + 1)]
+
+
+class _LengthGroup:
+    """Слова одной длины: маски букв (буква × слово) и порог по LCS."""
+
+    def __init__(self, length: int, words: List[str], alphabet: Dict[str, int], threshold: int):
+        self.length = length
+        self.words = words
+        # Строка 0 — буквы, которых нет ни в одном слове
+        self.masks = np.zeros((len(alphabet) + 1, len(words)), dtype=np.uint64)
+        for column, word in enumerate(words):
+            for bit, char in enumerate(word):
+                self.masks[alphabet[char], column] |= np.uint64(1 << bit)
+        self.word_mask = np.uint64((1 << length) - 1)
+        self.scores = np.array(_score_table(length), dtype=np.int64)
+        passing = np.flatnonzero(self.scores >= threshold)
+        self.min_lcs = int(passing[0]) if len(passing) else length + 1
+
+    def lcs(self, codes: np.ndarray) -> np.ndarray:
+        """LCS каждого окна длины length с каждым словом: матрица (окна × слова)."""
+        windows = len(codes) - self.length + 1
+        v = np.full((windows, len(self.words)), np.iinfo(np.uint64).max, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for j in range(self.length):
+                u = v & self.masks[codes[j:j + windows]]
+                v = (v + u) | (v - u)
+        return popcount64(~v & self.word_mask)
+
+
+class FuzzyMatcher:
+    """Приблизительный поиск набора слов, собранный один раз."""
+
+    def __init__(self, keywords: Iterable[str], threshold: int = 80):
+        """
+        :param keywords: слова справочника (регистр не важен)
+        :param threshold: минимальный процент сходства (0–100)
+        """
+        self._threshold = threshold
+        # Слово в нижнем регистре -> исходные написания из справочника
+        self._spellings: Dict[str, List[str]] = defaultdict(list)
+        for keyword in keywords:
+            if keyword:
+                self._spellings[keyword.lower()].append(keyword)
+
+        short = [word for word in self._spellings if len(word) <= WORD_BITS]
+        self._long = [word for word in self._spellings if len(word) > WORD_BITS]
+        chars = sorted({char for word in short for char in word})
+        self._alphabet = np.array([ord(char) for char in chars], dtype=np.uint32)
+        index = {char: i + 1 for i, char in enumerate(chars)}
+
+        by_length: Dict[int, List[str]] = defaultdict(list)
+        for word in short:
+            by_length[len(word)].append(word)
+        self._groups = [
+            _LengthGroup(length, words, index, threshold) for length, words in sorted(by_length.items())
+        ]
+
+    def __len__(self) -> int:
+        return len(self._spellings)
+
+    def find(self, phrase: str) -> Dict[str, List[Hit]]:
+        """
+        Вхождения всех слов во фразу — те же, что у fuzzy_find_fw для
+        каждого слова по отдельности.
+
+        :return: слово справочника -> [(позиция, фрагмент, сходство)] по
+                 возрастанию позиции; слова без вхождений не попадают
+        """
+        text = phrase.lower()
+        codes = self._encode(text)
+        found: Dict[str, List[Hit]] = {}
+        for group in self._groups:
+            if group.length > len(text):
+                break
+            lcs = group.lcs(codes)
+            positions, columns = np.nonzero(lcs >= group.min_lcs)
+            if not len(positions):
+                continue
+            scores = group.scores[lcs[positions, columns]]
+            # nonzero идёт по окнам — внутри слова позиции уже по порядку
+            for position, column, score in zip(positions.tolist(), columns.tolist(), scores.tolist()):
+                hit = (position, phrase[position:position + group.length], score)
+                found.setdefault(group.words[column], []).append(hit)
+        for word in self._long:
+            hits = fuzzy_find_reference(word, phrase, self._threshold)
+            if hits:
+                found[word] = hits
+        return {
+            spelling: hits for word, hits in found.items() for spelling in self._spellings[word]
+        }
+
+    def _encode(self, text: str) -> np.ndarray:
+        """Номера букв текста в алфавите слов (0 — буква не встречается в словах)."""
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype="<u4")
+        if not len(self._alphabet):
+            return np.zeros(len(codes), dtype=np.intp)
+        index = np.searchsorted(self._alphabet, codes)
+        clipped = np.minimum(index, len(self._alphabet) - 1)
+        return np.where(self._alphabet[clipped] == codes, clipped + 1, 0)
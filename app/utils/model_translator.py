@@ -1,21 +1,237 @@
+"""
+Компиляция модели Silero для быстрого инференса на CPU.
+
+Собирает варианты внутренней сети модели silero_model_ru.pt:
+- TorchScript (замороженный граф),
+- TorchScript с динамической int8-квантизацией,
+и сравнивает их с eager-моделью: real-time factor, память и похожесть
+выходного аудио. Каждый вариант замеряется в отдельном свежем процессе:
+в общем процессе аллокатор отдаёт следующей модели память, освобождённую
+предыдущей, и прирост RSS ничего не говорит о выигрыше в памяти.
+
+Запуск:
+    cyber-owl-tts compile [--backends torchscript,int8] [--no-compare]
+"""
+
+import argparse
+import multiprocessing
 import os
-import torch
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List
 
-CURRENT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
-LOCAL_MODEL_PATH = os.path.join(CURRENT_DIRECTORY, "..", "models")
+import numpy as np
+import torch
 
-model, _ = torch.hub.load(
-    repo_or_dir=LOCAL_MODEL_PATH,
-    model='silero_model_ru',
-    language='ru',
-    speaker='v4_ru'
+from app.core.model_backends import (
+    BACKEND_EAGER,
+    BACKEND_INT8,
+    BACKEND_TORCHSCRIPT,
+    EXTRA_INNER_ATTR,
+    EXTRA_SOURCE_VERSION,
+    compiled_model_path,
+    inner_modules,
 )
+from app.core.text_to_speech import SPEAKER_KSENIYA, load_model
+
+
+COMPILED_BACKENDS = (BACKEND_TORCHSCRIPT, BACKEND_INT8)
+SAMPLE_RATE = 48000
+
+COMPARE_TEXTS = [
+    "Привет, я кибер сова.",
+    "Сейчас двенадцать часов пять минут.",
+    "Внимание! Начинается проверка всех систем, пожалуйста, не выключайте питание.",
+]
+
+
+# --- Компиляция --------------------------------------------------------------
+
+def _main_module(model):
+    """Самая крупная внутренняя сеть модели: (имя атрибута, модуль)."""
+    modules = inner_modules(model)
+    if not modules:
+        raise ValueError("В модели не найдено ни одного nn.Module")
+    name, module = max(modules, key=lambda item: sum(p.numel() for p in item[1].parameters()))
+    if not name:
+        raise ValueError("Модель сама является nn.Module — подменить внутреннюю сеть нельзя")
+    return name, module.eval()
+
+
+def _script(module: torch.nn.Module) -> torch.jit.ScriptModule:
+    if isinstance(module, torch.jit.ScriptModule):
+        return module
+    return torch.jit.script(module)
+
+
+def _freeze(scripted: torch.jit.ScriptModule) -> torch.jit.ScriptModule:
+    """Замораживает граф, сохраняя публичные методы, которые зовёт обёртка Silero."""
+    methods = [name for name in scripted._c._method_names() if not name.startswith("_")]
+    try:
+        return torch.jit.freeze(scripted, preserved_attrs=methods)
+    except Exception as e:
+        print(f"⚠️  Заморозка графа не удалась ({e}), сохраняем без неё")
+        return scripted
+
+
+def _quantize_int8(module: torch.nn.Module) -> torch.jit.ScriptModule:
+    if isinstance(module, torch.jit.ScriptModule):
+        from torch.ao.quantization import default_dynamic_qconfig, quantize_dynamic_jit
+
+        return quantize_dynamic_jit(module, {"": default_dynamic_qconfig})
+    quantized = torch.ao.quantization.quantize_dynamic(
+        module, {torch.nn.Linear, torch.nn.LSTM, torch.nn.GRU}, dtype=torch.qint8
+    )
+    return torch.jit.script(quantized)
+
+
+def compile_models(backends: List[str]) -> Dict[str, str]:
+    """
+    Собирает скомпилированные варианты модели.
+
+    :param backends: подмножество COMPILED_BACKENDS
+    :return: {бэкенд: путь к файлу}
+    """
+    result = {}
+    for backend in backends:
+        model, version = load_model(torch.device("cpu"), BACKEND_EAGER)
+        name, module = _main_module(model)
+        print(f"🔧 {backend}: компилируем {type(module).__name__} (атрибут '{name}')")
+        with torch.no_grad():
+            if backend == BACKEND_TORCHSCRIPT:
+                compiled = _freeze(_script(module))
+            elif backend == BACKEND_INT8:
+                compiled = _quantize_int8(module)
+            else:
+                raise ValueError(f"Бэкенд {backend} не компилируется")
+
+        path = compiled_model_path(backend)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        torch.jit.save(
+            compiled,
+            path,
+            _extra_files={EXTRA_INNER_ATTR: name, EXTRA_SOURCE_VERSION: version},
+        )
+        print(f"✅ Модель успешно сохранена: {path}")
+        result[backend] = path
+    return result
+
+
+# --- Сравнение ---------------------------------------------------------------
+
+def _memory_mb() -> Dict[str, float]:
+    """RSS и PSS текущего процесса из /proc, МБ (пусто, если /proc недоступен)."""
+    result = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("Rss", "Pss"):
+                    result[name.lower()] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return result
+
+
+def _in_fresh_process(func: Callable, *args):
+    """Выполняет func(*args) в новом процессе (spawn: без памяти и потоков родителя)."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(func, *args).result()
+
+
+def _similarity(reference: np.ndarray, audio: np.ndarray) -> float:
+    """Косинусная близость по общей длине, умноженная на отношение длин."""
+    n = min(len(reference), len(audio))
+    if n == 0:
+        return 0.0
+    a, b = reference[:n], audio[:n]
+    denom = float(np.linalg.norm(a) * np.linalg.norm(b))
+    cosine = float(np.dot(a, b)) / denom if denom else 0.0
+    return cosine * n / max(len(reference), len(audio))
+
+
+def _run_backend(backend: str, texts: List[str]) -> dict:
+    """Замер одного варианта; вызывается в отдельном процессе (см. _in_fresh_process)."""
+    before = _memory_mb()
+    model, _ = load_model(torch.device("cpu"), backend)
+    loaded = _memory_mb()
+
+    with torch.inference_mode():
+        model.apply_tts(text=texts[0], speaker=SPEAKER_KSENIYA, sample_rate=SAMPLE_RATE)  # прогрев
+        outputs, elapsed, duration = [], 0.0, 0.0
+        for text in texts:
+            started = time.perf_counter()
+            audio = model.apply_tts(text=text, speaker=SPEAKER_KSENIYA, sample_rate=SAMPLE_RATE)
+            elapsed += time.perf_counter() - started
+            audio = audio.detach().cpu().numpy().astype(np.float32).reshape(-1)
+            duration += len(audio) / SAMPLE_RATE
+            outputs.append(audio)
+
+    # PSS после инференса: веса модели плюс рабочие буферы
+    after = _memory_mb()
+    path = None if backend == BACKEND_EAGER else compiled_model_path(backend)
+    return {
+        "backend": backend,
+        "rtf": elapsed / duration if duration else float("inf"),
+        "rss_delta_mb": loaded["rss"] - before["rss"] if "rss" in before else None,
+        "pss_mb": after.get("pss"),
+        "file_mb": os.path.getsize(path) / 1024 / 1024 if path else None,
+        "outputs": outputs,
+    }
+
+
+def compare_backends(backends: List[str], texts: List[str], min_similarity: float) -> bool:
+    """
+    Печатает сравнение вариантов с eager-моделью. Каждый вариант (и eager)
+    загружается в своём процессе: RSS Δ — прирост от загрузки модели,
+    PSS — память процесса после инференса.
+
+    :return: True, если все варианты прошли проверку похожести
+    """
+    rows = [_in_fresh_process(_run_backend, backend, texts) for backend in [BACKEND_EAGER] + backends]
+    reference = rows[0]
+
+    ok = True
+    print(f"{'backend':<12} {'RTF':>7} {'RSS Δ, MB':>10} {'PSS, MB':>8} {'file, MB':>9} {'similarity':>11}")
+    for row in rows:
+        similarity = min(_similarity(r, o) for r, o in zip(reference["outputs"], row["outputs"]))
+        passed = similarity >= min_similarity
+        ok = ok and passed
+        rss = "—" if row["rss_delta_mb"] is None else f"{row['rss_delta_mb']:.1f}"
+        pss = "—" if row["pss_mb"] is None else f"{row['pss_mb']:.1f}"
+        size = "—" if row["file_mb"] is None else f"{row['file_mb']:.1f}"
+        print(f"{row['backend']:<12} {row['rtf']:>7.3f} {rss:>10} {pss:>8} {size:>9} "
+              f"{similarity:>11.3f} {'OK' if passed else 'FAIL'}")
+    return ok
+
+
+# --- Командная строка --------------------------------------------------------
+
+def run(args: argparse.Namespace) -> int:
+    """Точка входа команды `cyber-owl-tts compile`."""
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    unknown = [b for b in backends if b not in COMPILED_BACKENDS]
+    if unknown:
+        print(f"❌ Неизвестные бэкенды: {unknown}")
+        return 2
+
+    compiled = []
+    for backend in backends:
+        try:
+            compile_models([backend])
+            compiled.append(backend)
+        except Exception as e:
+            print(f"❌ {backend}: компиляция не удалась: {e}")
+
+    if args.no_compare or not compiled:
+        return 0 if len(compiled) == len(backends) else 1
+    ok = compare_backends(compiled, COMPARE_TEXTS, args.min_similarity)
+    return 0 if ok and len(compiled) == len(backends) else 1
+
 
-# Экспорт в TorchScript
-model = model.to('cpu')
-scripted_model = torch.jit.script(model)
+if __name__ == "__main__":
+    import sys
 
-os.makedirs('models', exist_ok=True)
-torch.jit.save(scripted_model, 'models/silero_model_ru_jit.pt')
+    from app.cli import main
 
-print("✅ Модель успешно сохранена: models/silero_model_ru_jit.pt")
\ No newline at end of file
+    sys.exit(main(["compile"] + sys.argv[1:]))
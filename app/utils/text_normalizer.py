@@ -0,0 +1,382 @@
+"""
+Канонизация текста перед синтезом и кэшем аудио.
+
+Одинаково звучащие запросы приходят в разном написании: «Привет!»,
+« привет! », «Привет!!!», «14:05» и «четырнадцать часов пять минут». Ключ
+кэша строится по канонической форме, поэтому такие запросы попадают в одну
+запись, а модель получает текст, который умеет читать (цифры Silero не
+произносит).
+
+Обычный текст:
+- пробелы и переводы строк схлопываются (граница абзаца сохраняется);
+- кавычки убираются, тире и многоточия приводятся к одному виду, повторы
+  знаков схлопываются, пробелы перед знаками убираются, после — ставятся;
+- запятые, двоеточия и тире на краях текста отбрасываются; знаки конца
+  предложения (. ! ?) остаются — они меняют интонацию, поэтому «Привет!»
+  и «привет» — разные записи кэша;
+- даты (ДД.ММ.ГГГГ), время (ЧЧ:ММ[:СС] по 24-часовой шкале, через
+  time_to_text), проценты и дробные числа записываются словами; целые
+  числа остаются цифрами: падеж числительного зависит от контекста
+  («в 2025 году»), правилами его не согласовать;
+- регистр приводится к нижнему (модель к нему нечувствительна).
+
+SSML канонизируется по структуре: документ разбирается, атрибуты
+сортируются, паузы приводятся к миллисекундам, текстовые узлы проходят те же
+правила, пробелы между тегами отбрасываются.
+
+Все регулярные выражения скомпилированы при импорте; результаты кэшируются
+(LRU) по исходной строке.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from app.config.config import TTS_NORMALIZE_TEXT, TTS_NORMALIZER_CACHE_SIZE
+from app.utils.time2words import number_to_words, plural, time_to_text
+
+
+# --- Числа словами -------------------------------------------------------------
+
+_UNITS = ("ноль", "один", "два", "три", "четыре", "пять", "шесть", "семь", "восемь", "девять")
+_UNITS_F = ("ноль", "одна", "две") + _UNITS[3:]
+_TEENS = ("десять", "одиннадцать", "двенадцать", "тринадцать", "четырнадцать",
+          "пятнадцать", "шестнадцать", "семнадцать", "восемнадцать", "девятнадцать")
+_TENS = ("", "", "двадцать", "тридцать", "сорок", "пятьдесят",
+         "шестьдесят", "семьдесят", "восемьдесят", "девяносто")
+_HUNDREDS = ("", "сто", "двести", "триста", "четыреста", "пятьсот",
+             "шестьсот", "семьсот", "восемьсот", "девятьсот")
+# (формы для 1, 2–4, 5+; женский род)
+_SCALES = (
+    (("тысяча", "тысячи", "тысяч"), True),
+    (("миллион", "миллиона", "миллионов"), False),
+    (("миллиард", "миллиарда", "миллиардов"), False),
+    (("триллион", "триллиона", "триллионов"), False),
+)
+MAX_CARDINAL = 10 ** 15 - 1
+
+# Порядковые: основы и окончания (именительный средний род / родительный)
+_ORDINAL_STEMS = {
+    1: "перв", 2: "втор", 3: "трет", 4: "четвёрт", 5: "пят", 6: "шест", 7: "седьм",
+    8: "восьм", 9: "девят", 10: "десят", 11: "одиннадцат", 12: "двенадцат",
+    13: "тринадцат", 14: "четырнадцат", 15: "пятнадцат", 16: "шестнадцат",
+    17: "семнадцат", 18: "восемнадцат", 19: "девятнадцат", 20: "двадцат",
+    30: "тридцат", 40: "сороков", 50: "пятидесят", 60: "шестидесят",
+    70: "семидесят", 80: "восьмидесят", 90: "девяност",
+}
+_HUNDREDS_ORDINAL_GEN = ("", "сотого", "двухсотого", "трёхсотого", "четырёхсотого", "пятисотого",
+                         "шестисотого", "семисотого", "восьмисотого", "девятисотого")
+_THOUSANDS_ORDINAL_GEN = ("", "тысячного", "двухтысячного", "трёхтысячного")
+
+_MONTHS_GEN = ("", "января", "февраля", "марта", "апреля", "мая", "июня", "июля",
+               "августа", "сентября", "октября", "ноября", "декабря")
+
+_FRACTIONS = (("десятая", "десятых", "десятых"), ("сотая", "сотых", "сотых"),
+              ("тысячная", "тысячных", "тысячных"))
+_WHOLE = ("целая", "целых", "целых")
+_PERCENT = ("процент", "процента", "процентов")
+
+
+def _plural_form(n: int, forms: Tuple[str, str, str]) -> str:
+    if 11 <= n % 100 <= 14:
+        return forms[2]
+    if n % 10 == 1:
+        return forms[0]
+    if 2 <= n % 10 <= 4:
+        return forms[1]
+    return forms[2]
+
+
+def _triple_to_words(n: int, feminine: bool = False) -> List[str]:
+    """0‥999 словами (пусто для нуля)."""
+    words = []
+    hundreds, rest = divmod(n, 100)
+    if hundreds:
+        words.append(_HUNDREDS[hundreds])
+    if 10 <= rest < 20:
+        words.append(_TEENS[rest - 10])
+    else:
+        tens, units = divmod(rest, 10)
+        if tens:
+            words.append(_TENS[tens])
+        if units:
+            words.append((_UNITS_F if feminine else _UNITS)[units])
+    return words
+
+
+def cardinal(n: int, feminine: bool = False) -> str:
+    """
+    Количественное числительное (именительный падеж).
+
+    :param n: число до 10^15 (больше — по цифрам)
+    :param feminine: женский род последнего разряда («одна», «две»)
+    """
+    if n < 0:
+        return f"минус {cardinal(-n, feminine)}"
+    if n == 0:
+        return _UNITS[0]
+    if n > MAX_CARDINAL:
+        return " ".join(_UNITS[int(d)] for d in str(n))
+    words = _triple_to_words(n % 1000, feminine)
+    n //= 1000
+    for forms, scale_feminine in _SCALES:
+        if n == 0:
+            break
+        n, group = divmod(n, 1000)
+        if group == 1 and scale_feminine and n == 0:
+            words = [forms[0]] + words  # «тысяча», а не «одна тысяча» (но «два миллиона одна тысяча»)
+        elif group:
+            words = _triple_to_words(group, scale_feminine) + [_plural_form(group, forms)] + words
+    return " ".join(words)
+
+
+def _ordinal(n: int, genitive: bool) -> str:
+    """Порядковое 1‥99 в среднем роде: «пятое» или «пятого»."""
+    if n in _ORDINAL_STEMS:
+        stem = _ORDINAL_STEMS[n]
+    else:
+        tens, units = divmod(n, 10)
+        return f"{_TENS[tens]} {_ordinal(units, genitive)}"
+    if n == 3:
+        return stem + ("ьего" if genitive else "ье")
+    return stem + ("ого" if genitive else "ое")
+
+
+def year_ordinal(year: int) -> str:
+    """Год 1000‥3999 порядковым в родительном падеже: «две тысячи двадцать пятого»."""
+    thousands, rest = divmod(year, 1000)
+    hundreds, tail = divmod(rest, 100)
+    if tail:
+        prefix = cardinal(year - tail)
+        return f"{prefix} {_ordinal(tail, genitive=True)}"
+    if hundreds:
+        return f"{cardinal(thousands * 1000)} {_HUNDREDS_ORDINAL_GEN[hundreds]}"
+    return _THOUSANDS_ORDINAL_GEN[thousands]
+
+
+def decimal(whole: int, fraction: str, negative: bool = False) -> str:
+    """Дробь: «три целых пять десятых» (до трёх знаков после запятой)."""
+    numerator = int(fraction)
+    words = (
+        f"{cardinal(whole, feminine=True)} {_plural_form(whole, _WHOLE)} "
+        f"{cardinal(numerator, feminine=True)} {_plural_form(numerator, _FRACTIONS[len(fraction) - 1])}"
+    )
+    return f"минус {words}" if negative else words
+
+
+# --- Правила -------------------------------------------------------------------
+
+# Кавычки не произносятся
+QUOTES_RE = re.compile(r"[\"«»„“”‟]")
+DASH_RE = re.compile(r"\s+[-–—―]+\s+")
+ELLIPSIS_RE = re.compile(r"\.{3,}|…+")
+REPEATED_PUNCT_RE = re.compile(r"([!?,;:])\1+")
+SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([,.!?…;:])")
+# После знака препинания — пробел (кроме чисел «3,5» и сокращений «т.е.»)
+SPACE_AFTER_PUNCT_RE = re.compile(r"([,!?…;:])(?=[^\s\d!?…,;:)\]])")
+PARAGRAPH_RE = re.compile(r"\s*\n\s*\n\s*")
+SPACES_RE = re.compile(r"[^\S\n]+|(?<!\n)\n(?!\n)")
+EDGE_START_RE = re.compile(r"^(?:[\s,;:—]|-(?!\d))+")  # «-5» в начале — число
+EDGE_END_RE = re.compile(r"[\s,;:—-]+$")
+
+DATE_RE = re.compile(r"\b(0?[1-9]|[12]\d|3[01])\.(0?[1-9]|1[0-2])\.([1-3]\d{3})\b")
+TIME_RE = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)(?::([0-5]\d))?\b")
+PERCENT_RE = re.compile(r"(?<![\w.,])(-?)(\d+)(?:[.,](\d{1,3}))?\s?%")
+DECIMAL_RE = re.compile(r"(?<![\w.,])(-?)(\d+)[.,](\d{1,3})(?![.,]?\d)")
+# Разряды через пробел: «1 000 000»
+DIGIT_GROUP_RE = re.compile(r"(?<=\d)[ \u00a0\u202f](?=\d{3}\b)")
+
+
+def _expand_date(match: re.Match) -> str:
+    day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+    return f"{_ordinal(day, genitive=False)} {_MONTHS_GEN[month]} {year_ordinal(year)} года"
+
+
+def _expand_time(match: re.Match) -> str:
+    hours, minutes = int(match.group(1)), int(match.group(2))
+    words = time_to_text((hours, minutes), hours24=True)
+    if match.group(3) and int(match.group(3)):
+        seconds = int(match.group(3))
+        words += f" {number_to_words(seconds, feminine=True)} {plural('секунда', seconds)}"
+    return words
+
+
+def _expand_percent(match: re.Match) -> str:
+    negative, whole, fraction = match.group(1) == "-", int(match.group(2)), match.group(3)
+    if fraction:
+        return f"{decimal(whole, fraction, negative)} {_PERCENT[1]}"
+    return f"{cardinal(-whole if negative else whole)} {_plural_form(whole, _PERCENT)}"
+
+
+def _expand_decimal(match: re.Match) -> str:
+    return decimal(int(match.group(2)), match.group(3), match.group(1) == "-")
+
+
+def _canonical_spacing(text: str) -> str:
+    text = PARAGRAPH_RE.sub("\n\n", text)
+    return SPACES_RE.sub(" ", text)
+
+
+def normalize_plain(text: str, strip_edges: bool = True) -> str:
+    """
+    Каноническая форма обычного текста.
+
+    :param text: исходный текст
+    :param strip_edges: отбросить пробелы и слабые знаки на краях (для текста
+                        внутри SSML-тегов края значимы)
+    """
+    text = unicodedata.normalize("NFC", text)
+    text = QUOTES_RE.sub("", text)
+    text = ELLIPSIS_RE.sub("…", text)
+    text = REPEATED_PUNCT_RE.sub(r"\1", text)
+    text = DASH_RE.sub(" — ", text)
+
+    text = DIGIT_GROUP_RE.sub("", text)
+    text = DATE_RE.sub(_expand_date, text)
+    text = TIME_RE.sub(_expand_time, text)
+    text = PERCENT_RE.sub(_expand_percent, text)
+    text = DECIMAL_RE.sub(_expand_decimal, text)
+
+    text = SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
+    text = SPACE_AFTER_PUNCT_RE.sub(r"\1 ", text)
+    text = _canonical_spacing(text).lower()
+    if strip_edges:
+        text = EDGE_END_RE.sub("", EDGE_START_RE.sub("", text))
+    return text
+
+
+# --- SSML ----------------------------------------------------------------------
+
+BREAK_TIME_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s)\s*$", re.I)
+# Пауза сама разделяет слова: пробелы вокруг неё не значимы
+SPACES_AROUND_BREAK_RE = re.compile(r"\s*(<break\b[^>]*/>)\s*")
+
+
+def normalize_ssml(text: str) -> str:
+    """
+    Каноническая форма SSML-документа; неразборный документ — как обычный
+    текст с сохранёнными тегами (только пробелы).
+    """
+    try:
+        root = ET.fromstring(text.strip())
+    except ET.ParseError:
+        return _canonical_spacing(text).strip()
+    parts: List[str] = []
+    _serialize(root, parts)
+    return SPACES_AROUND_BREAK_RE.sub(r"\1", "".join(parts))
+
+
+def _serialize(element: ET.Element, parts: List[str]) -> None:
+    tag = element.tag.rsplit("}", 1)[-1].lower()
+    attributes = "".join(
+        f" {name.rsplit('}', 1)[-1].lower()}={quoteattr(_attribute(tag, name.lower(), value))}"
+        for name, value in sorted(element.attrib.items(), key=lambda item: item[0].lower())
+        if not name.startswith("{http://www.w3.org/2000/xmlns")
+    )
+    content: List[str] = []
+    if element.text:
+        content.append(_ssml_text(element.text))
+    for child in element:
+        _serialize(child, content)
+        if child.tail:
+            content.append(_ssml_text(child.tail))
+    body = "".join(content).strip() if tag == "speak" else "".join(content)
+    parts.append(f"<{tag}{attributes}>{body}</{tag}>" if body else f"<{tag}{attributes}/>")
+
+
+def _attribute(tag: str, name: str, value: str) -> str:
+    value = " ".join(value.split())
+    if tag == "break" and name == "time":
+        match = BREAK_TIME_RE.match(value)
+        if match:
+            amount = float(match.group(1)) * (1000 if match.group(2).lower() == "s" else 1)
+            return f"{int(round(amount))}ms"
+    return value.lower() if name != "alias" else value
+
+
+def _ssml_text(text: str) -> str:
+    """Текстовый узел: те же правила, пробелы на краях — не более одного."""
+    if not text.strip():
+        return ""
+    normalized = normalize_plain(text, strip_edges=False)
+    return escape(normalized)
+
+
+# --- Нормализатор с кэшем и учётом ---------------------------------------------
+
+class TextNormalizer:
+    """
+    Канонизация с LRU-кэшем по исходной строке и счётчиками: время
+    нормализации и сколько запросов стали совпадать с уже виденными только
+    благодаря канонизации (прирост попаданий в кэш аудио).
+    """
+
+    def __init__(self, cache_size: int = 4096, enabled: bool = True):
+        self._cache_size = cache_size
+        self._enabled = enabled
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        # Канонические формы, уже отданные (для оценки прироста попаданий)
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._calls = 0
+        self._cache_hits = 0
+        self._seconds = 0.0
+        self._merged = 0
+
+    def normalize(self, text: str) -> str:
+        """Каноническая форма текста или SSML."""
+        if not self._enabled:
+            return text
+        with self._lock:
+            self._calls += 1
+            canonical = self._cache.get(text)
+            if canonical is not None:
+                self._cache.move_to_end(text)
+                self._cache_hits += 1
+                return canonical
+
+        started = time.perf_counter()
+        if "<speak" in text:
+            canonical = normalize_ssml(text)
+        else:
+            canonical = normalize_plain(text) or text.strip()
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._seconds += elapsed
+            if canonical in self._seen:
+                # Новое написание уже виденного текста
+                self._merged += 1
+                self._seen.move_to_end(canonical)
+            else:
+                self._remember(self._seen, canonical, None)
+            self._remember(self._cache, text, canonical)
+        return canonical
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            computed = self._calls - self._cache_hits
+            return {
+                "enabled": self._enabled,
+                "calls": self._calls,
+                "cache_hits": self._cache_hits,
+                "cache_entries": len(self._cache),
+                "avg_normalize_ms": round(self._seconds / computed * 1000, 4) if computed else None,
+                "total_normalize_ms": round(self._seconds * 1000, 3),
+                # Разные написания, сведённые к уже виденной канонической форме
+                "merged_spellings": self._merged,
+                "merged_ratio": round(self._merged / computed, 4) if computed else 0.0,
+            }
+
+    def _remember(self, store: OrderedDict, key: str, value: Optional[str]) -> None:
+        store[key] = value
+        if len(store) > self._cache_size:
+            store.popitem(last=False)
+
+
+normalizer = TextNormalizer(TTS_NORMALIZER_CACHE_SIZE, TTS_NORMALIZE_TEXT)
@@ -0,0 +1,167 @@
+"""
+Разбиение текста на предложения для конвейерного синтеза.
+
+Обычный текст режется по концу предложения (. ! ? …) и по переносам строк.
+SSML (`<speak>`) режется по `</p>`, `</s>` и концам предложений внутри текста;
+каждый фрагмент — самостоятельный документ `<speak>…</speak>`, в котором
+незакрытые на границе теги (например, `<prosody>`) закрываются и заново
+открываются в следующем фрагменте.
+
+Текст, поступающий по частям (токены LLM), режет `SentenceStream`.
+"""
+
+import re
+from typing import Iterator, List, Optional, Tuple
+
+
+# Предложение: до знака(ов) конца предложения, за которыми пробел или конец
+# строки, либо до пустой строки (граница абзаца), либо до конца текста
+SENTENCE_RE = re.compile(r"(?=\S).*?(?:[.!?…]+[\"»)\]]*(?=\s|\Z)|(?=\n\s*\n)|\Z)", re.S)
+SENTENCE_END_RE = re.compile(r"[.!?…]+[\"»)\]]*\s*\Z")
+SSML_TOKEN_RE = re.compile(r"<[^>]+>|[^<]+")
+SSML_TAG_NAME_RE = re.compile(r"</?\s*([a-zA-Z_][\w:-]*)")
+
+# Теги, закрытие которых — граница фрагмента
+SSML_BLOCK_TAGS = ("p", "s")
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Делит обычный текст на предложения.
+
+    :param text: исходный текст
+    :return: непустые предложения с сохранённой пунктуацией
+    """
+    return [sentence.strip() for sentence, _ in iter_sentences(text)]
+
+
+def split_ssml(text: str) -> List[str]:
+    """
+    Делит SSML-документ на самостоятельные SSML-фрагменты по предложениям.
+
+    :param text: документ `<speak>…</speak>`
+    :return: список документов `<speak>…</speak>`
+    """
+    chunks: List[str] = []
+    stack: List[str] = []  # открытые теги (полный текст открывающего тега)
+    current: List[str] = []
+    has_text = False
+
+    def flush() -> None:
+        nonlocal current, has_text
+        body = "".join(current)
+        closing = "".join(f"</{_tag_name(tag)}>" for tag in reversed(stack))
+        if has_text:
+            chunks.append(f"<speak>{body}{closing}</speak>")
+        elif body.strip() and chunks:
+            # Фрагмент без текста (например, одиночный <break/>) — в конец предыдущего
+            chunks[-1] = chunks[-1][: -len("</speak>")] + body + "</speak>"
+        current = list(stack)
+        has_text = False
+
+    for token in SSML_TOKEN_RE.findall(text):
+        if token.startswith("<"):
+            name = _tag_name(token)
+            if name == "speak" or token.startswith("<?") or token.startswith("<!"):
+                continue
+            if token.startswith("</"):
+                if current and _tag_name(current[-1]) == name and not current[-1].startswith("</"):
+                    current.pop()  # пустой элемент (тег переоткрыт после границы)
+                else:
+                    current.append(token)
+                if stack and _tag_name(stack[-1]) == name:
+                    stack.pop()
+                if name in SSML_BLOCK_TAGS:
+                    flush()
+            elif token.endswith("/>"):
+                current.append(token)
+            else:
+                current.append(token)
+                stack.append(token)
+            continue
+
+        for sentence, terminated in iter_sentences(token):
+            current.append(sentence)
+            has_text = True
+            if terminated:
+                flush()
+    flush()
+
+    if not chunks:
+        return [text]
+    return chunks
+
+
+def split_text(text: str) -> List[str]:
+    """Делит текст или SSML на фрагменты для конвейерного синтеза."""
+    if "<speak>" in text:
+        return split_ssml(text)
+    return split_sentences(text) or [text]
+
+
+class SentenceStream:
+    """
+    Инкрементальное разбиение: текст подаётся по частям, законченные
+    предложения отдаются сразу.
+
+    Предложение считается законченным, только когда после него уже пришёл
+    следующий символ: «3.» может оказаться началом «3.5», а «Привет!» —
+    началом «Привет!..». Хвост без знаков конца предложения длиннее
+    max_chars отдаётся по границе слова, чтобы не копить задержку.
+    """
+
+    def __init__(self, max_chars: Optional[int] = None):
+        self._buffer = ""
+        self._max_chars = max_chars
+
+    @property
+    def pending(self) -> str:
+        """Накопленный, ещё не отданный текст."""
+        return self._buffer
+
+    def feed(self, fragment: str) -> List[str]:
+        """
+        Добавляет фрагмент текста.
+
+        :param fragment: очередная часть текста
+        :return: предложения, законченные с приходом фрагмента
+        """
+        self._buffer += fragment
+        sentences = []
+        consumed = 0
+        for match in SENTENCE_RE.finditer(self._buffer):
+            if match.end() >= len(self._buffer):
+                break  # хвост может продолжиться следующим фрагментом
+            sentences.append(match.group(0).strip())
+            consumed = match.end()
+        self._buffer = self._buffer[consumed:]
+
+        while self._max_chars and len(self._buffer) > self._max_chars:
+            cut = self._buffer.rfind(" ", 0, self._max_chars + 1)
+            if cut <= 0:
+                cut = self._max_chars
+            sentences.append(self._buffer[:cut].strip())
+            self._buffer = self._buffer[cut:].lstrip()
+        return [sentence for sentence in sentences if sentence]
+
+    def flush(self) -> List[str]:
+        """Отдаёт накопленный хвост как есть (конец реплики или явный flush)."""
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+    def clear(self) -> None:
+        """Отбрасывает накопленный текст."""
+        self._buffer = ""
+
+
+def iter_sentences(text: str) -> Iterator[Tuple[str, bool]]:
+    """Перебирает предложения текста с признаком «предложение завершено»."""
+    for match in SENTENCE_RE.finditer(text):
+        sentence = match.group(0)
+        terminated = match.end() < len(text) or bool(SENTENCE_END_RE.search(sentence))
+        yield sentence, terminated
+
+
+def _tag_name(tag: str) -> str:
+    match = SSML_TAG_NAME_RE.match(tag)
+    return match.group(1).lower() if match else ""
@@ -89,12 +89,14 @@ def parse_time(
 # --- Главная функция --------------------------
 def time_to_text(
         time_: Union[str, Tuple[int, int], dt.time, dt.datetime],
-        style: str = 'formal'  # 'formal' | 'spoken'
+        style: str = 'formal',  # 'formal' | 'spoken'
+        hours24: bool = False
 ) -> str:
     """
     Перевод времени в слова.
     style = 'formal'  ➜  «двенадцать часов пять минут»
     style = 'spoken'  ➜  «пять минут первого», «без четверти двенадцать»
+    hours24 = True    ➜  деловой стиль по 24-часовой шкале: «четырнадцать часов пять минут»
     """
     h, m, s = parse_time(time_)
     if not (0 <= h <= 23 and 0 <= m <= 59 and 0 <= s <= 59):
@@ -106,9 +108,10 @@ def time_to_text(
     if h == 12 and m == 0 and s == 0:
         return 'п+олдень'
 
-    h = h % 12  # 0–11 часов для разговорного стиля
-    if h == 0:
-        h = 12  # 12:xx → "двенадцать"
+    if style == 'spoken' or not hours24:
+        h = h % 12  # 0–11 часов для разговорного стиля
+        if h == 0:
+            h = 12  # 12:xx → "двенадцать"
 
     if style == 'spoken':
         # Разговорный стиль: «пять минут первого», «без пятнадцати восемь» и т.п.
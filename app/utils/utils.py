@@ -8,7 +8,7 @@ import logging
 import os
 import sys
 
-from fuzzywuzzy import fuzz
+from .fuzzy_matcher import FuzzyMatcher
 from .time2words import time_to_text
 
 logging.basicConfig()
@@ -104,26 +104,12 @@ class Utils:
                       phrase: str,
                       threshold: int = 80):
         """
-        Поиск приблизительных вхождений keyword в phrase с помощью fuzzywuzzy.
+        Поиск приблизительных вхождений keyword в phrase (сходство как у fuzz.ratio).
         threshold – минимальный процент сходства (0–100), по умолчанию 80 %.
         Возвращает список кортежей (позиция, фрагмент, score).
+        Для целого справочника слов — FuzzyMatcher: все слова за один проход.
         """
-        kw = keyword.lower()
-        text = phrase.lower()
-        k = len(kw)
-        hits = []
-
-        if k == 0 or k > len(text):
-            return hits
-
-        for i in range(len(text) - k + 1):
-            window = text[i:i + k]
-            score = fuzz.ratio(kw, window)  # 100 – полное совпадение
-            if score >= threshold:
-                hits.append((i,
-                             phrase[i:i + k],  # оригинальный регистр
-                             score))
-        return hits
+        return FuzzyMatcher([keyword], threshold).find(phrase).get(keyword, [])
 
     # ---------------- пример ----------------
     if __name__ == '__main__':
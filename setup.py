@@ -15,7 +15,7 @@ setup(
     ],
     entry_points={
         "console_scripts": [
-            "cyber-owl-tts=cyber_owl_tts.core.text_to_speech:main",
+            "cyber-owl-tts=app.cli:main",
         ],
     },
 )
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Общие настройки тестов.
+
+Конфигурация читается из окружения при импорте app.config, поэтому
+обязательные переменные задаются здесь, до импорта модулей приложения.
+Кэш и логи — во временном каталоге, звук — в приёмник null; модель Silero в
+тестах не загружается (см. fake_model).
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+import torch
+
+
+# Корень репозитория: app импортируется и при запуске `pytest` без `python -m`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_TMP = tempfile.mkdtemp(prefix="cyber-owl-tts-tests-")
+
+os.environ.setdefault("TTS_PORT", "8081")
+os.environ.setdefault("TTS_HOST", "127.0.0.1")
+os.environ.setdefault("TTS_LOG_LEVEL", "info")
+os.environ.setdefault("TTS_USE_TORCH_MODEL_MANAGER", "false")
+os.environ["TTS_LOGS_DIR"] = os.path.join(_TMP, "logs")
+os.environ["TTS_CACHE_DIR"] = os.path.join(_TMP, "cache")
+os.environ["TTS_AUDIO_SINK"] = "null"
+os.environ["TTS_EXECUTOR_MODE"] = "thread"
+os.environ["TTS_IPC_SOCKET"] = ""
+os.environ["TTS_PHRASE_BANK"] = ""
+os.environ["TTS_REACTIONS_FILE"] = ""
+os.environ["TTS_WARMUP_TEXT"] = ""
+os.environ["TTS_THREAD_PLAN"] = os.path.join(_TMP, "thread_plan.json")  # плана нет
+
+
+# Длительность одного вызова фальшивой модели, с
+FAKE_SYNTHESIS_SEC = 0.05
+
+
+class FakeModel:
+    """Модель с интерфейсом Silero: синус длиной 10 мс на символ."""
+
+    speakers = ["kseniya", "baya"]
+
+    def __init__(self, delay: float = FAKE_SYNTHESIS_SEC):
+        self.delay = delay
+        self.calls = []
+
+    def to(self, device):
+        return self
+
+    def apply_tts(self, text=None, ssml_text=None, speaker=None, sample_rate=48000, **kwargs):
+        source = text or ssml_text
+        self.calls.append(source)
+        time.sleep(self.delay)
+        length = len(source) * sample_rate // 100
+        return torch.sin(torch.arange(length, dtype=torch.float32) / 10) * 0.5
+
+
+@pytest.fixture
+def fake_model(monkeypatch, tmp_path):
+    """Подменяет загрузку модели Silero фальшивой моделью; у каждого теста свой кэш на диске."""
+    from app.core import text_to_speech
+
+    model = FakeModel()
+    monkeypatch.setattr(text_to_speech, "load_model", lambda device, backend=None: (model, "fake:1"))
+    monkeypatch.setattr(text_to_speech, "TTS_CACHE_DIR", str(tmp_path / "cache"))
+    return model
+
+
+@pytest.fixture
+def executor(fake_model):
+    """Исполнитель синтеза в режиме thread на фальшивой модели."""
+    from app.core.inference_executor import MODE_THREAD, InferenceExecutor
+
+    executor = InferenceExecutor(MODE_THREAD, workers=2, timeout=5, batch_max_size=1)
+    executor.start()
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture
+def httpd(fake_model, monkeypatch, tmp_path):
+    """
+    Модуль HTTP-сервера со свежими кэшами и состоянием запуска.
+    Сервер запускает фикстура client.
+    """
+    from app.core import httpd
+    from app.core.audio_cache import AudioCache
+    from app.core.fragment_cache import FragmentCache
+    from app.core.startup import StartupState
+
+    monkeypatch.setattr(httpd, "startup", StartupState())
+    monkeypatch.setattr(httpd, "fragment_cache", FragmentCache(1024 * 1024, 60))
+    monkeypatch.setattr(httpd, "encoded_cache", AudioCache(
+        1024 * 1024, 60, disk_dir=str(tmp_path / "encoded"), disk_limit_bytes=1024 * 1024,
+        dtype="uint8", suffix=".enc",
+    ))
+    return httpd
+
+
+@pytest.fixture
+def client(httpd):
+    """TestClient запущенного сервера; ждёт готовности модели."""
+    from fastapi.testclient import TestClient
+
+    with TestClient(httpd.app) as client:
+        deadline = time.monotonic() + 10
+        while not httpd.startup.is_ready:
+            assert time.monotonic() < deadline, httpd.startup.to_dict()
+            time.sleep(0.01)
+        yield client
@@ -0,0 +1,110 @@
+"""Контроль допуска (429), крайние сроки запросов (504) и отмена заданий."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.core.phrase_bank import PhraseBank, write_bank
+from app.utils.text_normalizer import normalizer
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def busy(client, httpd, fake_model, monkeypatch):
+    """Пул на одну задачу, занятый синтезом «Первый.»; возвращает поток этого запроса."""
+    monkeypatch.setattr(httpd, "TTS_MAX_IN_FLIGHT", 1)
+    fake_model.delay = 0.5
+    responses = []
+    thread = threading.Thread(
+        target=lambda: responses.append(client.get("/api/tts/audio", params={"text": "Первый.", "format": "wav"}))
+    )
+    thread.start()
+    wait_for(lambda: httpd.inference.in_flight == 1)
+    yield responses
+    thread.join()
+    assert responses[0].status_code == 200
+
+
+def test_full_synthesis_queue_rejects_with_retry_after(client, busy):
+    response = client.get("/api/tts/audio", params={"text": "Другой текст.", "format": "wav"})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert "synthesis" in response.json()["detail"]
+
+
+def test_duplicate_of_in_flight_text_is_admitted_and_coalesced(client, busy, fake_model):
+    # Другой кодек: закодированного ответа в кэше нет, но синтез того же текста уже идёт
+    response = client.get("/api/tts/audio", params={"text": "Первый.", "format": "pcm"})
+    assert response.status_code == 200
+    assert fake_model.calls == ["первый."]
+
+
+def test_speak_duplicate_is_admitted(client, busy, fake_model):
+    response = client.post("/api/tts/json", json={"text": "Первый."})
+    assert response.status_code == 202
+    response = client.post("/api/tts/json", json={"text": "Совсем другой."})
+    assert response.status_code == 429
+
+
+@pytest.fixture
+def cached(client):
+    """«Готово.» уже синтезировано и лежит в кэше фрагментов."""
+    assert client.get("/api/tts/audio", params={"text": "Готово.", "format": "wav"}).status_code == 200
+
+
+def test_cached_text_is_admitted_when_pool_is_full(client, cached, busy, fake_model):
+    # Другой кодек: закодированного ответа нет, но PCM фрагмента уже в кэше
+    response = client.get("/api/tts/audio", params={"text": "Готово.", "format": "pcm"})
+    assert response.status_code == 200
+    assert fake_model.calls.count("готово.") == 1
+
+
+def test_bank_phrase_is_admitted_when_pool_is_full(client, httpd, busy, fake_model, monkeypatch, tmp_path):
+    path = str(tmp_path / "phrases.bin")
+    write_bank(path, [(normalizer.normalize("Слушаю."), np.full(4800, 7, dtype=np.int16))], 48000, "kseniya", "v1")
+    monkeypatch.setattr(httpd, "phrase_bank", PhraseBank(path))
+    response = client.get("/api/tts/audio", params={"text": "Слушаю.", "format": "wav"})
+    assert response.status_code == 200
+    assert "слушаю." not in fake_model.calls
+    response = client.get("/api/tts/audio", params={"text": "Слушаю. Другое.", "format": "wav"})
+    assert response.status_code == 429
+
+
+def test_full_playback_queue_rejects(client, httpd, monkeypatch):
+    monkeypatch.setattr(httpd, "TTS_MAX_JOBS", 0)
+    response = client.get("/api/speak", params={"text": "Привет"})
+    assert response.status_code == 429
+    assert "playback" in response.json()["detail"]
+
+
+def test_deadline_header_limits_synthesis_time(client, fake_model):
+    fake_model.delay = 0.5
+    response = client.get(
+        "/api/tts/audio", params={"text": "Не успеет.", "format": "wav"}, headers={"X-Deadline-Ms": "50"}
+    )
+    assert response.status_code == 504
+    assert "0.050 с" in response.json()["detail"]
+
+
+def test_deadline_header_must_be_positive(client):
+    response = client.get("/api/tts/audio", params={"text": "Привет"}, headers={"X-Deadline-Ms": "0"})
+    assert response.status_code == 400
+
+
+def test_cancelled_job_stops_its_synthesis(client, httpd, fake_model):
+    fake_model.delay = 0.3
+    job_id = client.post("/api/tts/json", json={"text": "Раз. Два. Три. Четыре.", "stream": True}).json()["job_id"]
+    wait_for(lambda: fake_model.calls)
+    response = client.delete(f"/api/jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    wait_for(lambda: job_id not in httpd._job_tasks)
+    assert client.get("/api/jobs/missing").status_code == 404
@@ -0,0 +1,117 @@
+"""AudioCache: LRU по байтам, TTL, дисковый уровень и его вытеснение."""
+
+import os
+import time
+
+import numpy as np
+
+from app.core.audio_cache import AudioCache, make_cache_key, make_encoded_key
+
+
+def tone(length: int, value: int = 1000) -> np.ndarray:
+    return np.full(length, value, dtype=np.int16)
+
+
+def key(text: str) -> str:
+    return make_cache_key(text, "kseniya", 48000, "test")
+
+
+def test_key_depends_on_every_parameter():
+    base = make_cache_key("привет", "kseniya", 48000, "v1")
+    assert base == make_cache_key("привет", "kseniya", 48000, "v1")
+    assert len({
+        base,
+        make_cache_key("пока", "kseniya", 48000, "v1"),
+        make_cache_key("привет", "baya", 48000, "v1"),
+        make_cache_key("привет", "kseniya", 24000, "v1"),
+        make_cache_key("привет", "kseniya", 48000, "v2"),
+        make_encoded_key(base, "flac"),
+    }) == 6
+
+
+def test_memory_hit_returns_read_only_pcm():
+    cache = AudioCache(memory_limit_bytes=1000, ttl_seconds=60)
+    cache.put(key("a"), tone(100))
+    pcm = cache.get(key("a"))
+    assert np.array_equal(pcm, tone(100))
+    assert not pcm.flags.writeable
+    assert cache.get(key("b")) is None
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+
+def test_memory_evicts_least_recently_used_by_bytes():
+    cache = AudioCache(memory_limit_bytes=600, ttl_seconds=60)
+    for name in "abc":
+        cache.put(key(name), tone(100))  # по 200 байт
+    cache.get(key("a"))  # «a» становится самым свежим
+    cache.put(key("d"), tone(100))
+
+    assert cache.get(key("b")) is None
+    for name in "acd":
+        assert cache.get(key(name)) is not None
+    stats = cache.stats()
+    assert stats["memory_evictions"] == 1
+    assert stats["memory_bytes"] == 600
+
+
+def test_memory_skips_entry_larger_than_limit():
+    cache = AudioCache(memory_limit_bytes=100, ttl_seconds=60)
+    cache.put(key("small"), tone(10))
+    cache.put(key("big"), tone(100))
+    assert cache.get(key("big")) is None
+    assert cache.get(key("small")) is not None
+
+
+def test_memory_entry_expires_after_ttl():
+    cache = AudioCache(memory_limit_bytes=1000, ttl_seconds=0.05)
+    cache.put(key("a"), tone(10))
+    assert cache.get(key("a")) is not None
+    time.sleep(0.1)
+    assert cache.get(key("a")) is None
+    stats = cache.stats()
+    assert stats["memory_expirations"] == 1
+    assert stats["memory_bytes"] == 0
+
+
+def test_disk_hit_after_memory_cleared(tmp_path):
+    cache = AudioCache(1000, 60, disk_dir=str(tmp_path), disk_limit_bytes=10_000)
+    cache.put(key("a"), tone(100, 7))
+    cache.clear_memory()
+
+    assert np.array_equal(cache.get(key("a")), tone(100, 7))
+    assert cache.get(key("a")) is not None  # уже из памяти
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+
+    # Дисковый уровень переживает перезапуск
+    reopened = AudioCache(1000, 60, disk_dir=str(tmp_path), disk_limit_bytes=10_000)
+    assert np.array_equal(reopened.get(key("a")), tone(100, 7))
+
+
+def test_disk_evicts_least_recently_used_below_limit(tmp_path):
+    cache = AudioCache(0, 60, disk_dir=str(tmp_path), disk_limit_bytes=1000)
+    now = time.time()
+    for age, name in enumerate("abcd"):
+        cache.put(key(name), tone(100))  # по 200 байт, всего 800
+        os.utime(cache._disk_path(key(name)), (now - 100 + age, now - 100 + age))
+    cache.get(key("a"))  # чтение обновляет mtime: «a» самый свежий
+
+    cache.put(key("e"), tone(100))
+    cache.put(key("f"), tone(100))  # 1200 > 1000: чистим до 900
+
+    assert not os.path.exists(cache._disk_path(key("b")))
+    assert not os.path.exists(cache._disk_path(key("c")))
+    for name in "adef":
+        assert os.path.exists(cache._disk_path(key(name)))
+    assert cache.stats()["disk_evictions"] == 2
+    assert cache._disk_usage() <= 1000
+
+
+def test_encoded_bytes_round_trip(tmp_path):
+    cache = AudioCache(1000, 60, disk_dir=str(tmp_path), disk_limit_bytes=10_000, dtype=np.uint8, suffix=".flac")
+    payload = np.frombuffer(b"fLaC\x00\x01", dtype=np.uint8)
+    cache.put(key("a"), payload)
+    cache.clear_memory()
+    assert cache.get(key("a")).tobytes() == b"fLaC\x00\x01"
+    assert cache._disk_path(key("a")).endswith(".flac")
@@ -0,0 +1,79 @@
+"""/api/tts/audio: аудио целиком, кэш закодированного ответа, отключение клиента."""
+
+import asyncio
+import io
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from scipy.io import wavfile
+
+
+def test_audio_in_g711_with_content_type(client):
+    response = client.get("/api/tts/audio", params={"text": "Привет.", "format": "mulaw", "sample_rate": 8000})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/PCMU; rate=8000; channels=1"
+    assert len(response.content) == len("Привет.") * 80
+
+
+def test_repeated_request_comes_from_encoded_cache(client, fake_model):
+    params = {"text": "Кэш.", "sample_rate": 24000}
+    first = client.get("/api/tts/audio", params=params)
+    second = client.get("/api/tts/audio", params=params)
+    assert first.headers["x-cache"] == "miss" and "x-encode-ms" in first.headers
+    assert second.headers["x-cache"] == "hit"
+    assert second.content == first.content
+    assert fake_model.calls == ["кэш."]
+    rate, data = wavfile.read(io.BytesIO(second.content))
+    assert rate == 24000 and len(data) == len("Кэш.") * 240
+
+
+def test_accept_header_selects_codec(client):
+    response = client.post("/api/tts/audio", json={"text": "Привет."}, headers={"Accept": "audio/L16"})
+    assert response.headers["x-codec"] == "pcm"
+    assert len(np.frombuffer(response.content, dtype="<i2")) == len("Привет.") * 480
+
+
+class DisconnectingRequest:
+    """Запрос, клиент которого отключается после нескольких проверок."""
+
+    def __init__(self, checks):
+        self.checks = checks
+
+    async def is_disconnected(self):
+        self.checks -= 1
+        return self.checks <= 0
+
+
+def test_disconnect_cancels_synthesis(httpd):
+    cancelled = []
+
+    async def synthesis():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        with pytest.raises(HTTPException) as error:
+            await httpd._while_connected(DisconnectingRequest(checks=2), synthesis())
+        await asyncio.sleep(0)
+        return error.value.status_code
+
+    assert asyncio.run(run()) == 499
+    assert cancelled == [True]
+
+
+def test_connected_client_gets_result_and_errors(httpd):
+    async def ok():
+        await asyncio.sleep(0.15)
+        return np.ones(3, dtype=np.int16)
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    pcm = asyncio.run(httpd._while_connected(DisconnectingRequest(checks=100), ok()))
+    assert pcm.tolist() == [1, 1, 1]
+    with pytest.raises(RuntimeError):
+        asyncio.run(httpd._while_connected(DisconnectingRequest(checks=100), failing()))
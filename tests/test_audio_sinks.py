@@ -0,0 +1,138 @@
+"""Приёмники аудио: кольцевой буфер, callback sounddevice, запись в файлы."""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+from app.core.audio_sinks import (
+    FileSink,
+    NullSink,
+    RingBuffer,
+    SoundDeviceSink,
+    create_sink,
+)
+
+
+def test_ring_buffer_wraps_around():
+    ring = RingBuffer(8)
+    out = np.zeros(8, dtype=np.int16)
+    assert ring.write(np.arange(6, dtype=np.int16)) == 6
+    assert ring.read_into(out[:4]) == 4
+    # Запись через конец буфера: 2 отсчёта в хвост, 4 — в начало
+    assert ring.write(np.arange(10, 20, dtype=np.int16)) == 6
+    assert ring.read_into(out) == 8
+    assert out.tolist() == [4, 5, 10, 11, 12, 13, 14, 15]
+    assert ring.read_into(out) == 0
+
+
+def test_ring_buffer_clear_drops_unread():
+    ring = RingBuffer(4)
+    ring.write(np.ones(3, dtype=np.int16))
+    ring.clear()
+    assert ring.read_into(np.zeros(4, dtype=np.int16)) == 0
+    assert ring.write(np.ones(4, dtype=np.int16)) == 4
+
+
+class FakeStream:
+    """Устройство вывода: поток, вызывающий callback блоками по block отсчётов."""
+
+    latency = 0.0
+
+    def __init__(self, sink, block=64, interval=0.001):
+        self.output = []
+        self._sink = sink
+        self._block = block
+        self._interval = interval
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while self._running:
+            out = np.zeros((self._block, 1), dtype=np.int16)
+            self._sink._callback(out, self._block, None, None)
+            self.output.append(out.reshape(-1).copy())
+            time.sleep(self._interval)
+
+    def stop(self):
+        self._running = False
+        self._thread.join()
+
+    def played(self):
+        return np.concatenate(self.output) if self.output else np.zeros(0, dtype=np.int16)
+
+
+@pytest.fixture
+def device_sink():
+    sink = SoundDeviceSink(ring_seconds=0.01)
+    sink._samplerate = 8000
+    sink._ring = RingBuffer(80)
+    sink._stream = SimpleNamespace(latency=0.0)  # open() не вызывает sounddevice
+    stream = FakeStream(sink)
+    yield sink, stream
+    stream.stop()
+
+
+def test_sounddevice_sink_plays_through_ring(device_sink):
+    sink, stream = device_sink
+    pcm = (np.arange(1000) % 100 + 1).astype(np.int16)  # длиннее буфера
+    assert sink.play(pcm, 8000, threading.Event())
+    played = stream.played()
+    start = np.flatnonzero(played)[0]
+    assert np.array_equal(played[start:start + len(pcm)], pcm)
+    assert sink.stats()["segments"] == 1
+
+
+def test_sounddevice_sink_interrupt_stops_playback(device_sink):
+    sink, _ = device_sink
+    interrupt = threading.Event()
+    threading.Timer(0.02, interrupt.set).start()
+    started = time.monotonic()
+    assert not sink.play(np.ones(8000 * 10, dtype=np.int16), 8000, interrupt)
+    assert time.monotonic() - started < 1
+
+
+def test_sounddevice_sink_resamples_to_device_rate(device_sink):
+    sink, _ = device_sink
+    assert sink.play(np.ones(480, dtype=np.int16), 48000, threading.Event())
+    stats = sink.stats()
+    assert (stats["resampled_segments"], stats["frames"]) == (1, 80)
+
+
+def test_overlays_are_mixed_with_clipping():
+    sink = SoundDeviceSink()
+    sink._samplerate = 8000
+    sink._ring = RingBuffer(16)
+    sink._stream = SimpleNamespace(latency=0.0)
+    sink._ring.write(np.full(4, 30000, dtype=np.int16))
+    assert sink.mix(np.full(6, 10000, dtype=np.int16), 8000)
+
+    out = np.zeros((4, 1), dtype=np.int16)
+    sink._callback(out, 4, None, None)
+    assert out.reshape(-1).tolist() == [32767] * 4
+    sink._callback(out, 4, None, None)
+    assert out.reshape(-1).tolist() == [10000, 10000, 0, 0]
+    assert sink._overlays == []
+
+
+def test_file_sink_writes_wav(tmp_path):
+    sink = FileSink(str(tmp_path))
+    assert sink.play(np.arange(100, dtype=np.int16), 24000, threading.Event())
+    (path,) = tmp_path.iterdir()
+    rate, data = wavfile.read(path)
+    assert rate == 24000
+    assert data.tolist() == list(range(100))
+
+
+def test_null_sink_and_factory():
+    sink = create_sink("null")
+    assert isinstance(sink, NullSink)
+    assert sink.play(np.zeros(10, dtype=np.int16), 48000, threading.Event())
+    assert sink.mix(np.zeros(5, dtype=np.int16), 48000)
+    assert sink.stats()["frames"] == 15
+    with pytest.raises(ValueError):
+        create_sink("alsa")
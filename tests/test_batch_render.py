@@ -0,0 +1,61 @@
+"""/api/tts/batch: ZIP-архив WAV-файлов с manifest.json."""
+
+import io
+import json
+import zipfile
+
+from scipy.io import wavfile
+
+from app.core.batch_render import RenderItem, _dedupe_names
+
+
+def read_zip(response):
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    manifest = json.loads(archive.read("manifest.json"))
+    return archive, manifest
+
+
+def test_batch_returns_wavs_and_manifest(client, fake_model):
+    response = client.post("/api/tts/batch", json={"items": [
+        {"text": "Первый.", "name": "first"},
+        {"text": "Второй.", "sample_rate": 24000},
+        {"text": "Третий.", "quality": "telephony", "name": "../../etc/passwd"},
+    ]})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    archive, manifest = read_zip(response)
+    assert sorted(archive.namelist()) == ["0001.wav", "first.wav", "manifest.json", "passwd.wav"]
+
+    rate, data = wavfile.read(io.BytesIO(archive.read("0001.wav")))
+    assert rate == 24000 and len(data) == len("Второй.") * 240
+    items = manifest["items"]
+    assert [item["index"] for item in items] == [0, 1, 2]
+    assert [item["sample_rate"] for item in items] == [48000, 24000, 8000]
+    assert all(item["synthesis_ms"] >= 0 and item["duration_sec"] > 0 for item in items)
+    assert manifest["summary"]["succeeded"] == 3
+    assert manifest["summary"]["x_realtime"] > 0
+
+
+def test_failed_item_is_reported_in_manifest(client, fake_model):
+    response = client.post("/api/tts/batch", json={"items": [
+        {"text": "Хорошо."},
+        {"text": "Плохо.", "speaker": "nobody"},
+    ]})
+    archive, manifest = read_zip(response)
+    assert archive.namelist() == ["0000.wav", "manifest.json"]
+    assert "Неизвестный голос" in manifest["items"][1]["error"]
+    assert manifest["summary"]["failed"] == 1
+
+
+def test_batch_validation(client, httpd, monkeypatch):
+    assert client.post("/api/tts/batch", json={"items": []}).status_code == 400
+    assert client.post("/api/tts/batch", json={"items": [{"text": " "}]}).status_code == 400
+    assert client.post("/api/tts/batch", json={"items": [{"text": "а", "sample_rate": 100}]}).status_code == 400
+    monkeypatch.setattr(httpd, "TTS_RENDER_MAX_ITEMS", 1)
+    assert client.post("/api/tts/batch", json={"items": [{"text": "а"}, {"text": "б"}]}).status_code == 413
+
+
+def test_duplicate_names_get_index_suffix():
+    items = [RenderItem(0, "а", name="x"), RenderItem(1, "б", name="x.wav"), RenderItem(2, "в", name="manifest.json")]
+    _dedupe_names(items)
+    assert [item.name for item in items] == ["x.wav", "x_0001.wav", "0002.wav"]
@@ -0,0 +1,139 @@
+"""MicroBatcher: сборка пачек по размеру и ожиданию, группы, отмена."""
+
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from app.core.batcher import MicroBatcher
+
+
+class Runner:
+    """Исполнитель пачки: запоминает пачки, результат — длина текста."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts, group):
+        self.batches.append((list(texts), group))
+        return [np.full(len(text), len(self.batches), dtype=np.int16) for text in texts]
+
+
+@pytest.fixture
+def runner():
+    return Runner()
+
+
+def make_batcher(runner, max_batch=4, max_wait_ms=50):
+    batcher = MicroBatcher(runner, max_batch, max_wait_ms)
+    batcher.start()
+    return batcher
+
+
+def test_concurrent_requests_share_one_batch(runner):
+    batcher = make_batcher(runner)
+    try:
+        futures = [batcher.submit(text, "kseniya") for text in ("а", "бб", "ввв")]
+        results = [future.result(timeout=2) for future in futures]
+    finally:
+        batcher.stop()
+    assert runner.batches == [(["а", "бб", "ввв"], "kseniya")]
+    assert [len(pcm) for pcm in results] == [1, 2, 3]
+    stats = batcher.stats()
+    assert (stats["batches"], stats["items"], stats["batch_sizes"]) == (1, 3, {3: 1})
+
+
+def test_full_batch_is_dispatched_without_waiting(runner):
+    batcher = make_batcher(runner, max_batch=2, max_wait_ms=5000)
+    try:
+        started = time.perf_counter()
+        futures = [batcher.submit(text) for text in ("а", "б")]
+        for future in futures:
+            future.result(timeout=2)
+        assert time.perf_counter() - started < 1
+    finally:
+        batcher.stop()
+
+
+def test_batches_never_mix_groups(runner):
+    batcher = make_batcher(runner)
+    try:
+        futures = [batcher.submit(text, group) for text, group in (("а", 1), ("б", 2), ("в", 1))]
+        for future in futures:
+            future.result(timeout=2)
+    finally:
+        batcher.stop()
+    assert sorted(runner.batches) == [(["а", "в"], 1), (["б"], 2)]
+
+
+def test_runner_future_result_is_distributed(runner):
+    pool_future = Future()
+
+    def deferred(texts, group):
+        return pool_future
+
+    batcher = make_batcher(deferred, max_wait_ms=1)
+    try:
+        first, second = batcher.submit("а"), batcher.submit("б")
+        time.sleep(0.05)
+        pool_future.set_result([np.zeros(1, np.int16), np.ones(1, np.int16)])
+        assert first.result(timeout=2)[0] == 0
+        assert second.result(timeout=2)[0] == 1
+    finally:
+        batcher.stop()
+
+
+def test_runner_error_fails_every_request():
+    def broken(texts, group):
+        raise RuntimeError("модель упала")
+
+    batcher = make_batcher(broken, max_wait_ms=1)
+    try:
+        futures = [batcher.submit("а"), batcher.submit("б")]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="модель упала"):
+                future.result(timeout=2)
+    finally:
+        batcher.stop()
+
+
+def test_cancelled_request_is_left_out_of_batch(runner):
+    release = threading.Event()
+
+    def slow(texts, group):
+        release.wait(2)
+        return runner(texts, group)
+
+    batcher = make_batcher(slow, max_batch=1, max_wait_ms=1)
+    try:
+        busy = batcher.submit("занят")  # держит поток батчера
+        time.sleep(0.05)
+        cancelled = batcher.submit("отменён")
+        kept = batcher.submit("нужен")
+        assert cancelled.cancel()
+        release.set()
+        busy.result(timeout=2)
+        kept.result(timeout=2)
+    finally:
+        batcher.stop()
+    assert [texts for texts, _ in runner.batches] == [["занят"], ["нужен"]]
+
+
+def test_submit_requires_start(runner):
+    with pytest.raises(RuntimeError):
+        MicroBatcher(runner, 4, 5).submit("а")
+
+
+def test_stop_while_batch_is_filling(runner, monkeypatch):
+    errors = []
+    monkeypatch.setattr(threading, "excepthook", errors.append)
+    batcher = make_batcher(runner, max_batch=4, max_wait_ms=5000)
+    future = batcher.submit("а")
+    time.sleep(0.05)  # поток батчера ждёт добора пачки
+    thread = batcher._thread
+    batcher.stop()
+    assert not thread.is_alive()
+    assert errors == []
+    assert future.cancelled() and runner.batches == []
@@ -0,0 +1,110 @@
+"""Кодеки ответа: G.711 против эталона g711.c, файлы WAV/FLAC, выбор по Accept."""
+
+import io
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+from app.utils.codecs import (
+    CODECS,
+    CodecError,
+    get_codec,
+    linear_to_alaw,
+    linear_to_mulaw,
+    select_codec,
+)
+
+try:
+    import soundfile
+except (ImportError, OSError):
+    soundfile = None
+
+
+ALL_SAMPLES = np.arange(-32768, 32768, dtype=np.int32).astype(np.int16)
+
+
+def _segment(value, ends):
+    for i, end in enumerate(ends):
+        if value <= end:
+            return i
+    return len(ends)
+
+
+def reference_mulaw(sample):
+    """linear2ulaw из g711.c (Sun Microsystems), по одному отсчёту."""
+    value = int(sample) >> 2
+    if value < 0:
+        value, mask = -value, 0x7F
+    else:
+        mask = 0xFF
+    value = min(value, 8159) + 0x21
+    seg = _segment(value, [0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+    if seg >= 8:
+        return 0x7F ^ mask
+    return ((seg << 4) | ((value >> (seg + 1)) & 0x0F)) ^ mask
+
+
+def reference_alaw(sample):
+    """linear2alaw из g711.c (Sun Microsystems), по одному отсчёту."""
+    value = int(sample) >> 3
+    if value >= 0:
+        mask = 0xD5
+    else:
+        mask = 0x55
+        value = -value - 1
+    seg = _segment(value, [0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF])
+    if seg >= 8:
+        return 0x7F ^ mask
+    aval = seg << 4
+    aval |= (value >> 1) & 0x0F if seg < 2 else (value >> seg) & 0x0F
+    return aval ^ mask
+
+
+def test_g711_known_codes():
+    edges = np.array([0, 32767, -32768], dtype=np.int16)
+    assert linear_to_mulaw(edges).tolist() == [0xFF, 0x80, 0x00]
+    assert linear_to_alaw(edges).tolist() == [0xD5, 0xAA, 0x2A]
+
+
+def test_mulaw_matches_reference_for_every_sample():
+    expected = np.array([reference_mulaw(s) for s in ALL_SAMPLES], dtype=np.uint8)
+    assert np.array_equal(linear_to_mulaw(ALL_SAMPLES), expected)
+
+
+def test_alaw_matches_reference_for_every_sample():
+    expected = np.array([reference_alaw(s) for s in ALL_SAMPLES], dtype=np.uint8)
+    assert np.array_equal(linear_to_alaw(ALL_SAMPLES), expected)
+
+
+def test_wav_round_trip():
+    pcm = (np.sin(np.arange(8000) / 10) * 10000).astype(np.int16)
+    rate, data = wavfile.read(io.BytesIO(CODECS["wav"].encode(pcm, 8000)))
+    assert rate == 8000 and np.array_equal(data, pcm)
+    codec = CODECS["wav"]
+    streamed = codec.stream_header(8000) + codec.encode_chunk(pcm[:100], 8000) + codec.encode_chunk(pcm[100:], 8000)
+    assert streamed[44:] == pcm.tobytes()
+
+
+@pytest.mark.skipif(soundfile is None, reason="нет soundfile")
+def test_flac_is_lossless():
+    pcm = (np.sin(np.arange(24000) / 7) * 12000).astype(np.int16)
+    data, rate = soundfile.read(io.BytesIO(CODECS["flac"].encode(pcm, 24000)), dtype="int16")
+    assert rate == 24000 and np.array_equal(data, pcm)
+
+
+def test_format_parameter_wins_over_accept():
+    assert select_codec("alaw", "audio/PCMU").name == "alaw"
+    assert select_codec(None, "audio/pcmu;q=0.5, audio/L16").name == "pcm"
+    assert select_codec(None, "audio/L16;q=0, audio/PCMA").name == "alaw"
+    assert select_codec(None, "*/*, audio/PCMU").name == "wav"
+    assert select_codec(None, None).name == "wav"
+
+
+def test_streaming_rejects_whole_file_codecs():
+    with pytest.raises(CodecError):
+        get_codec("mp3")
+    with pytest.raises(CodecError):
+        get_codec("flac", streaming=True)
+    # По Accept не потоковый кодек пропускается
+    assert select_codec(None, "audio/flac, audio/PCMU", streaming=True).name == "mulaw"
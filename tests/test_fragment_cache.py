@@ -0,0 +1,96 @@
+"""Кэш фрагментов: синтез только новых предложений и склейка за один проход."""
+
+import asyncio
+import io
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+from app.core.fragment_cache import FragmentCache
+from app.core.long_text import assemble, parse_document, render
+
+
+RATE = 8000
+
+
+def speech(seed, samples):
+    """Речь с тихими краями, чтобы обрезка тишины у пауз что-то делала."""
+    rng = np.random.default_rng(seed)
+    pcm = rng.integers(-20000, 20000, samples).astype(np.int16)
+    pcm[:40] = pcm[-40:] = 0
+    return pcm
+
+
+@pytest.mark.parametrize("text", [
+    "Раз. Два. Три.",
+    "Раз.\n\nДва. Три.\n\nЧетыре.",
+    '<speak><break time="100ms"/>Раз.<break time="30ms"/>Два. Три.<break time="50ms"/></speak>',
+    "Коротко. Я.",
+])
+def test_assemble_matches_render_bit_for_bit(text):
+    segments = parse_document(text)
+    pcms = [speech(i, 5 if "Я" in s.text else 800 + 37 * i) if s.kind == "speech" else None
+            for i, s in enumerate(segments)]
+
+    async def synthesize(source, timeout):
+        return pcms[[s.text for s in segments].index(source)]
+
+    async def rendered():
+        return [chunk async for chunk in render(segments, synthesize, RATE, concurrency=2)]
+
+    expected = np.concatenate(asyncio.run(rendered()))
+    assert np.array_equal(assemble(segments, pcms, RATE), expected)
+
+
+def test_fetch_counts_hits_and_documents():
+    cache = FragmentCache(1024 * 1024, ttl_seconds=60)
+    produced = []
+
+    async def fetch(key, document):
+        async def produce():
+            produced.append(key)
+            return np.zeros(RATE, dtype=np.int16)
+        return await cache.fetch(key, RATE, produce, document)
+
+    async def run(keys):
+        with cache.document(None) as document:
+            for key in keys:
+                await fetch(key, document)
+
+    for keys in (["a", "b"], ["a", "c"], ["a", "b"]):
+        asyncio.run(run(keys))
+
+    assert produced == ["a", "b", "c"]
+    stats = cache.stats()
+    assert (stats["fragment_hits"], stats["fragment_misses"]) == (3, 3)
+    assert (stats["documents"], stats["documents_partial"], stats["documents_reused"]) == (3, 1, 1)
+    assert stats["reused_audio_seconds"] == 3.0
+    assert stats["document_reuse_ratio"] == round(2 / 3, 4)
+
+
+def test_disabled_cache_only_counts():
+    cache = FragmentCache(0, ttl_seconds=60)
+
+    async def produce():
+        return np.zeros(10, dtype=np.int16)
+
+    for _ in range(2):
+        asyncio.run(cache.fetch("a", RATE, produce))
+    stats = cache.stats()
+    assert (stats["enabled"], stats["fragment_misses"], stats["entries"]) == (False, 2, 0)
+
+
+def test_changed_sentence_is_the_only_synthesis(client, fake_model):
+    def get(text):
+        response = client.get("/api/tts/audio", params={"text": text, "sample_rate": 24000})
+        return wavfile.read(io.BytesIO(response.content))[1]
+
+    first = get("Сейчас полдень. Хорошего дня.")
+    second = get("Сейчас полночь. Хорошего дня.")
+    assert sorted(fake_model.calls) == ["сейчас полдень.", "сейчас полночь.", "хорошего дня."]
+    assert len(first) == len(second)
+
+    fragments = client.get("/api/cache/stats").json()["fragments"]
+    assert fragments["fragment_hits"] == 1
+    assert fragments["documents_partial"] == 1
@@ -0,0 +1,50 @@
+"""FuzzyMatcher: те же вхождения, что у перебора окон fuzz.ratio, за один проход."""
+
+import random
+
+import numpy as np
+import pytest
+
+from app.utils.fuzzy_bench import DEFAULT_PHRASES, reference_find, run, synthetic_keywords
+from app.utils.fuzzy_matcher import FuzzyMatcher, popcount64
+from app.utils.utils import Utils
+
+
+def test_popcount64():
+    values = np.array([0, 1, 0xFF, 2 ** 63, 2 ** 64 - 1, 0x5555555555555555], dtype=np.uint64)
+    assert popcount64(values).tolist() == [0, 1, 8, 1, 64, 32]
+    assert popcount64(values.reshape(2, 3)).shape == (2, 3)
+
+
+def test_example_from_docstring():
+    assert FuzzyMatcher(["пагода"], threshold=80).find("Сегодня потрясающая погода") == {
+        "пагода": [(20, "погода", 83)],
+    }
+
+
+@pytest.mark.parametrize("threshold", [60, 75, 80, 90, 100])
+def test_matches_reference_on_random_text(threshold):
+    rng = random.Random(threshold)
+    keywords = synthetic_keywords(60, seed=threshold) + ["Сова", "СОВА", "погода", "а", "x" * 70]
+    matcher = FuzzyMatcher(keywords, threshold)
+    alphabet = "бвгджзклмнпрстфчаеиоуы .,!сова"
+    phrases = DEFAULT_PHRASES + ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 120)))
+                                 for _ in range(30)]
+    phrases.append("кибер сова " + "x" * 68)  # слово длиннее 64 букв — прежний поиск
+    for phrase in phrases:
+        assert matcher.find(phrase) == reference_find(keywords, phrase, threshold), phrase
+
+
+def test_spellings_and_empty_inputs():
+    matcher = FuzzyMatcher(["Сова", "сова", ""], threshold=100)
+    assert len(matcher) == 1
+    found = matcher.find("Кибер СОВА")
+    assert found == {"Сова": [(6, "СОВА", 100)], "сова": [(6, "СОВА", 100)]}
+    assert matcher.find("") == {}
+    assert FuzzyMatcher([]).find("что угодно") == {}
+
+
+def test_utils_wrapper_and_benchmark():
+    assert Utils.fuzzy_find_fw("пагода", "погода", 80) == [(0, "погода", 83)]
+    result = run(synthetic_keywords(20), DEFAULT_PHRASES[:2], threshold=70, repeat=1)
+    assert result["identical"] and result["keywords"] == 20
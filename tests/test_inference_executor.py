@@ -0,0 +1,74 @@
+"""InferenceExecutor: синтез вне event loop, таймауты, счётчик задач в пуле."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.inference_executor import MODE_THREAD, InferenceExecutor, SynthesisTimeoutError
+
+
+def test_synthesize_returns_int16_pcm(executor, fake_model):
+    pcm = asyncio.run(executor.synthesize("привет", speaker="kseniya", sample_rate=24000))
+    assert pcm.dtype == np.int16
+    assert len(pcm) == len("привет") * 24000 // 100
+    assert executor.samplerate == 48000
+    assert executor.model_version == "fake:1"
+
+
+def test_event_loop_stays_responsive_during_synthesis(executor, fake_model):
+    fake_model.delay = 0.3
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await executor.synthesize("долгий синтез")
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(scenario()) >= 10
+
+
+def test_timeout_raises_synthesis_timeout(executor, fake_model):
+    fake_model.delay = 0.5
+    with pytest.raises(SynthesisTimeoutError):
+        asyncio.run(executor.synthesize("не успеет", timeout=0.05))
+
+
+def test_in_flight_counts_submitted_tasks(executor, fake_model):
+    fake_model.delay = 0.2
+
+    async def scenario():
+        tasks = [asyncio.create_task(executor.synthesize(f"текст {i}")) for i in range(3)]
+        await asyncio.sleep(0.05)
+        during = executor.in_flight
+        await asyncio.gather(*tasks)
+        return during
+
+    assert asyncio.run(scenario()) == 3
+    assert executor.in_flight == 0
+    assert executor.retry_after() >= 1
+
+
+def test_repeated_text_is_served_from_cache(executor, fake_model):
+    asyncio.run(executor.synthesize("повтор"))
+    asyncio.run(executor.synthesize("повтор"))
+    assert fake_model.calls == ["повтор"]
+
+
+def test_synthesize_requires_start():
+    executor = InferenceExecutor(MODE_THREAD, workers=1, batch_max_size=1)
+    with pytest.raises(RuntimeError):
+        asyncio.run(executor.synthesize("привет"))
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        InferenceExecutor("gpu")
@@ -0,0 +1,120 @@
+"""Локальный IPC: кадры протокола, кольцо общей памяти, обмен клиента с сервером."""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from app.ipc.client import IpcError, TTSClient
+from app.ipc.protocol import (
+    HEADER_SIZE,
+    MSG_SPEAK,
+    ProtocolError,
+    pack_error,
+    pack_frame,
+    unpack_error,
+    unpack_header,
+)
+from app.ipc.server import IpcServer
+from app.ipc.shm_ring import ShmRing
+
+
+def test_frame_header_round_trip():
+    frame = pack_frame(MSG_SPEAK, 7, b"abc")
+    assert len(frame) == HEADER_SIZE + 3
+    assert unpack_header(frame[:HEADER_SIZE]) == (MSG_SPEAK, 7, 3)
+    assert unpack_error(pack_error(1, 504, "таймаут")[HEADER_SIZE:]) == (504, "таймаут")
+    with pytest.raises(ProtocolError):
+        unpack_header(b"XX" + frame[2:HEADER_SIZE])
+    with pytest.raises(ProtocolError):
+        unpack_header(frame[:2] + b"\x09" + frame[3:HEADER_SIZE])
+
+
+def test_ring_wraps_blocks_to_start():
+    ring = ShmRing.create(64)
+    reader = ShmRing.attach(ring.name)
+    try:
+        first = np.arange(20, dtype=np.int16)  # 40 байт
+        assert ring.write(first) == 0
+        assert ring.write(first) is None  # клиент ещё не прочитал
+        assert np.array_equal(reader.read(0, 40), first)
+
+        # До конца области 24 байта — блок начинается с её начала
+        second = np.arange(100, 120, dtype=np.int16)
+        assert ring.write(second) == 64
+        assert np.array_equal(reader.read(64, 40), second)
+        assert ring.write(np.zeros(40, dtype=np.int16)) is None  # больше кольца
+    finally:
+        reader.close()
+        ring.close()
+
+
+class ServerThread:
+    """
+    IpcServer в отдельном event loop: клиент синхронный. Клиент и сервер в
+    одном процессе, поэтому трекер ресурсов пишет в stderr KeyError о
+    сегменте, который клиент снял с учёта, — это не ошибка.
+    """
+
+    def __init__(self, path, ring_bytes):
+        self.calls = []
+        self.jobs = {"job-1"}
+        self.loop = asyncio.new_event_loop()
+        self.server = IpcServer(path, self.synthesize, self.speak, self.cancel, ring_bytes=ring_bytes)
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    async def synthesize(self, text, sample_rate, timeout):
+        self.calls.append((text, sample_rate, timeout))
+        if text == "долго":
+            raise asyncio.TimeoutError("таймаут")
+        rate = sample_rate or 48000
+        return np.arange(len(text) * 10, dtype=np.int16), rate
+
+    def speak(self, text, priority, timeout):
+        self.calls.append((text, priority, timeout))
+        return "job-1"
+
+    def cancel(self, job_id):
+        return job_id in self.jobs
+
+    def __enter__(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result(5)
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+
+@pytest.mark.parametrize("use_shm", [True, False])
+def test_client_server_round_trip(tmp_path, use_shm):
+    path = str(tmp_path / "tts.sock")
+    with ServerThread(path, ring_bytes=1024) as server:
+        with TTSClient(path, use_shm=use_shm, timeout=5) as client:
+            assert client.uses_shm is use_shm
+            for _ in range(5):  # кольцо в 1 КБ заполняется и переходит на начало
+                pcm, rate = client.synthesize("Привет!" * 3, sample_rate=24000)
+                assert rate == 24000 and pcm.tolist() == list(range(210))
+            # Блок больше кольца идёт через сокет
+            pcm, rate = client.synthesize("a" * 100)
+            assert rate == 48000 and len(pcm) == 1000
+
+            assert client.speak("Слушаю.", priority=5, timeout=2.5) == "job-1"
+            client.cancel("job-1")
+            with pytest.raises(IpcError) as error:
+                client.cancel("job-2")
+            assert error.value.status == 404
+            with pytest.raises(IpcError) as error:
+                client.synthesize("долго", timeout=1)
+            assert error.value.status == 500
+
+        stats = server.server.stats()
+        assert stats["audio_shm"] == (5 if use_shm else 0)
+        assert stats["audio_inline"] == (1 if use_shm else 6)
+        assert stats["errors"] == 1  # 404 отмены — ответ, а не ошибка обработки
+    assert ("Слушаю.", 5, 2.5) in server.calls
+    assert ("долго", None, 1.0) in server.calls
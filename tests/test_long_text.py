@@ -0,0 +1,123 @@
+"""Длинные тексты и SSML: разбиение на сегменты, синтез и склейка."""
+
+import asyncio
+
+import numpy as np
+
+from app.core.long_text import (
+    PARAGRAPH_BREAK_SEC,
+    SEGMENT_BREAK,
+    SEGMENT_SPEECH,
+    parse_document,
+    render,
+    synthesize_document,
+)
+
+
+RATE = 1000
+
+
+def kinds(segments):
+    return [s.text if s.kind == SEGMENT_SPEECH else round(s.seconds, 3) for s in segments]
+
+
+def tone(samples, level=1000):
+    """Речь без тишины на краях: постоянная амплитуда."""
+    return np.full(samples, level, dtype=np.int16)
+
+
+def fake_synthesize(lengths, delays=None, calls=None):
+    """Синтез сегмента: PCM заданной длины по тексту, с задержкой."""
+    async def synthesize(text, timeout):
+        if calls is not None:
+            calls.append(text)
+        await asyncio.sleep((delays or {}).get(text, 0))
+        return tone(lengths[text])
+    return synthesize
+
+
+def test_plain_text_paragraphs_and_sentences():
+    segments = parse_document("Первое. Второе!\n\nТретье?")
+    assert kinds(segments) == ["Первое.", "Второе!", PARAGRAPH_BREAK_SEC, "Третье?"]
+
+
+def test_long_sentence_is_split_by_words():
+    assert kinds(parse_document("слово " * 7, max_chars=12)) == ["слово слово", "слово слово", "слово слово", "слово"]
+
+
+def test_ssml_breaks_and_reopened_prosody():
+    segments = parse_document(
+        '<speak>Раз.<break time="500ms"/><break strength="weak"/>'
+        'Два <prosody rate="slow">три. Четыре</prosody> пять.<p>Абзац.</p></speak>'
+    )
+    assert kinds(segments) == [
+        "<speak>Раз.</speak>",
+        0.75,  # подряд идущие паузы складываются
+        '<speak>Два <prosody rate="slow">три.</prosody></speak>',
+        '<speak><prosody rate="slow">Четыре</prosody> пять.</speak>',
+        PARAGRAPH_BREAK_SEC,
+        "<speak>Абзац.</speak>",
+    ]
+
+
+def test_ssml_escapes_text_and_caps_breaks():
+    segments = parse_document('<speak>A &amp; B.<break time="60s"/>C.</speak>')
+    assert kinds(segments) == ["<speak>A &amp; B.</speak>", 10.0, "<speak>C.</speak>"]
+
+
+def test_broken_ssml_falls_back_to_sentences():
+    segments = parse_document("<speak>Не закрыт")
+    assert [s.kind for s in segments] == [SEGMENT_SPEECH]
+
+
+def test_render_keeps_order_and_inserts_exact_pauses():
+    segments = parse_document('<speak>Раз.<break time="200ms"/>Два.</speak>')
+    lengths = {"<speak>Раз.</speak>": 300, "<speak>Два.</speak>": 100}
+    # Второе предложение готово раньше, но отдаётся после первого
+    synthesize = fake_synthesize(lengths, delays={"<speak>Раз.</speak>": 0.05})
+
+    async def collect():
+        return [chunk async for chunk in render(segments, synthesize, RATE, concurrency=2)]
+
+    chunks = asyncio.run(collect())
+    assert [len(chunk) for chunk in chunks] == [300 + 200, 100]
+    assert not chunks[0][300:].any()
+
+
+def test_render_crossfades_adjacent_sentences():
+    segments = parse_document("Раз. Два.")
+    synthesize = fake_synthesize({"Раз.": 300, "Два.": 100})
+
+    async def collect():
+        return [chunk async for chunk in render(segments, synthesize, RATE, concurrency=1, crossfade_ms=20)]
+
+    chunks = asyncio.run(collect())
+    # 20 мс хвоста первого предложения смешаны с началом второго
+    assert [len(chunk) for chunk in chunks] == [280, 100]
+
+
+def test_synthesize_document_runs_in_parallel_and_trims_silence():
+    calls = []
+    lengths = {"Раз.": 100, "Два.": 100, "Три.": 100}
+    synthesize = fake_synthesize(lengths, delays=dict.fromkeys(lengths, 0.05), calls=calls)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        pcm = await synthesize_document("Раз. Два.\n\nТри.", synthesize, RATE, concurrency=3)
+        return pcm, loop.time() - started
+
+    pcm, elapsed = asyncio.run(run())
+    assert calls == ["Раз.", "Два.", "Три."]
+    assert elapsed < 0.12
+    assert len(pcm) == 300 - 10 + int(PARAGRAPH_BREAK_SEC * RATE)
+
+
+def test_only_breaks_give_silence():
+    segments = parse_document('<speak><break time="1s"/></speak>')
+    assert [s.kind for s in segments] == [SEGMENT_BREAK]
+
+    async def collect():
+        return [chunk async for chunk in render(segments, fake_synthesize({}), RATE, concurrency=1)]
+
+    assert [len(chunk) for chunk in asyncio.run(collect())] == [RATE]
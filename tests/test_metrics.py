@@ -0,0 +1,50 @@
+"""Метрики Prometheus этапов синтеза и их выдача на /metrics."""
+
+import asyncio
+
+from prometheus_client import REGISTRY
+
+from app.core import metrics
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_observe_inference_updates_counters_and_gauges():
+    chars, audio = sample("tts_synthesized_chars_total"), sample("tts_synthesized_audio_seconds_total")
+    calls = sample("tts_inference_seconds_count")
+    metrics.observe_inference(chars=100, seconds=0.5, audio_seconds=2.0)
+    assert sample("tts_synthesized_chars_total") == chars + 100
+    assert sample("tts_synthesized_audio_seconds_total") == audio + 2.0
+    assert sample("tts_inference_seconds_count") == calls + 1
+    assert sample("tts_real_time_factor") == 0.25
+    assert sample("tts_chars_per_second") == 200
+
+
+def test_observe_cache_counts_hits_and_misses():
+    hits, misses = sample("tts_cache_lookups_total", result="hit"), sample("tts_cache_lookups_total", result="miss")
+    metrics.observe_cache(True, 0.75)
+    metrics.observe_cache(False, 0.5)
+    assert sample("tts_cache_lookups_total", result="hit") == hits + 1
+    assert sample("tts_cache_lookups_total", result="miss") == misses + 1
+    assert sample("tts_cache_hit_ratio") == 0.5
+
+
+def test_synthesis_is_visible_on_metrics_endpoint(client):
+    assert client.get("/api/tts/audio", params={"text": "Метрики.", "format": "wav"}).status_code == 200
+    body = client.get("/metrics").text
+    for name in (
+        "tts_inference_seconds_bucket",
+        "tts_text_normalization_seconds_count",
+        "tts_real_time_factor",
+        "tts_cache_lookups_total",
+        "tts_model_memory_bytes",
+    ):
+        assert name in body
+
+
+def test_synthesis_queue_wait_is_observed_without_batching(executor):
+    waits = sample("tts_queue_wait_seconds_count", queue="synthesis")
+    asyncio.run(executor.synthesize("Очередь."))
+    assert sample("tts_queue_wait_seconds_count", queue="synthesis") == waits + 1
@@ -0,0 +1,69 @@
+"""Компиляция модели (TorchScript, int8) и подмена внутренней сети при загрузке."""
+
+import os
+
+import pytest
+import torch
+
+from app.core import model_backends
+from app.core.model_backends import BACKEND_EAGER, BACKEND_INT8, BACKEND_TORCHSCRIPT, apply_backend
+from app.utils import model_translator
+
+
+class Net(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.linear = torch.nn.Linear(16, 16)
+
+    def forward(self, x):
+        return torch.tanh(self.linear(x))
+
+
+class Wrapper:
+    """Как обёртка Silero из пакета: не nn.Module, сеть — в атрибуте."""
+
+    def __init__(self, net):
+        self.net = net
+        self.speakers = ["kseniya"]
+
+
+@pytest.fixture
+def models_dir(monkeypatch, tmp_path):
+    torch.manual_seed(0)
+    eager = Wrapper(Net().eval())
+    monkeypatch.setattr(model_backends, "MODELS_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(model_translator, "load_model", lambda device, backend: (eager, "silero:1"))
+    return eager
+
+
+def test_eager_backend_keeps_model(models_dir):
+    assert apply_backend(models_dir, BACKEND_EAGER, "silero:1") == "silero:1"
+    assert isinstance(models_dir.net, Net)
+
+
+@pytest.mark.parametrize("backend, tolerance", [(BACKEND_TORCHSCRIPT, 1e-6), (BACKEND_INT8, 0.05)])
+def test_compiled_backend_replaces_inner_network(models_dir, backend, tolerance):
+    paths = model_translator.compile_models([backend])
+    assert paths[backend] == model_backends.compiled_model_path(backend)
+
+    model = Wrapper(Net())
+    version = apply_backend(model, backend, "silero:1")
+    assert version == f"silero:1+{backend}"
+    assert isinstance(model.net, torch.jit.ScriptModule)
+
+    x = torch.randn(4, 16)
+    with torch.no_grad():
+        assert torch.allclose(model.net(x), models_dir.net(x), atol=tolerance)
+
+
+def test_missing_compiled_model_and_unknown_backend(models_dir):
+    with pytest.raises(FileNotFoundError):
+        apply_backend(Wrapper(Net()), BACKEND_TORCHSCRIPT, "silero:1")
+    with pytest.raises(ValueError):
+        apply_backend(Wrapper(Net()), "onnx", "silero:1")
+
+
+def test_backends_are_measured_in_a_fresh_process():
+    memory = model_translator._memory_mb()
+    assert memory["pss"] > 0 and memory["rss"] > 0
+    assert model_translator._in_fresh_process(os.getpid) != os.getpid()
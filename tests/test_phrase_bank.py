@@ -0,0 +1,75 @@
+"""Банк фраз: файл в mmap, поиск фраз, ответы сервера без вызова модели."""
+
+import io
+
+import numpy as np
+from scipy.io import wavfile
+
+from app.core.phrase_bank import PhraseBank, bank_key, iter_unique, open_bank, write_bank
+from app.utils.bank_builder import time_phrases
+from app.utils.text_normalizer import normalizer
+
+
+def tone(samples, level):
+    return np.full(samples, level, dtype=np.int16)
+
+
+def test_write_and_lookup(tmp_path):
+    path = str(tmp_path / "bank" / "phrases.bin")
+    phrases = [("Привет!", tone(100, 1)), ("Слушаю.", tone(50, 2)), ("  Привет! ", tone(10, 3))]
+    assert write_bank(path, iter(phrases), 24000, "kseniya", "v1") == 2
+
+    bank = PhraseBank(path)
+    try:
+        assert (len(bank), bank.sample_rate, bank.speaker, bank.model_version) == (2, 24000, "kseniya", "v1")
+        pcm = bank.lookup("Привет!\n")
+        assert pcm.tolist() == [1] * 100  # повтор с другими пробелами не записан
+        assert not pcm.flags.writeable
+        assert bank.lookup("Слушаю.", speaker="kseniya").tolist() == [2] * 50
+        assert bank.lookup("Слушаю.", speaker="baya") is None
+        assert bank.lookup("привет!") is None  # регистр важен
+        stats = bank.stats()
+        assert (stats["hits"], stats["misses"], stats["bytes"]) == (2, 2, 300)
+    finally:
+        bank.close()
+
+
+def test_open_bank_skips_missing_and_broken_files(tmp_path):
+    assert open_bank("") is None
+    assert open_bank(str(tmp_path / "missing.bin")) is None
+    broken = tmp_path / "broken.bin"
+    broken.write_bytes(b"NOTABANK" + bytes(100))
+    assert open_bank(str(broken)) is None
+
+
+def test_time_phrases_cover_every_minute():
+    phrases = time_phrases()
+    assert len(phrases) == 2 * 24 * 60
+    unique = list(iter_unique(phrases + [" " + phrases[0]]))
+    assert len(unique) == len(set(bank_key(text) for text in phrases))
+
+
+def test_bank_phrase_is_served_without_model(client, httpd, fake_model, monkeypatch, tmp_path):
+    path = str(tmp_path / "phrases.bin")
+    write_bank(path, [(normalizer.normalize("Слушаю."), tone(4800, 7))], 48000, "kseniya", "v1")
+    bank = PhraseBank(path)
+    monkeypatch.setattr(httpd, "phrase_bank", bank)
+
+    response = client.get("/api/tts/audio", params={"text": "Слушаю.", "sample_rate": 24000})
+    rate, data = wavfile.read(io.BytesIO(response.content))
+    assert rate == 24000 and len(data) == 2400
+    assert fake_model.calls == []
+    assert client.get("/api/bank/stats").json()["hits"] == 1
+
+    client.get("/api/tts/audio", params={"text": "Другое."})
+    assert fake_model.calls == ["другое."]
+
+
+def test_bank_for_other_model_version_is_not_used(client, httpd, monkeypatch, tmp_path):
+    path = str(tmp_path / "phrases.bin")
+    write_bank(path, [("да.", tone(10, 1))], 48000, "kseniya", "другая-модель")
+    monkeypatch.setattr(httpd, "TTS_PHRASE_BANK", path)
+    monkeypatch.setattr(httpd, "phrase_bank", None)
+    httpd._open_phrase_bank()
+    assert httpd.phrase_bank is None
+    assert client.get("/api/bank/stats").status_code == 404
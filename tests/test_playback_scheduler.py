@@ -0,0 +1,162 @@
+"""PlaybackScheduler: порядок по приоритету, вытеснение, отмена, крайний срок."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.core.playback_scheduler import (
+    PRIORITY_ALARM,
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    STATUS_CANCELLED,
+    STATUS_DONE,
+    STATUS_EXPIRED,
+    STATUS_INTERRUPTED,
+    STATUS_PLAYING,
+    PlaybackScheduler,
+)
+
+
+PCM = np.zeros(10, dtype=np.int16)
+
+
+class FakeDevice:
+    """Функция воспроизведения: звучит, пока тест не отпустит фрагмент или не прервут."""
+
+    def __init__(self):
+        self.played = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, pcm, samplerate, interrupt):
+        self.played.append(int(pcm[0]))
+        self.started.set()
+        while not self.release.is_set():
+            if interrupt.wait(0.01):
+                return False
+        return True
+
+
+@pytest.fixture
+def device():
+    return FakeDevice()
+
+
+@pytest.fixture
+def scheduler(device):
+    scheduler = PlaybackScheduler(device)
+    yield scheduler
+    device.release.set()
+    scheduler.stop()
+
+
+def marked(value: int) -> np.ndarray:
+    return np.full(10, value, dtype=np.int16)
+
+
+def wait_status(job, status, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while job.status != status and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert job.status == status
+
+
+def test_enqueue_returns_immediately_and_plays(scheduler, device):
+    scheduler.start()
+    device.release.set()
+    job = scheduler.create_job("привет")
+    scheduler.enqueue(job, PCM, 48000)
+    assert job.done.wait(2)
+    assert job.status == STATUS_DONE
+    assert job.time_to_first_audio is not None
+    assert scheduler.active_count() == 0
+
+
+def test_queued_jobs_play_by_priority_then_fifo(scheduler, device):
+    jobs = []
+    for value, priority in ((1, PRIORITY_LOW), (2, PRIORITY_NORMAL), (3, PRIORITY_HIGH), (4, PRIORITY_NORMAL)):
+        job = scheduler.create_job(str(value), priority)
+        scheduler.enqueue(job, marked(value), 48000)
+        jobs.append(job)
+    assert scheduler.queue_depth() == 4
+
+    device.release.set()
+    scheduler.start()
+    for job in jobs:
+        assert job.done.wait(2)
+    assert device.played == [3, 2, 4, 1]
+
+
+def test_higher_priority_preempts_playing_job(scheduler, device):
+    scheduler.start()
+    chatter = scheduler.create_job("болтовня", PRIORITY_NORMAL)
+    scheduler.enqueue(chatter, marked(1), 48000)
+    assert device.started.wait(2)
+
+    alarm = scheduler.create_job("тревога", PRIORITY_ALARM)
+    scheduler.enqueue(alarm, marked(2), 48000)
+    assert chatter.done.wait(2)
+    assert chatter.status == STATUS_INTERRUPTED
+
+    wait_status(alarm, STATUS_PLAYING)
+    device.release.set()
+    assert alarm.done.wait(2)
+    assert alarm.status == STATUS_DONE
+    assert device.played == [1, 2]
+
+
+def test_equal_priority_does_not_preempt(scheduler, device):
+    scheduler.start()
+    first = scheduler.create_job("первое")
+    scheduler.enqueue(first, marked(1), 48000)
+    assert device.started.wait(2)
+    second = scheduler.create_job("второе")
+    scheduler.enqueue(second, marked(2), 48000)
+    time.sleep(0.05)
+    assert first.status == STATUS_PLAYING
+
+    device.release.set()
+    assert second.done.wait(2)
+    assert (first.status, second.status) == (STATUS_DONE, STATUS_DONE)
+
+
+def test_cancel_queued_and_playing_jobs(scheduler, device):
+    scheduler.start()
+    playing = scheduler.create_job("звучит")
+    scheduler.enqueue(playing, marked(1), 48000)
+    assert device.started.wait(2)
+    queued = scheduler.create_job("ждёт")
+    scheduler.enqueue(queued, marked(2), 48000)
+
+    scheduler.cancel(queued.id)
+    assert queued.status == STATUS_CANCELLED
+    scheduler.cancel(playing.id)
+    assert playing.done.wait(2)
+    assert playing.status == STATUS_CANCELLED
+    assert device.played == [1]
+    assert scheduler.active_count() == 0
+
+
+def test_job_past_deadline_expires_in_queue(scheduler, device):
+    job = scheduler.create_job("опоздал", deadline=time.time() - 1)
+    scheduler.enqueue(job, PCM, 48000)
+    scheduler.start()
+    assert job.done.wait(2)
+    assert job.status == STATUS_EXPIRED
+    assert device.played == []
+
+
+def test_segments_play_in_order_while_synthesis_continues(scheduler, device):
+    device.release.set()
+    scheduler.start()
+    job = scheduler.create_job("три предложения")
+    for value in (1, 2, 3):
+        assert scheduler.add_segment(job, marked(value), 48000)
+        time.sleep(0.02)
+    scheduler.complete(job)
+    assert job.done.wait(2)
+    assert device.played == [1, 2, 3]
+    assert not scheduler.add_segment(job, marked(4), 48000)
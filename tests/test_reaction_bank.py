@@ -0,0 +1,116 @@
+"""Звуки-реакции: декодирование в память при загрузке, /api/react без чтения диска."""
+
+import json
+import os
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+from app.core.reaction_bank import ReactionBank, decode_clip, open_reactions, read_items
+
+
+RATE = 16000
+
+
+@pytest.fixture
+def reactions_file(tmp_path):
+    """Справочник: моно int16, стерео float32 на другой частоте, 8-битный WAV, битые элементы."""
+    sounds = tmp_path / "sounds"
+    sounds.mkdir()
+    wavfile.write(str(sounds / "hoot.wav"), RATE, np.full(1600, 1000, dtype=np.int16))
+    wavfile.write(str(sounds / "wing.wav"), 8000, np.full((800, 2), 0.5, dtype=np.float32))
+    wavfile.write(str(sounds / "click.wav"), RATE, np.full(160, 200, dtype=np.uint8))
+    path = tmp_path / "reactions.json"
+    path.write_text(json.dumps({"items": [
+        {"id": "hoot", "file": "sounds/hoot.wav"},
+        {"name": "wing", "sound": "sounds/wing.wav"},
+        {"id": "click", "path": "sounds/click.wav"},
+        {"id": "lost", "file": "sounds/missing.wav"},
+        {"file": "sounds/hoot.wav"},
+        "не элемент",
+    ]}), encoding="utf-8")
+    return str(path)
+
+
+def test_bank_decodes_every_clip_once(reactions_file):
+    bank = ReactionBank(reactions_file, RATE)
+    assert len(bank) == 3 and bank.sample_rate == RATE
+
+    hoot = bank.get("hoot")
+    assert hoot.tolist() == [1000] * 1600
+    assert not hoot.flags.writeable
+    wing = bank.get("wing")  # стерео 8 кГц -> моно 16 кГц
+    assert len(wing) == 1600 and abs(np.median(wing) - 16384) <= 16  # float 0.5, а не тишина
+    assert bank.get("click")[0] == (200 - 128) << 8
+    assert bank.get("lost") is None
+
+    stats = bank.stats()
+    assert stats["reactions"] == ["click", "hoot", "wing"]
+    assert stats["bytes"] == (1600 + 1600 + 160) * 2
+    assert set(stats["errors"]) == {"lost", "#4"}
+
+
+def test_items_list_and_errors(tmp_path):
+    path = tmp_path / "list.json"
+    path.write_text(json.dumps([{"id": "a", "file": "a.wav"}, 5]), encoding="utf-8")
+    assert read_items(str(path)) == [{"id": "a", "file": "a.wav"}]
+    path.write_text(json.dumps({"items": "a.wav"}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        read_items(str(path))
+    assert open_reactions("", RATE) is None
+    assert open_reactions(str(tmp_path / "missing.json"), RATE) is None
+
+
+def test_decode_clip_resamples(tmp_path):
+    path = str(tmp_path / "tone.wav")
+    wavfile.write(path, 48000, np.full(4800, -500, dtype=np.int16))
+    pcm = decode_clip(path, 24000)
+    assert pcm.dtype == np.int16 and len(pcm) == 2400
+
+
+@pytest.fixture
+def loaded(client, httpd, monkeypatch, reactions_file):
+    monkeypatch.setattr(httpd, "TTS_REACTIONS_FILE", reactions_file)
+    monkeypatch.setattr(httpd, "reactions", None)
+    response = client.post("/api/reactions/reload")
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_react_mixes_or_queues(client, httpd, loaded):
+    assert loaded["reactions"] == ["click", "hoot", "wing"]
+
+    mixed = client.post("/api/react/hoot").json()
+    assert (mixed["mode"], mixed["job_id"], mixed["duration"]) == ("mix", None, 0.1)
+    queued = client.post("/api/react/wing", params={"mode": "queue", "priority": 1}).json()
+    assert queued["mode"] == "queue" and queued["job_id"]
+
+    assert client.post("/api/react/nope").status_code == 404
+    assert client.post("/api/react/hoot", params={"mode": "loud"}).status_code == 400
+
+    stats = client.get("/api/reactions").json()
+    assert (stats["mixed"], stats["queued"]) == (1, 1)
+    assert stats["avg_dispatch_ms"] is not None
+
+
+def test_reload_swaps_bank(client, httpd, loaded, reactions_file):
+    old = httpd.reactions
+    with open(reactions_file, "w", encoding="utf-8") as f:
+        json.dump([{"id": "only", "file": "sounds/hoot.wav"}], f)
+    assert client.post("/api/reactions/reload").json()["reactions"] == ["only"]
+    assert httpd.reactions is not old
+    assert old.get("hoot") is not None  # прежний банк не меняется
+
+    with open(reactions_file, "w", encoding="utf-8") as f:
+        f.write("{")
+    assert client.post("/api/reactions/reload").status_code == 400
+    assert client.post("/api/react/only").status_code == 200
+
+
+def test_missing_file_keeps_bank(client, httpd, loaded, reactions_file):
+    old = httpd.reactions
+    os.remove(reactions_file)
+    assert client.post("/api/reactions/reload").status_code == 404
+    assert httpd.reactions is old
+    assert client.post("/api/react/hoot").status_code == 200
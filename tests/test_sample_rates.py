@@ -0,0 +1,81 @@
+"""Частота ответа: sample_rate и уровни качества, синтез на ближайшей частоте Silero, Opus."""
+
+import io
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+from app.core.text_to_speech import resolve_sample_rate, synthesis_rate
+from app.utils.codecs import CODECS, CodecError
+
+try:
+    import soundfile
+except (ImportError, OSError):
+    soundfile = None
+
+needs_opus = pytest.mark.skipif(not CODECS["opus"].available(), reason="нет soundfile с Opus")
+
+
+def test_resolve_sample_rate():
+    assert resolve_sample_rate(None, None, default=48000) == 48000
+    assert resolve_sample_rate(16000, "high") == 16000  # явная частота важнее уровня
+    assert resolve_sample_rate(None, "Telephony") == 8000
+    assert resolve_sample_rate(None, "standard") == 24000
+    with pytest.raises(ValueError):
+        resolve_sample_rate(96000)
+    with pytest.raises(ValueError):
+        resolve_sample_rate(None, "ultra")
+
+
+def test_synthesis_rate_is_nearest_silero_rate_not_below():
+    assert [synthesis_rate(rate) for rate in (8000, 11025, 16000, 24000, 44100, 48000)] == [
+        8000, 24000, 24000, 24000, 48000, 48000,
+    ]
+
+
+def test_arbitrary_rate_is_resampled(client, fake_model):
+    response = client.get("/api/tts/audio", params={"text": "Привет.", "sample_rate": 16000})
+    rate, data = wavfile.read(io.BytesIO(response.content))
+    assert rate == 16000 and response.headers["x-sample-rate"] == "16000"
+    assert len(data) == len("Привет.") * 160
+    assert fake_model.calls == ["привет."]  # синтез один, на 24000 Гц
+
+
+def test_quality_tier_and_bad_rate(client):
+    response = client.post("/api/tts/audio", json={"text": "Привет.", "quality": "telephony"})
+    assert response.headers["x-sample-rate"] == "8000"
+    assert client.get("/api/tts/audio", params={"text": "Привет.", "sample_rate": 4000}).status_code == 400
+
+
+def test_opus_output_rate():
+    opus = CODECS["opus"]
+    assert [opus.output_rate(rate) for rate in (8000, 11025, 22050, 44100, 48000)] == [
+        8000, 12000, 24000, 48000, 48000,
+    ]
+    assert CODECS["wav"].output_rate(22050) == 22050
+
+
+@needs_opus
+def test_opus_at_unsupported_rate_uses_nearest_opus_rate(client):
+    response = client.get("/api/tts/audio", params={"text": "Привет.", "format": "opus", "sample_rate": 22050})
+    assert response.status_code == 200
+    assert response.headers["x-sample-rate"] == "24000"
+    data, rate = soundfile.read(io.BytesIO(response.content), dtype="int16")
+    assert rate == 24000 and len(data) > 0
+
+
+@needs_opus
+def test_encoder_error_is_codec_error():
+    with pytest.raises(CodecError):
+        CODECS["opus"].encode(np.zeros(480, dtype=np.int16), 22050)
+
+
+def test_encoder_error_is_reported_not_raised(client, monkeypatch):
+    def broken(pcm, samplerate):
+        raise CodecError("кодер сломан")
+
+    monkeypatch.setattr(CODECS["pcm"], "encode", broken)
+    response = client.get("/api/tts/audio", params={"text": "Привет.", "format": "pcm"})
+    assert response.status_code == 500
+    assert "кодер сломан" in response.json()["detail"]
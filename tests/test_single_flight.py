@@ -0,0 +1,76 @@
+"""Склейка одинаковых одновременных запросов синтеза (single-flight)."""
+
+import asyncio
+from concurrent.futures import Future
+
+from app.core.single_flight import SingleFlight
+
+
+def test_second_request_joins_running_task():
+    flights = SingleFlight()
+    submitted = []
+
+    def submit():
+        future = Future()
+        submitted.append(future)
+        return future
+
+    first, leader = flights.acquire("ключ", submit)
+    second, follower = flights.acquire("ключ", submit)
+    assert (leader, follower) == (True, False)
+    assert first is second and len(submitted) == 1
+    assert flights.stats() == {"leaders": 1, "coalesced": 1, "in_flight_keys": 1}
+
+    first.set_result(42)
+    assert flights.stats()["in_flight_keys"] == 0
+    third, leader = flights.acquire("ключ", submit)
+    assert leader and third is not first
+
+
+def test_task_is_cancelled_only_when_every_waiter_left():
+    flights = SingleFlight()
+    future, _ = flights.acquire("ключ", Future)
+    flights.acquire("ключ", Future)
+    assert not flights.release("ключ", future)
+    assert flights.release("ключ", future)
+    assert flights.stats()["in_flight_keys"] == 0
+
+
+def test_identical_concurrent_requests_synthesize_once(executor, fake_model):
+    fake_model.delay = 0.1
+
+    async def scenario():
+        return await asyncio.gather(*(executor.synthesize("тревога") for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert fake_model.calls == ["тревога"]
+    assert all(pcm is results[0] for pcm in results)
+    assert executor.stats()["single_flight"]["coalesced"] == 4
+
+
+def test_timeout_of_one_waiter_does_not_cancel_shared_task(executor, fake_model):
+    fake_model.delay = 0.2
+
+    async def scenario():
+        patient = asyncio.ensure_future(executor.synthesize("общий", timeout=5))
+        await asyncio.sleep(0.01)
+        try:
+            await executor.synthesize("общий", timeout=0.05)
+        except TimeoutError:
+            pass
+        return await patient
+
+    assert len(asyncio.run(scenario())) == len("общий") * 480
+    assert fake_model.calls == ["общий"]
+
+
+def test_different_voices_are_not_coalesced(executor, fake_model):
+    async def scenario():
+        await asyncio.gather(
+            executor.synthesize("привет", speaker="kseniya"),
+            executor.synthesize("привет", speaker="baya"),
+            executor.synthesize("привет", sample_rate=24000),
+        )
+
+    asyncio.run(scenario())
+    assert len(fake_model.calls) == 3
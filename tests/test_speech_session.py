@@ -0,0 +1,120 @@
+"""Потоковый текст (токены LLM): SentenceStream, SpeechSession и /ws/tts."""
+
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.speech_session import SpeechSession
+from app.utils.text_splitter import SentenceStream
+
+
+def test_sentence_is_emitted_once_next_char_arrives():
+    stream = SentenceStream()
+    assert stream.feed("Прив") == []
+    assert stream.feed("ет!") == []  # может оказаться «Привет!..»
+    assert stream.feed(" Как дела") == ["Привет!"]
+    assert stream.feed("? Число 3.") == ["Как дела?"]
+    assert stream.feed("5 велико") == []
+    assert stream.pending.strip() == "Число 3.5 велико"
+    assert stream.flush() == ["Число 3.5 велико"]
+    assert stream.flush() == []
+
+
+def test_long_tail_is_cut_on_word_boundary():
+    stream = SentenceStream(max_chars=12)
+    assert stream.feed("раз два три четыре пять") == ["раз два три"]
+    assert stream.pending == "четыре пять"
+    stream.clear()
+    assert stream.flush() == []
+
+
+class Recorder:
+    """Отправленные клиенту сообщения: JSON как dict, аудио как число отсчётов."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        self.sent.append(len(data) // 2)
+
+
+def make_session(recorder, delays):
+    async def synthesize(text, timeout):
+        await asyncio.sleep(delays.get(text, 0))
+        if text == "Ошибка.":
+            raise RuntimeError("boom")
+        return np.zeros(len(text), dtype=np.int16)
+
+    return SpeechSession(
+        synthesize, recorder.send_json, recorder.send_bytes, lambda pcm: pcm.tobytes(), concurrency=4
+    )
+
+
+def test_session_sends_sentences_in_order():
+    recorder = Recorder()
+
+    async def run():
+        # Первое предложение синтезируется дольше второго
+        session = make_session(recorder, {"Первое.": 0.05})
+        sender = asyncio.ensure_future(session.run())
+        for message in ({"type": "text", "text": "Первое. Ошибка. Вто"}, {"type": "text", "text": "рое"},
+                        {"type": "end"}):
+            await session.handle(json.dumps(message))
+        await sender
+        assert session.finished
+
+    asyncio.run(run())
+    assert [m if isinstance(m, int) else (m["type"], m.get("id")) for m in recorder.sent] == [
+        ("sentence", 0), 7, ("error", 1), ("sentence", 2), 6, ("flushed", None),
+    ]
+
+
+def test_cancel_drops_pending_audio():
+    recorder = Recorder()
+
+    async def run():
+        session = make_session(recorder, {"Долгое.": 10})
+        sender = asyncio.ensure_future(session.run())
+        session.feed("Долгое. Хвост")
+        await asyncio.sleep(0.01)
+        session.cancel()
+        session.feed("Новое. ")
+        await session.handle("не json")
+        session.end()
+        await asyncio.wait_for(sender, 1)
+
+    asyncio.run(run())
+    assert [m if isinstance(m, int) else m["type"] for m in recorder.sent] == [
+        "error", "cancelled", "sentence", 6, "flushed",
+    ]
+
+
+def test_websocket_streams_sentences(client, fake_model):
+    with client.websocket_connect("/ws/tts?sample_rate=8000") as ws:
+        ready = ws.receive_json()
+        assert ready["type"] == "ready" and ready["sample_rate"] == 8000 and ready["format"] == "pcm"
+        ws.send_text(json.dumps({"type": "text", "text": "Раз. Два"}))
+        ws.send_text(json.dumps({"type": "end"}))
+        sentence = ws.receive_json()
+        assert sentence == {"type": "sentence", "id": 0, "text": "Раз.", "samples": len("Раз.") * 80}
+        assert len(ws.receive_bytes()) == sentence["samples"] * 2
+        assert ws.receive_json()["text"] == "Два"
+        ws.receive_bytes()
+        assert ws.receive_json() == {"type": "flushed"}
+        with pytest.raises(WebSocketDisconnect):
+            ws.receive_json()
+    assert sorted(fake_model.calls) == ["два", "раз."]
+
+
+def test_websocket_rejects_whole_file_format(client):
+    with client.websocket_connect("/ws/tts?format=flac") as ws:
+        error = ws.receive_json()
+        assert error["type"] == "error" and error["status"] == 400
+        with pytest.raises(WebSocketDisconnect):
+            ws.receive_json()
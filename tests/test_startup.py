@@ -0,0 +1,76 @@
+"""Фоновый запуск: /health сразу, /ready после загрузки модели, порядок этапов."""
+
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.core.startup import STAGE_FAILED, STAGE_READY, StartupState
+
+
+def test_stages_are_timed():
+    state = StartupState()
+    state.mark_imported(0.5)
+    state.stage("loading")
+    state.stage(STAGE_READY)
+    result = state.to_dict()
+    assert result["ready"] and result["stage"] == STAGE_READY
+    assert result["import_time_sec"] == 0.5
+    assert set(result["stages_sec"]) == {"starting", "loading"}
+    assert result["time_to_ready_sec"] >= 0
+
+
+def test_ready_after_model_load_while_health_answers_immediately(httpd, monkeypatch):
+    loaded = threading.Event()
+    start = httpd.inference.start
+
+    def slow_start():
+        loaded.wait(5)
+        start()
+
+    monkeypatch.setattr(httpd.inference, "start", slow_start)
+    with TestClient(httpd.app) as client:
+        assert client.get("/health").status_code == 200
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["stage"] == "loading"
+        assert client.get("/api/tts/audio", params={"text": "Привет"}).status_code == 503
+
+        loaded.set()
+        deadline = time.monotonic() + 5
+        while client.get("/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+
+def test_model_starts_before_audio_device(httpd, monkeypatch):
+    events = []
+    start = httpd.inference.start
+
+    def record_start():
+        events.append("model:begin")
+        time.sleep(0.05)
+        start()
+        events.append("model:end")
+
+    monkeypatch.setattr(httpd.inference, "start", record_start)
+    monkeypatch.setattr(httpd, "_init_audio", lambda: events.append("audio"))
+    with TestClient(httpd.app):
+        deadline = time.monotonic() + 5
+        while not httpd.startup.is_ready:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    assert events == ["model:begin", "model:end", "audio"]
+
+
+def test_failed_model_load_is_reported(httpd, monkeypatch):
+    def broken_start():
+        raise FileNotFoundError("Локальная модель не найдена")
+
+    monkeypatch.setattr(httpd.inference, "start", broken_start)
+    with TestClient(httpd.app) as client:
+        deadline = time.monotonic() + 5
+        while client.get("/ready").json()["stage"] != STAGE_FAILED:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert "не найдена" in client.get("/ready").json()["error"]
@@ -0,0 +1,44 @@
+"""/api/tts/stream: потоковый WAV и «сырой» PCM без воспроизведения на сервере."""
+
+import io
+
+import numpy as np
+from scipy.io import wavfile
+
+
+def test_stream_wav_is_playable(client, fake_model):
+    response = client.get("/api/tts/stream", params={"text": "Первое. Второе.", "format": "wav"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("audio/wav")
+    assert response.headers["x-sample-rate"] == "48000"
+    assert response.content[:4] == b"RIFF"
+    rate, data = wavfile.read(io.BytesIO(response.content))
+    assert rate == 48000
+    # Предложения склеиваются с коротким перекрёстным затуханием
+    assert abs(len(data) - len("Первое.Второе.") * 480) <= 480
+    assert sorted(fake_model.calls) == ["второе.", "первое."]
+
+
+def test_stream_pcm_has_no_header(client):
+    response = client.get(
+        "/api/tts/stream", params={"text": "Привет.", "format": "pcm", "sample_rate": 24000}
+    )
+    assert response.status_code == 200
+    assert response.headers["x-sample-rate"] == "24000"
+    pcm = np.frombuffer(response.content, dtype="<i2")
+    assert len(pcm) == len("Привет.") * 240
+
+
+def test_stream_rejects_empty_text_and_unknown_format(client):
+    assert client.get("/api/tts/stream", params={"text": "  "}).status_code == 400
+    assert client.get("/api/tts/stream", params={"text": "Привет", "format": "mp3"}).status_code == 400
+
+
+def test_stream_returns_503_until_ready(httpd):
+    from fastapi.testclient import TestClient
+
+    # Без lifespan модель не загружается
+    client = TestClient(httpd.app)
+    response = client.get("/api/tts/stream", params={"text": "Привет"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,77 @@
+"""Канонизация текста: одна запись кэша на одинаково звучащие написания."""
+
+import pytest
+
+from app.utils.text_normalizer import TextNormalizer, cardinal, normalize_plain, normalize_ssml, year_ordinal
+from app.utils.time2words import time_to_text
+
+
+@pytest.mark.parametrize("text", ["Привет!", " привет! ", "Привет!!!", "«Привет»!", "ПРИВЕТ !"])
+def test_spellings_share_canonical_form(text):
+    assert normalize_plain(text) == "привет!"
+
+
+def test_terminal_punctuation_is_kept():
+    # «!» меняет интонацию — отдельная запись кэша
+    assert normalize_plain(" привет ") == normalize_plain("Привет, ") == "привет"
+    assert normalize_plain("Привет?") == "привет?"
+
+
+def test_whitespace_dashes_and_ellipsis():
+    assert normalize_plain("Ну  -  да...\nНет\n\n Абзац") == "ну — да… нет\n\nабзац"
+    assert normalize_plain("Раз,два ,три") == "раз, два, три"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("14:05", "чет+ырнадцать час+ов пять мин+ут"),
+    ("23:30", "дв+адцать три час+а три+дцать мин+ут"),
+    ("00:05", "ноль час+ов пять мин+ут"),
+    ("7:00", "семь час+ов р+овно"),
+    ("9:30:15", "д+евять час+ов три+дцать мин+ут пятн+адцать сек+унд"),
+])
+def test_time_on_24_hour_clock(text, expected):
+    assert normalize_plain(text) == expected
+
+
+def test_time_to_text_keeps_12_hour_default():
+    assert time_to_text("14:05") == "два час+а пять мин+ут"
+    assert time_to_text("14:05", hours24=True) == "чет+ырнадцать час+ов пять мин+ут"
+    assert time_to_text("14:05", style="spoken", hours24=True) == "пять мин+ут три"
+
+
+def test_bare_integers_stay_digits():
+    assert normalize_plain("В 2025 году 3 кота") == "в 2025 году 3 кота"
+    assert normalize_plain("-5 градусов") == "-5 градусов"
+    assert normalize_plain("1 000 000 рублей") == "1000000 рублей"
+
+
+def test_dates_percents_and_decimals():
+    assert normalize_plain("01.02.2025") == "первое февраля две тысячи двадцать пятого года"
+    assert normalize_plain("скидка 21%") == "скидка двадцать один процент"
+    assert normalize_plain("курс 3,5") == "курс три целых пять десятых"
+    assert normalize_plain("версия 1.2.3") == "версия 1.2.3"
+
+
+def test_number_words():
+    assert cardinal(2_001_012) == "два миллиона одна тысяча двенадцать"
+    assert cardinal(1000) == "тысяча"
+    assert year_ordinal(2000) == "двухтысячного"
+    assert year_ordinal(1990) == "тысяча девятьсот девяностого"
+
+
+def test_ssml_is_canonical_by_structure():
+    a = '<speak>  Привет!!! <break time="1s"/> <prosody RATE="Slow" pitch="low">Как дела?</prosody></speak>'
+    b = '<speak>привет!<break time="1000ms"/><prosody pitch="low" rate="slow">как дела?</prosody></speak>'
+    assert normalize_ssml(a) == normalize_ssml(b) == (
+        '<speak>привет!<break time="1000ms"/><prosody pitch="low" rate="slow">как дела?</prosody></speak>'
+    )
+
+
+def test_normalizer_counts_merged_spellings():
+    normalizer = TextNormalizer(cache_size=2)
+    for text in ("Привет!", "привет!!", "Привет!", "Пока."):
+        normalizer.normalize(text)
+    stats = normalizer.stats()
+    assert (stats["calls"], stats["cache_hits"], stats["merged_spellings"]) == (4, 1, 1)
+    assert stats["cache_entries"] == 2
+    assert TextNormalizer(enabled=False).normalize(" Как есть ") == " Как есть "
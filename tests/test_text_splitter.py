@@ -0,0 +1,37 @@
+"""Разбиение текста и SSML на предложения."""
+
+from app.utils.text_splitter import split_sentences, split_ssml, split_text
+
+
+def test_plain_text_splits_on_sentence_ends_and_paragraphs():
+    text = "Привет! Как дела? Всё хорошо... А у тебя?\n\nНовый абзац без точки"
+    assert split_sentences(text) == [
+        "Привет!", "Как дела?", "Всё хорошо...", "А у тебя?", "Новый абзац без точки",
+    ]
+
+
+def test_dots_inside_numbers_do_not_split():
+    assert split_sentences("Число 3.5 и версия v1.2 остаются.") == ["Число 3.5 и версия v1.2 остаются."]
+
+
+def test_closing_quotes_stay_with_sentence():
+    assert split_sentences("Она сказала: «Иду.» Потом ушла.") == ["Она сказала: «Иду.»", "Потом ушла."]
+
+
+def test_ssml_chunks_are_standalone_documents():
+    text = (
+        '<speak><p>Первый абзац. Второе предложение.</p>'
+        '<prosody rate="slow">Медленно. Ещё медленнее.</prosody><break time="1s"/></speak>'
+    )
+    assert split_ssml(text) == [
+        "<speak><p>Первый абзац.</p></speak>",
+        "<speak><p>Второе предложение.</p></speak>",
+        '<speak><prosody rate="slow">Медленно.</prosody></speak>',
+        '<speak><prosody rate="slow">Ещё медленнее.</prosody><break time="1s"/></speak>',
+    ]
+
+
+def test_split_text_dispatches_on_speak_tag():
+    assert split_text("Раз. Два.") == ["Раз.", "Два."]
+    assert split_text("<speak>Раз. Два.</speak>") == ["<speak>Раз.</speak>", "<speak>Два.</speak>"]
+    assert split_text("   ") == ["   "]
@@ -0,0 +1,56 @@
+"""План потоков инференса: раскладка по ядрам, сохранение, применение при запуске."""
+
+import pytest
+
+from app.core.inference_executor import MODE_THREAD, InferenceExecutor
+from app.core.thread_plan import ThreadPlan, available_cpus, cpu_sets, load_plan
+from app.utils.autotune import candidates
+
+
+CORES = [[0, 4], [1, 5], [2, 6], [3, 7]]  # 4 ядра с SMT-соседями
+
+
+def test_cpu_sets_give_each_worker_own_cores():
+    assert cpu_sets(2, 2, CORES) == [[0, 1], [2, 3]]
+    assert cpu_sets(4, 1, CORES) == [[0], [1], [2], [3]]
+    with pytest.raises(ValueError):
+        cpu_sets(3, 2, CORES)
+
+
+def test_pool_candidates_fit_into_cores():
+    pool = candidates("pool", 4, max_workers=4, pin=True)
+    assert all(workers * threads <= 4 for workers, threads, _ in pool)
+    assert (4, 1, True) in pool and (1, 4, False) in pool
+    # В режиме thread рабочие делят один пул потоков torch
+    assert (2, 4, False) in candidates("thread", 4, max_workers=2, pin=False)
+
+
+def test_plan_round_trip(tmp_path):
+    path = str(tmp_path / "plan.json")
+    ThreadPlan("pool", 2, 2, cpus=[[0], [1]], measured={"throughput_rps": 3.5}).save(path)
+    plan = load_plan(path, mode="pool")
+    assert (plan.workers, plan.threads, plan.cpus) == (2, 2, [[0], [1]])
+    assert plan.measured == {"throughput_rps": 3.5}
+    assert plan.describe() == "mode=pool, 2 × 2 потоков torch с привязкой к ядрам"
+
+
+def test_plan_for_other_mode_or_host_is_ignored(tmp_path):
+    path = str(tmp_path / "plan.json")
+    ThreadPlan("pool", 2, 2).save(path)
+    assert load_plan(path, mode="thread") is None
+    ThreadPlan("pool", 2, 2, host={"cpus": available_cpus() + [999]}).save(path)
+    assert load_plan(path, mode="pool") is None
+    (tmp_path / "broken.json").write_text("{")
+    assert load_plan(str(tmp_path / "broken.json")) is None
+    assert load_plan(str(tmp_path / "missing.json")) is None
+
+
+def test_executor_applies_plan(fake_model):
+    executor = InferenceExecutor(MODE_THREAD, workers=1, batch_max_size=1, plan=ThreadPlan(MODE_THREAD, 3, 1))
+    executor.start()
+    try:
+        stats = executor.stats()
+        assert stats["workers"] == 3
+        assert stats["thread_plan"] == "mode=thread, 3 × 1 потоков torch"
+    finally:
+        executor.shutdown()
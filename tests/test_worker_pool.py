@@ -0,0 +1,122 @@
+"""ModelWorkerPool: распределение запросов, перезапуск упавших процессов без fork в родителе."""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.core.inference_executor import MODE_POOL, InferenceExecutor
+from app.core.worker_pool import ModelWorkerPool, WorkerCrashedError
+
+
+class EchoTTS:
+    """Вместо модели: методы, которые пул вызывает в рабочих процессах."""
+
+    samplerate = 48000
+    model_version = "echo:1"
+
+    def share_memory(self):
+        pass
+
+    def synthesize(self, text, speaker=None, sample_rate=None):
+        return f"{text}:{os.getpid()}"
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+        return os.getpid()
+
+    def crash(self):
+        os._exit(3)
+
+
+@pytest.fixture
+def pool():
+    pool = ModelWorkerPool(EchoTTS, workers=2, threads_per_worker=1)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def test_requests_are_served_by_worker_processes(pool):
+    result = pool.submit("synthesize", "привет").result(timeout=5)
+    text, pid = result.split(":")
+    assert text == "привет"
+    assert int(pid) in {worker["pid"] for worker in pool.stats()}
+    assert int(pid) != os.getpid()
+
+
+def test_least_loaded_worker_gets_the_request(pool):
+    busy = pool.submit("sleep", 0.5)
+    other = pool.submit("sleep", 0)
+    assert other.result(timeout=5) != busy.result(timeout=5)
+
+
+def test_broadcast_reaches_every_worker(pool):
+    pids = {future.result(timeout=5) for future in pool.broadcast("sleep", 0)}
+    assert pids == {worker["pid"] for worker in pool.stats()}
+
+
+def test_crashed_worker_is_restarted_without_forking_the_parent(pool, monkeypatch):
+    def no_fork():
+        raise AssertionError("fork в многопоточном родителе")
+
+    monkeypatch.setattr(os, "fork", no_fork)
+    before = {worker["index"]: worker["pid"] for worker in pool.stats()}
+
+    with pytest.raises(WorkerCrashedError):
+        pool.submit("crash").result(timeout=5)
+
+    stats = pool.stats()
+    crashed = next(worker for worker in stats if worker["restarts"] == 1)
+    assert crashed["pid"] != before[crashed["index"]]
+    assert all(worker["alive"] for worker in stats)
+    # Замена читает ту же очередь запросов
+    results = [pool.submit("synthesize", str(i)).result(timeout=5) for i in range(4)]
+    assert [result.split(":")[0] for result in results] == ["0", "1", "2", "3"]
+
+
+def test_method_error_is_returned_to_caller(pool):
+    with pytest.raises(RuntimeError, match="AttributeError"):
+        pool.submit("missing").result(timeout=5)
+
+
+def test_shutdown_stops_worker_processes():
+    pool = ModelWorkerPool(EchoTTS, workers=2, threads_per_worker=1)
+    pool.start()
+    pids = [worker["pid"] for worker in pool.stats()]
+    pool.shutdown()
+    deadline = time.monotonic() + 5
+    while any(worker["alive"] for worker in pool.stats()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not any(worker["alive"] for worker in pool.stats())
+    assert len(pids) == 2
+    with pytest.raises(RuntimeError):
+        pool.submit("synthesize", "после остановки")
+
+
+def test_executor_pool_mode_synthesizes(fake_model):
+    executor = InferenceExecutor(MODE_POOL, workers=2, timeout=5, batch_max_size=1)
+    executor.start()
+    try:
+        pcm = asyncio.run(executor.synthesize("привет", sample_rate=24000))
+        assert len(pcm) == len("привет") * 240
+        assert executor.model_version == "fake:1"
+        assert len(executor.stats()["pool"]) == 2
+    finally:
+        executor.shutdown()
+
+
+def test_queued_requests_survive_a_crash(monkeypatch):
+    pool = ModelWorkerPool(EchoTTS, workers=1, threads_per_worker=1)
+    pool.start()
+    try:
+        crashed = pool.submit("crash")
+        queued = [pool.submit("synthesize", str(i)) for i in range(3)]  # ждут в очереди упавшего
+        with pytest.raises(WorkerCrashedError):
+            crashed.result(timeout=5)
+        assert [future.result(timeout=5).split(":")[0] for future in queued] == ["0", "1", "2"]
+        (worker,) = pool.stats()
+        assert (worker["restarts"], worker["in_flight"], worker["completed"]) == (1, 0, 3)
+    finally:
+        pool.shutdown()